@@ -0,0 +1,68 @@
+"""
+Plan build benchmark
+
+Measures the time it takes to build the java objects of a test plan of many http samplers,
+with the whole element tree built by a single call into the JVM (bulk) and with one pyjnius call
+per element and per builder method (direct), which is how plans were built before.
+
+The JVM is started before measuring, each mode runs in fresh interpreters.
+
+usage:
+
+      .. code-block:: bash
+
+            python benchmarks/plan_build.py --samplers 10000 --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+BUILD = """
+import time
+from pymeter.api import JavaBuilder
+from pymeter.api.config import TestPlan, ThreadGroupSimple
+from pymeter.api.samplers import HttpSampler
+
+JavaBuilder("java.time.Duration").ofMillis(1).lower()
+start = time.perf_counter()
+samplers = [
+    HttpSampler(f"sampler {{i}}", f"http://localhost/items/{{i}}").header("X-Item", str(i))
+    for i in range({samplers})
+]
+test_plan = TestPlan(ThreadGroupSimple(1, 1, *samplers))
+built = time.perf_counter()
+test_plan.lower(bulk={bulk})
+lowered = time.perf_counter()
+print(built - start, lowered - built)
+"""
+
+
+def measure(samplers: int, bulk: bool, repeat: int) -> list:
+    """builds and lowers the plan in fresh interpreters, returns the measured (build, lower) times in seconds"""
+    code = BUILD.format(samplers=samplers, bulk=bulk)
+    return [
+        tuple(float(value) for value in subprocess.check_output([sys.executable, "-c", code], text=True).split())
+        for _ in range(repeat)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samplers", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name, bulk in (("direct", False), ("bulk", True)):
+        times = measure(args.samplers, bulk, args.repeat)
+        build_times = [build for build, _ in times]
+        lower_times = [lowered for _, lowered in times]
+        print(
+            f"{name:<8} build={statistics.median(build_times) * 1000:9.2f}ms",
+            f"lower min={min(lower_times) * 1000:9.2f}ms",
+            f"median={statistics.median(lower_times) * 1000:9.2f}ms",
+            sep="\t",
+        )
+
+
+if __name__ == "__main__":
+    main()
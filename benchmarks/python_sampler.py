@@ -0,0 +1,66 @@
+"""
+Python sampler benchmark
+
+Measures the overhead of a python sampler call compared to a `DummySampler`, with a function that returns immediately,
+for calls from the JMeter threads (`processes=0`) and for calls to a pool of worker processes.
+
+usage:
+
+      .. code-block:: bash
+
+            python benchmarks/python_sampler.py --threads 8 --iterations 2000
+"""
+import argparse
+import time
+
+from pymeter.api.config import TestPlan, ThreadGroupSimple
+from pymeter.api.samplers import DummySampler, PythonSampler
+
+
+def noop(variables):
+    """function of the benchmarked python samplers"""
+    return "ok"
+
+
+def measure(sampler, threads: int, iterations: int) -> tuple:
+    """runs the sampler and returns the wall time in seconds, the mean sample time in milliseconds and the throughput"""
+    test_plan = TestPlan(ThreadGroupSimple(threads, iterations, sampler))
+    start = time.perf_counter()
+    stats = test_plan.run()
+    elapsed = time.perf_counter() - start
+    return elapsed, stats.overall.sample_time_mean_milliseconds, stats.overall.count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    calls = args.threads * args.iterations
+    # the first test plan pays for the JVM and Groovy warm up
+    measure(DummySampler("warmup", "ok"), args.threads, 100)
+    baseline = None
+    for name, processes in (("dummy", None), ("python inline", 0), ("python processes", args.processes)):
+        if name == "dummy":
+            sampler = DummySampler(name, "ok")
+        else:
+            sampler = PythonSampler(name, noop, processes=processes)
+        try:
+            elapsed, sample_time, throughput = measure(sampler, args.threads, args.iterations)
+        finally:
+            if isinstance(sampler, PythonSampler):
+                sampler.close()
+        if baseline is None:
+            baseline = elapsed
+        print(
+            f"{name:<17} wall={elapsed:8.2f}s",
+            f"sample_time_mean={sample_time:8.3f}ms",
+            f"throughput={throughput:10.0f}/s",
+            f"overhead_per_call={(elapsed - baseline) / calls * 1e6:8.1f}us",
+            sep="\t",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Startup benchmark
+
+Measures, in fresh interpreters, the time it takes to import pymeter and the time it takes to build the first element
+(which is when the JVM is started and JMeter DSL classes are reflected).
+
+usage:
+
+      .. code-block:: bash
+
+            python benchmarks/startup.py --repeat 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+IMPORT_ONLY = """
+import time
+start = time.perf_counter()
+import pymeter.api.config, pymeter.api.samplers, pymeter.api.timers, pymeter.api.reporters
+print(time.perf_counter() - start)
+"""
+
+FIRST_ELEMENT = """
+import time
+start = time.perf_counter()
+from pymeter.api.samplers import DummySampler
+DummySampler("dummy", "hi dummy")
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, repeat: int) -> list:
+    """runs the code in fresh interpreters and returns the measured times in seconds"""
+    return [
+        float(subprocess.check_output([sys.executable, "-c", code], text=True).strip())
+        for _ in range(repeat)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name, code in (("import", IMPORT_ONLY), ("first element", FIRST_ELEMENT)):
+        times = measure(code, args.repeat)
+        print(
+            f"{name:<15} min={min(times) * 1000:9.2f}ms",
+            f"median={statistics.median(times) * 1000:9.2f}ms",
+            sep="\t",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,160 @@
 """
 Welcome to pymeter's documentation.
 
+The JVM is started when the first JMeter element is built, until then its options can be configured with `configure_jvm`:
 
+      .. code-block:: python
+
+            import pymeter
+
+            pymeter.configure_jvm(max_heap="4g", initial_heap="4g", gc="G1", always_pre_touch=True)
+
+The same options can be set without changing any code:
+
+* with the `PYMETER_JVM_OPTIONS` environment variable, e.g `PYMETER_JVM_OPTIONS="-Xmx4g -XX:+UseG1GC"`
+* with a `[jvm]` section in a `pymeter.ini` file in the working directory (or the file pointed by `PYMETER_CONFIG`)
+
+      .. code-block:: ini
+
+            [jvm]
+            max_heap = 4g
+            gc = G1
+            always_pre_touch = true
+            options = -XX:MaxGCPauseMillis=50
+
+Options from the configuration file are applied first, then the ones from the environment variable and last the ones passed to `configure_jvm`.
 """
+import configparser
 import os
 import pathlib
+import shlex
+import warnings
+from typing import Iterable, List, Optional
 
 import jnius_config
 
 jars = os.path.join(pathlib.Path(__file__).parent.resolve(), "resources", "jars", "*")
 
 jnius_config.set_classpath(".", jars)
+
+GARBAGE_COLLECTORS = {
+    "g1": "-XX:+UseG1GC",
+    "parallel": "-XX:+UseParallelGC",
+    "serial": "-XX:+UseSerialGC",
+    "z": "-XX:+UseZGC",
+    "zgc": "-XX:+UseZGC",
+    "shenandoah": "-XX:+UseShenandoahGC",
+}
+
+_configured_options: List[str] = []
+
+
+def jvm_options(
+    max_heap: Optional[str] = None,
+    initial_heap: Optional[str] = None,
+    gc: Optional[str] = None,
+    always_pre_touch: Optional[bool] = None,
+    options: Iterable[str] = (),
+) -> List[str]:
+    """
+    translates the arguments of `configure_jvm` into JVM command line options
+
+    Returns:
+
+        List[str]: JVM options
+    """
+    translated = []
+    if max_heap:
+        translated.append(f"-Xmx{max_heap}")
+    if initial_heap:
+        translated.append(f"-Xms{initial_heap}")
+    if gc:
+        if gc.lower() not in GARBAGE_COLLECTORS:
+            raise ValueError(
+                f"Unknown garbage collector `{gc}`, expected one of {sorted(GARBAGE_COLLECTORS)}"
+            )
+        translated.append(GARBAGE_COLLECTORS[gc.lower()])
+    if always_pre_touch is not None:
+        translated.append(f"-XX:{'+' if always_pre_touch else '-'}AlwaysPreTouch")
+    translated.extend(options)
+    return translated
+
+
+def running_jvm_options() -> List[str]:
+    """returns the options the running JVM was started with, starts the JVM if needed"""
+    from jnius import autoclass  # pylint: disable=import-outside-toplevel
+
+    runtime = autoclass("java.lang.management.ManagementFactory").getRuntimeMXBean()
+    return list(runtime.getInputArguments().toArray())
+
+
+def configure_jvm(
+    max_heap: Optional[str] = None,
+    initial_heap: Optional[str] = None,
+    gc: Optional[str] = None,
+    always_pre_touch: Optional[bool] = None,
+    options: Iterable[str] = (),
+) -> List[str]:
+    """
+    Sets the options of the JVM, must be called before the first JMeter element is built.
+
+    Args:
+
+        max_heap (Optional[str]): maximal heap size (e.g - "4g"), translated to `-Xmx`
+
+        initial_heap (Optional[str]): initial heap size (e.g - "4g"), translated to `-Xms`
+
+        gc (Optional[str]): garbage collector, one of "G1", "Parallel", "Serial", "ZGC" or "Shenandoah"
+
+        always_pre_touch (Optional[bool]): touch every page of the heap on startup
+
+        options (Iterable[str]): any other JVM option (e.g - "-XX:MaxGCPauseMillis=50")
+
+    Returns:
+
+        List[str]: the requested options that are, or will be, in effect.
+        When the JVM is already running, options it wasn't started with are left out and a warning is issued.
+    """
+    requested = jvm_options(max_heap, initial_heap, gc, always_pre_touch, options)
+    if jnius_config.vm_running:
+        running = set(running_jvm_options())
+        ignored = [option for option in requested if option not in running]
+        if ignored:
+            warnings.warn(
+                f"The JVM is already running, these options did not take effect: {' '.join(ignored)}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        return [option for option in requested if option in running]
+    _add_options(requested)
+    return requested
+
+
+def configured_jvm_options() -> List[str]:
+    """returns the JVM options configured by pymeter, in the order they were applied"""
+    return list(_configured_options)
+
+
+def _add_options(options: List[str]):
+    # options of the same kind (e.g two -Xmx) are resolved by the JVM, the last one wins
+    _configured_options.extend(options)
+    jnius_config.add_options(*options)
+
+
+def _options_from_config_file(path: str) -> List[str]:
+    parser = configparser.ConfigParser()
+    if not parser.read(path) or not parser.has_section("jvm"):
+        return []
+    section = parser["jvm"]
+    return jvm_options(
+        max_heap=section.get("max_heap"),
+        initial_heap=section.get("initial_heap"),
+        gc=section.get("gc"),
+        always_pre_touch=section.getboolean("always_pre_touch"),
+        options=shlex.split(section.get("options", "")),
+    )
+
+
+if not jnius_config.vm_running:
+    _add_options(_options_from_config_file(os.environ.get("PYMETER_CONFIG", "pymeter.ini")))
+    _add_options(shlex.split(os.environ.get("PYMETER_JVM_OPTIONS", "")))
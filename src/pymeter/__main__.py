@@ -0,0 +1,4 @@
+"""runs the pymeter command line interface with `python -m pymeter`"""
+from pymeter.cli import main
+
+main()
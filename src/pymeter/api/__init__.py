@@ -203,32 +203,175 @@
 
 
 """
+import functools
+import importlib
+import inspect
+import json
+import math
 import re
+import threading
 from enum import Enum
+from typing import Callable, Iterable, List, Optional, Tuple
 
-from jnius import autoclass
 
-content_type_java_enum = autoclass("org.apache.http.entity.ContentType")
+class JavaClass:
+    """
+    java class reflected on first access.
+
+    Reflecting a java class requires a running JVM, deferring it until a JMeter element is actually built
+    keeps `import pymeter` cheap and allows configuring the JVM before it starts.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.java_class = None
+
+    def get(self):
+        """returns the reflected java class, starts the JVM if needed"""
+        if self.java_class is None:
+            from jnius import autoclass  # pylint: disable=import-outside-toplevel
+
+            self.java_class = autoclass(self.name)
+        return self.java_class
+
+    def __get__(self, instance, owner=None):
+        return self.get()
+
+    def __reduce__(self):
+        return (self.__class__, (self.name,))
+
+
+class JavaBuilder(JavaClass):
+    """
+    java class whose static members are recorded as `JavaRecipe` objects instead of being called.
+
+    JMeter elements are described with recipes, so a test plan is built without a JVM,
+    the java objects are only created when the plan is lowered, right before it runs.
+    """
+
+    def __get__(self, instance, owner=None):
+        return self
+
+    def __getattr__(self, name: str) -> "JavaRecipe":
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return JavaRecipe(self, name)
+
+
+class JavaRecipe:
+    """
+    recipe of a java object: a static member of a java class, the arguments it is called with,
+    and the fluent builder methods called on the result.
+
+    Calling a method on a recipe records the call and returns the recipe itself,
+    the recorded calls are replayed on the java object when the recipe is lowered.
+    Calls made after the recipe was lowered are applied to the java object right away.
+    """
+
+    __slots__ = ("java_class", "member", "args", "calls", "hooks", "java_object")
+
+    def __init__(self, java_class: JavaClass, member: str, args: Optional[tuple] = None) -> None:
+        self.java_class = java_class
+        self.member = member
+        self.args = args
+        self.calls: List[Tuple[str, tuple]] = []
+        self.hooks: List[Callable[[], None]] = []
+        self.java_object = None
+
+    def __call__(self, *args) -> "JavaRecipe":
+        return JavaRecipe(self.java_class, self.member, args)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args) -> "JavaRecipe":
+            self.calls.append((name, args))
+            if self.java_object is not None:
+                self.java_object = _apply(self.java_object, name, args)
+            return self
+
+        return call
+
+    def on_lower(self, hook: Callable[[], None]) -> "JavaRecipe":
+        """registers a function called right before the java object is created, once the JVM is running"""
+        self.hooks.append(hook)
+        return self
+
+    def lower(self, bulk: bool = True):
+        """
+        creates the java object, starts the JVM if needed
+
+        Args:
+
+            bulk (bool): whether the whole recipe tree is built by a single call into the JVM,
+            instead of one pyjnius call per member and per recorded call
+        """
+        if self.java_object is None:
+            if bulk:
+                _lower_in_bulk(self)
+                return self.java_object
+            java_object = getattr(self.java_class.get(), self.member)
+            for hook in self.hooks:
+                hook()
+            if self.args is not None:
+                java_object = java_object(*lower(self.args, bulk=False))
+            for name, args in self.calls:
+                java_object = _apply(java_object, name, args)
+            self.java_object = java_object
+        return self.java_object
+
+    def __repr__(self) -> str:
+        calls = "".join(f".{name}{args}" for name, args in self.calls)
+        return f"{self.java_class.name}.{self.member}{self.args if self.args is not None else ''}{calls}"
+
+
+def _apply(java_object, name: str, args: tuple):
+    result = getattr(java_object, name)(*lower(args, bulk=False))
+    # builder methods return the builder itself
+    return java_object if result is None else result
+
+
+def lower(value, bulk: bool = True):
+    """returns the java objects of recipes, in lists and tuples as well, any other value is returned as is"""
+    if isinstance(value, JavaRecipe):
+        return value.lower(bulk)
+    if isinstance(value, (list, tuple)):
+        return type(value)(lower(item, bulk) for item in value)
+    return value
+
+
+content_type_java_enum = JavaBuilder("org.apache.http.entity.ContentType")
 
 
 class ContentType(Enum):
     """http content types"""
 
-    APPLICATION_JSON = content_type_java_enum.APPLICATION_JSON
-    APPLICATION_ATOM_XML = content_type_java_enum.APPLICATION_ATOM_XML
-    APPLICATION_FORM_URLENCODED = content_type_java_enum.APPLICATION_FORM_URLENCODED
-    APPLICATION_OCTET_STREAM = content_type_java_enum.APPLICATION_OCTET_STREAM
-    APPLICATION_SVG_XML = content_type_java_enum.APPLICATION_SVG_XML
-    APPLICATION_XHTML_XML = content_type_java_enum.APPLICATION_XHTML_XML
-    APPLICATION_XML = content_type_java_enum.APPLICATION_XML
-    MULTIPART_FORM_DATA = content_type_java_enum.MULTIPART_FORM_DATA
-    TEXT_HTML = content_type_java_enum.TEXT_HTML
-    TEXT_PLAIN = content_type_java_enum.TEXT_PLAIN
-    TEXT_XML = content_type_java_enum.TEXT_XML
-    WILDCARD = content_type_java_enum.WILDCARD
+    APPLICATION_JSON = "APPLICATION_JSON"
+    APPLICATION_ATOM_XML = "APPLICATION_ATOM_XML"
+    APPLICATION_FORM_URLENCODED = "APPLICATION_FORM_URLENCODED"
+    APPLICATION_OCTET_STREAM = "APPLICATION_OCTET_STREAM"
+    APPLICATION_SVG_XML = "APPLICATION_SVG_XML"
+    APPLICATION_XHTML_XML = "APPLICATION_XHTML_XML"
+    APPLICATION_XML = "APPLICATION_XML"
+    MULTIPART_FORM_DATA = "MULTIPART_FORM_DATA"
+    TEXT_HTML = "TEXT_HTML"
+    TEXT_PLAIN = "TEXT_PLAIN"
+    TEXT_XML = "TEXT_XML"
+    WILDCARD = "WILDCARD"
+
+    @property
+    def value(self):
+        """the java content type, resolved on first access"""
+        return getattr(content_type_java_enum.get(), self._value_)
+
+    @property
+    def recipe(self) -> JavaRecipe:
+        """the java content type, resolved when the element using it is lowered"""
+        return getattr(content_type_java_enum, self._value_)
 
     def get_mime_type(self) -> str:
-        """this method is for unittests only"""
+        """returns the mime type of the content type, without starting the JVM, as used by the asyncio engine"""
         if self.name == "APPLICATION_FORM_URLENCODED":
             return 'application/x-www-form-urlencoded'
         if self.name == "WILDCARD":
@@ -238,20 +381,203 @@ class ContentType(Enum):
             return f"{arr[0]}/{'+'.join(arr[1:])}"
         return f"{arr[0]}/{'-'.join(arr[1:])}"
 
-class BaseJMeterClass:
+class ElementNode:
+    """
+    recipe of a JMeter element: the class it was built from, its constructor arguments and the methods called on it.
+
+    Nodes are picklable, so they can be sent to other processes and be rebuilt there,
+    child elements in the arguments are recorded as nodes themselves.
+    Nodes are compared and hashed by value, so plans can be cached and diffed without a JVM.
+    """
+
+    __slots__ = ("element_class", "args", "kwargs", "calls")
+
+    def __init__(self, element_class: str, args: tuple, kwargs: dict, calls: list = None) -> None:
+        self.element_class = element_class
+        self.args = args
+        self.kwargs = kwargs
+        self.calls = calls if calls is not None else []
+
+    def element_type(self) -> type:
+        """returns the python class of the element"""
+        module_name, _, qualified_name = self.element_class.partition(":")
+        element_type = importlib.import_module(module_name)
+        for name in qualified_name.split("."):
+            element_type = getattr(element_type, name)
+        return element_type
+
+    def bind(self) -> inspect.BoundArguments:
+        """binds the constructor arguments to the constructor parameters"""
+        return inspect.signature(self.element_type().__init__).bind(
+            None, *self.args, **self.kwargs
+        )
+
+    def replace(self, **arguments) -> "ElementNode":
+        """returns a copy of the node with some of its constructor arguments replaced"""
+        bound = self.bind()
+        bound.arguments.update(arguments)
+        return ElementNode(self.element_class, bound.args[1:], bound.kwargs, list(self.calls))
+
+    def map_nodes(self, function) -> "ElementNode":
+        """returns a copy of the node with `function` applied to all its child nodes"""
+
+        def map_value(value):
+            return function(value) if isinstance(value, ElementNode) else value
+
+        return ElementNode(
+            self.element_class,
+            tuple(map_value(a) for a in self.args),
+            {k: map_value(v) for k, v in self.kwargs.items()},
+            [
+                (name, tuple(map_value(a) for a in args), {k: map_value(v) for k, v in kwargs.items()})
+                for name, args, kwargs in self.calls
+            ],
+        )
+
+    def child_nodes(self) -> list:
+        """returns the nodes of the child elements"""
+        nodes = []
+        self.map_nodes(nodes.append)
+        return nodes
+
+    def shard(self, index: int, count: int, directory: str) -> "ElementNode":
+        """returns the node of the element to be run by worker `index` out of `count` workers"""
+        return self.element_type().shard(self, index, count, directory)
+
+    def build(self) -> "BaseJMeterClass":
+        """builds the element described by the node"""
+
+        def build_value(value):
+            return value.build() if isinstance(value, ElementNode) else value
+
+        element = self.element_type()(
+            *(build_value(a) for a in self.args),
+            **{k: build_value(v) for k, v in self.kwargs.items()},
+        )
+        for name, args, kwargs in self.calls:
+            getattr(element, name)(
+                *(build_value(a) for a in args),
+                **{k: build_value(v) for k, v in kwargs.items()},
+            )
+        return element
+
+    def key(self) -> tuple:
+        """returns a hashable value identifying the recipe, equal for equal recipes"""
+        return (
+            self.element_class,
+            _canonical(self.args),
+            _canonical(self.kwargs),
+            _canonical(self.calls),
+        )
+
+    def diff(self, other: "ElementNode", path: str = "") -> List[str]:
+        """returns the differences with another node, one `path: this != other` line per difference"""
+        differences: List[str] = []
+        _diff(self, other, path or self.element_class.partition(":")[2], differences)
+        return differences
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ElementNode) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.element_class}, {self.args}, {self.kwargs}, {self.calls})"
+
+
+def _canonical(value):
+    if isinstance(value, ElementNode):
+        return value.key()
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted(((key, _canonical(item)) for key, item in value.items()), key=repr))
+    return value
+
+
+def _diff(this, other, path: str, differences: List[str]):
+    if isinstance(this, ElementNode) and isinstance(other, ElementNode):
+        if this.element_class != other.element_class:
+            differences.append(f"{path}: {this.element_class} != {other.element_class}")
+            return
+        _diff(this.args, other.args, f"{path}.args", differences)
+        _diff(this.kwargs, other.kwargs, f"{path}.kwargs", differences)
+        _diff(this.calls, other.calls, f"{path}.calls", differences)
+    elif isinstance(this, (list, tuple)) and isinstance(other, (list, tuple)) and len(this) == len(other):
+        for index, (this_item, other_item) in enumerate(zip(this, other)):
+            _diff(this_item, other_item, f"{path}[{index}]", differences)
+    elif isinstance(this, dict) and isinstance(other, dict):
+        for key in sorted(set(this) | set(other), key=repr):
+            _diff(this.get(key), other.get(key), f"{path}[{key!r}]", differences)
+    elif _canonical(this) != _canonical(other):
+        differences.append(f"{path}: {this!r} != {other!r}")
+
+
+def as_node(value):
+    """records elements as nodes, leaves any other value as is"""
+    return value.node if isinstance(value, BaseJMeterClass) else value
+
+
+class ElementMeta(type):
+    """records the node of each element once it is built"""
+
+    def __call__(cls, *args, **kwargs):
+        element = super().__call__(*args, **kwargs)
+        element.node = ElementNode(
+            f"{cls.__module__}:{cls.__qualname__}",
+            tuple(as_node(a) for a in args),
+            {k: as_node(v) for k, v in kwargs.items()},
+        )
+        return element
+
+
+def recorded(method):
+    """records the calls to a method that modifies an element in the element node"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        node = self.__dict__.get("node")
+        if node is not None:
+            node.calls.append(
+                (
+                    method.__name__,
+                    tuple(as_node(a) for a in args),
+                    {k: as_node(v) for k, v in kwargs.items()},
+                )
+            )
+        return result
+
+    # marks the methods that may be replayed from a node
+    wrapper.records_calls = True
+    return wrapper
+
+
+class BaseJMeterClass(metaclass=ElementMeta):
     """base class for all JMeter elements"""
 
     pattern = re.compile(r"(?<!^)(?=[A-Z])")
-    java_duration = autoclass("java.time.Duration")
-    jmeter_class = autoclass("us.abstracta.jmeter.javadsl.JmeterDsl")
+    java_duration = JavaBuilder("java.time.Duration")
+    jmeter_class = JavaBuilder("us.abstracta.jmeter.javadsl.JmeterDsl")
 
     wrapped_instance_name = None
+    # constructor arguments holding paths to files read by the element
+    file_arguments: tuple = ()
+    # whether a JMX file saved from another element built with the same arguments runs like this element,
+    # false for elements sharing state with python under a key of their own
+    jmx_cacheable = True
+
+    @classmethod
+    def is_jmx_cacheable(cls, node: "ElementNode") -> bool:
+        """returns whether a JMX file saved from the element built from `node` runs like a fresh build of it"""
+        return cls.jmx_cacheable
 
     def get_java_class_name(self):
         """returns the name of the java class"""
 
         return (
-            str(type(self.java_wrapped_element))
+            str(type(self.lower()))
             .split("class ")[1]
             .split("'jnius.reflect.")[1]
             .split("'")[0]
@@ -270,6 +596,39 @@ class BaseJMeterClass:
             self, f"_{self.__class__.wrapped_instance_name}_instance"
         )
 
+    @property
+    def java_wrapped_elements(self) -> tuple:
+        """java elements added to the parent element, when this element is added as a child"""
+        return (self.java_wrapped_element,)
+
+    def lower(self, bulk: bool = True):
+        """
+        returns the java element wrapped in the python object, creating it and starting the JVM if needed
+
+        Args:
+
+            bulk (bool): whether the element and its children are built by a single call into the JVM
+        """
+        return lower(self.java_wrapped_element, bulk)
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        """
+        returns the node of the element to be run by worker `index` out of `count` workers
+
+        Args:
+
+            node (ElementNode): node of an element of this class
+
+            index (int): index of the worker
+
+            count (int): number of workers
+
+            directory (str): directory for files created for the worker
+        """
+        return node.map_nodes(lambda child: child.shard(index, count, directory))
+
+    @recorded
     def children(self, *children):
         """
           adds children to element
@@ -302,17 +661,242 @@ class BaseJMeterClass:
         """
         if children:
             self.java_wrapped_element.children(
-                *[c.java_wrapped_element for c in children]
+                *[element for c in children for element in c.java_wrapped_elements]
             )
 
 
+class GroovyScript:
+    """
+    groovy script evaluated inside the JVM.
+
+    Used to move bulk data between python and the JVM with a single call instead of walking java objects through reflection.
+    """
+
+    script_engine_manager = JavaClass("javax.script.ScriptEngineManager")
+    script_engine = None
+    lock = threading.Lock()
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+
+    def __call__(self, **bindings):
+        with GroovyScript.lock:
+            if GroovyScript.script_engine is None:
+                GroovyScript.script_engine = (
+                    GroovyScript.script_engine_manager().getEngineByName("groovy")
+                )
+            for name, value in bindings.items():
+                GroovyScript.script_engine.put(name, value)
+            return GroovyScript.script_engine.eval(self.source)
+
+
+class AfterAssertions:
+    """
+    groovy post-processor script handling each sample result once the assertions of the sample have run.
+
+    JMeter runs the post-processors of a sample before its assertions, `prev.isSuccessful()` doesn't account
+    for failed assertions yet. Assertions flag failures on the sample result itself, so the script keeps the result
+    of each thread pending, and handles it when the next sample of the same thread ends.
+    Results still pending when the test ends are handled by `test_ended()`.
+    """
+
+    java_system = JavaClass("java.lang.System")
+    java_concurrent_hash_map = JavaClass("java.util.concurrent.ConcurrentHashMap")
+
+    template = """
+{setup_script}
+def pending = System.getProperties().get("{pending_key}")
+if (pending == null) return
+def handle = { key, r ->
+{handle_script}
+}
+"""
+
+    def __init__(self, key: str, setup_script: str, capture_script: str, handle_script: str) -> None:
+        """
+
+        Args:
+
+            key (str): unique name of the element, the pending results are held by the system property `<key>.pending`
+
+            setup_script (str): groovy code defining the state the results are handled with, may `return` to skip them
+
+            capture_script (str): groovy code run when the sample ends, assigning `key` from the sample result `r`
+            and from the context of the sampling thread
+
+            handle_script (str): groovy code handling the sample result `r` with the `key` captured when it ended,
+            it doesn't run in the sampling thread
+        """
+        self.pending_key = f"{key}.pending"
+        common = (
+            AfterAssertions.template.replace("{pending_key}", self.pending_key)
+            .replace("{setup_script}", setup_script.strip())
+            .replace("{handle_script}", handle_script.strip())
+        )
+        self.script = (
+            common
+            + "def capture = { r ->\ndef key = null\n"
+            + capture_script.strip()
+            + "\nreturn key\n}\n"
+            + "def previous = pending.put(Thread.currentThread(), [capture(prev), prev] as Object[])\n"
+            + "if (previous != null) handle(previous[0], previous[1])\n"
+        )
+        self._flush_script = GroovyScript(
+            common
+            + "for (thread in new ArrayList(pending.keySet())) {\n"
+            + "    def previous = pending.remove(thread)\n"
+            + "    if (previous != null) handle(previous[0], previous[1])\n"
+            + "}\n"
+        )
+
+    def test_started(self):
+        """registers the map of pending results of a new test"""
+        AfterAssertions.java_system.getProperties().put(
+            self.pending_key, AfterAssertions.java_concurrent_hash_map()
+        )
+
+    def test_ended(self):
+        """handles the results still pending, then unregisters the map, the state of the setup script must still be registered"""
+        self._flush_script()
+        AfterAssertions.java_system.getProperties().remove(self.pending_key)
+
+
+# builds the recipes of `plan`, a json list ordered so that recipes come after the recipes they use.
+# A recipe is `{"c": class, "m": member, "a": arguments or null for a field, "k": [[method, arguments], ...]}`,
+# arguments are json values or `{"r": index}` for a recipe, `{"o": index}` for an element of `objects`,
+# `{"d": value}` for a double and `{"l": [...]}` for a list
+bulk_build_script = GroovyScript(
+    """
+def recipes = new groovy.json.JsonSlurper().parseText(plan)
+def built = new Object[recipes.size()]
+def value
+value = { v ->
+    if (!(v instanceof Map)) return v
+    if (v.containsKey("r")) return built[v.r]
+    if (v.containsKey("o")) return objects.get(v.o)
+    if (v.containsKey("d")) return v.d as double
+    return v.l.collect { value(it) }
+}
+def classes = [:]
+for (int i = 0; i < recipes.size(); i++) {
+    def r = recipes[i]
+    def target = classes.computeIfAbsent(r.c, { Class.forName(it) } as java.util.function.Function)
+    def o = r.a == null ? target."${r.m}" : target."${r.m}"(*r.a.collect { value(it) })
+    for (call in r.k) {
+        def result = o."${call[0]}"(*call[1].collect { value(it) })
+        if (result != null) o = result
+    }
+    built[i] = o
+}
+java.util.Arrays.asList(built)
+"""
+)
+java_array_list = JavaClass("java.util.ArrayList")
+
+
+def _lower_in_bulk(root: JavaRecipe) -> None:
+    """lowers the recipe tree of `root` with a single call into the JVM"""
+    recipes: List[JavaRecipe] = []
+    entries: List[dict] = []
+    indexes = {}
+    objects = []
+
+    def encode(value):
+        if isinstance(value, JavaRecipe):
+            if value.java_object is not None:
+                objects.append(value.java_object)
+                return {"o": len(objects) - 1}
+            if id(value) not in indexes:
+                visit(value)
+            return {"r": indexes[id(value)]}
+        if value is None or isinstance(value, (bool, int, str)):
+            return value
+        if isinstance(value, float) and math.isfinite(value):
+            return {"d": value}
+        if isinstance(value, (list, tuple)):
+            return {"l": [encode(item) for item in value]}
+        # java objects and values json can't hold are passed as they are
+        objects.append(value)
+        return {"o": len(objects) - 1}
+
+    def visit(recipe: JavaRecipe) -> None:
+        entry = {
+            "c": recipe.java_class.name,
+            "m": recipe.member,
+            "a": None if recipe.args is None else [encode(arg) for arg in recipe.args],
+            "k": [[name, [encode(arg) for arg in args]] for name, args in recipe.calls],
+        }
+        indexes[id(recipe)] = len(entries)
+        entries.append(entry)
+        recipes.append(recipe)
+
+    visit(root)
+    # hooks may need the JVM, but have to run before the java objects are created
+    root.java_class.get()
+    for recipe in recipes:
+        for hook in recipe.hooks:
+            hook()
+    java_objects = java_array_list.get()()
+    for java_object in objects:
+        java_objects.add(java_object)
+    built = bulk_build_script(plan=json.dumps(entries, separators=(",", ":")), objects=java_objects).toArray()
+    for recipe, java_object in zip(recipes, built):
+        recipe.java_object = java_object
+
+
+def start_test_elements(elements: Iterable) -> None:
+    """
+    calls `test_started()` on the elements, when one of them fails to start the elements started before it are ended
+    """
+    started = []
+    try:
+        for element in elements:
+            element.test_started()
+            started.append(element)
+    except BaseException:
+        end_test_elements(started)
+        raise
+
+
+def end_test_elements(elements: Iterable) -> None:
+    """calls `test_ended()` on the elements, all of them are ended even when one fails, the first error is raised"""
+    error = None
+    for element in elements:
+        try:
+            element.test_ended()
+        except BaseException as exception:  # pylint: disable=broad-except
+            error = error or exception
+    if error is not None:
+        raise error
+
+
 class TestPlanChildElement(BaseJMeterClass):
     """class to be included in test plan objects"""
 
+    def test_scheduled(self, future) -> None:
+        """called by `TestPlan.start()` with the future of the test run, before the test is executed"""
+
+    def test_started(self):
+        """called by the test plan right before the test is executed"""
+
+    def test_ended(self):
+        """called by the test plan once the test is over"""
+
 
 class ThreadGroupChildElement(BaseJMeterClass):
     """class to be included in thread group objects"""
 
+    # whether the element reads response bodies, which turns off response body limits in its scope
+    needs_response_body = False
+
+    def test_started(self):
+        """called by the thread group right before the test is executed, and forwarded to the children"""
+        start_test_elements(self.__dict__.get("_children", ()))
+
+    def test_ended(self):
+        """called by the thread group once the test is over, and forwarded to the children"""
+        end_test_elements(self.__dict__.get("_children", ()))
+
 
 class ChildrenAreNotAllowed(Exception):
     """exception for not allowed children method"""
@@ -32,7 +32,7 @@ In this example we assert that the response contains the text "var"
 """
 
 
-from pymeter.api import ChildrenAreNotAllowed, ThreadGroupChildElement
+from pymeter.api import ChildrenAreNotAllowed, ThreadGroupChildElement, recorded
 
 
 class BaseAssertion(ThreadGroupChildElement):
@@ -44,6 +44,8 @@ class BaseAssertion(ThreadGroupChildElement):
 
 class ResponseAssertion(BaseAssertion):
     """Assertion of the response element"""
+
+    needs_response_body = True
     def __init__(self) -> None:
         self._response_assertion_instance = (
             ResponseAssertion.jmeter_class.responseAssertion()
@@ -51,6 +53,7 @@ class ResponseAssertion(BaseAssertion):
 
         super().__init__()
 
+    @recorded
     def contains_substrings(self, *strings_to_look):
         """assert that the response contains string the given strings"""
         self._response_assertion_instance = (
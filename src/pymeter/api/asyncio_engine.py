@@ -0,0 +1,524 @@
+"""
+The asyncio engine runs test plans on a python event loop instead of JMeter, no JVM is involved while the test runs.
+
+It is meant for light smoke-load tests, e.g on CI runners, where the startup of the JVM dominates the test.
+It is selected with `TestPlan.run(engine="asyncio")` and returns the same `TestPlanStats` as JMeter does,
+computed from the same per label aggregates.
+
+Only a subset of the elements is supported, any other element raises `UnsupportedElement`:
+
+* `TestPlan` and `Vars`
+* `ThreadGroupSimple`, all the threads start at once, like they do in JMeter
+* `HttpSampler`, with `header`, `post`, `connection_settings` (keep alive and timeouts) and `store_response_body`
+* `DummySampler`
+* `ConstantTimer` and `UniformRandomTimer`
+* `ResponseAssertion` and `JsonExtractor`, json paths are dotted field names and list indexes (e.g - `args.items[0]`)
+
+Each virtual thread keeps its own pool of keep-alive connections, the same way each JMeter thread does,
+so connection counts are comparable between the engines. `${name}` variables are substituted in labels, urls,
+headers and bodies. Redirects are not followed.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.assertions import ResponseAssertion
+            from pymeter.api.config import TestPlan, ThreadGroupSimple
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("health", "http://localhost:8080/health", ResponseAssertion().contains_substrings("up"))
+            stats = TestPlan(ThreadGroupSimple(10, 20, http_sampler)).run(engine="asyncio")
+            print(stats.sample_time_99_percentile_milliseconds)
+
+example - 2:
+--------------
+Inside an event loop, the engine is awaited directly
+
+
+      .. code-block:: python
+
+            from pymeter.api.asyncio_engine import AsyncioEngine
+
+            duration_milliseconds, collected = await AsyncioEngine(test_plan.node).execute()
+"""
+import asyncio
+import inspect
+import json
+import random
+import re
+import ssl
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pymeter.api import ElementNode
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.config import TestPlan, ThreadGroupSimple, Vars
+from pymeter.api.postprocessors import JsonExtractor
+from pymeter.api.samplers import DummySampler, HttpSampler
+from pymeter.api.stats import MAIN, SampleStats
+from pymeter.api.timers import ConstantTimer, UniformRandomTimer
+
+VARIABLE_PATTERN = re.compile(r"\$\{([^${}]+)\}")
+JSON_PATH_PATTERN = re.compile(r"^(?:[A-Za-z_]\w*|\[-?\d+\])(?:\.[A-Za-z_]\w*|\[-?\d+\])*$")
+JSON_PATH_PART_PATTERN = re.compile(r"([A-Za-z_]\w*)|\[(-?\d+)\]")
+
+
+class UnsupportedElement(Exception):
+    """exception raised when a test plan holds an element the asyncio engine can't run"""
+
+
+class SampleResult(NamedTuple):
+    """outcome of a single sample"""
+
+    label: str
+    start_milliseconds: int
+    elapsed_milliseconds: int
+    successful: bool
+    response_code: str
+    response_body: bytes = b""
+    received_bytes: int = 0
+    sent_bytes: int = 0
+    latency_milliseconds: int = 0
+    connect_time_milliseconds: int = 0
+
+
+class HttpRequest(NamedTuple):
+    """http request of an `HttpSampler` node, variables are substituted when it is sent"""
+
+    label: str
+    url: str
+    method: str = "GET"
+    headers: Tuple[Tuple[str, str], ...] = ()
+    body: Optional[str] = None
+    keep_alive: bool = True
+    connect_timeout_seconds: Optional[float] = None
+    response_timeout_seconds: Optional[float] = None
+
+
+class Sampler(NamedTuple):
+    """sampler of a thread group, with the timers, extractors and assertions in its scope"""
+
+    request: object
+    timers: Tuple[Tuple[float, float], ...]
+    extractors: Tuple[Tuple[str, str], ...]
+    assertions: Tuple[Tuple[str, ...], ...]
+
+
+class ThreadGroup(NamedTuple):
+    """thread group of the plan"""
+
+    name: str
+    threads: int
+    iterations: int
+    samplers: Tuple[Sampler, ...]
+
+
+def substitute(text: str, variables: Dict[str, str]) -> str:
+    """replaces `${name}` with the value of variable `name`, unknown variables and functions are left as is"""
+    if "${" not in text:
+        return text
+    return VARIABLE_PATTERN.sub(lambda match: variables.get(match[1], match[0]), text)
+
+
+def json_path(document, path: str):
+    """returns the value at a path of dotted field names and list indexes, None when there is no such value"""
+    value = document
+    for field, index in JSON_PATH_PART_PATTERN.findall(path):
+        if field:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(field)
+        else:
+            if not isinstance(value, list) or not -len(value) <= int(index) < len(value):
+                return None
+            value = value[int(index)]
+    return value
+
+
+def extract(body: bytes, path: str) -> str:
+    """returns the value of a json extractor, strings as is and any other value as json"""
+    try:
+        value = json_path(json.loads(body), path)
+    except ValueError:
+        return ""
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _child_nodes(node: ElementNode) -> List[ElementNode]:
+    children = list(node.bind().arguments.get("children", ()))
+    for name, args, _ in node.calls:
+        if name == "children":
+            children.extend(args)
+    return children
+
+
+def _unsupported(node: ElementNode) -> UnsupportedElement:
+    return UnsupportedElement(f"The asyncio engine doesn't support `{node.element_class}`")
+
+
+class Scope:
+    """timers, extractors and assertions applying to the samplers of a thread group or to a single sampler"""
+
+    __slots__ = ("timers", "extractors", "assertions")
+
+    def __init__(self) -> None:
+        self.timers: List[Tuple[float, float]] = []
+        self.extractors: List[Tuple[str, str]] = []
+        self.assertions: List[Tuple[str, ...]] = []
+
+    def add(self, node: ElementNode) -> bool:
+        """adds the element of the node to the scope, returns False when it isn't a scoped element"""
+        element_type = node.element_type()
+        arguments = node.bind().arguments
+        if element_type is ConstantTimer:
+            self.timers.append((arguments["time_milliseconds"], arguments["time_milliseconds"]))
+        elif element_type is UniformRandomTimer:
+            self.timers.append((arguments["bottom_milliseconds"], arguments["top_milliseconds"]))
+        elif element_type is JsonExtractor:
+            if not JSON_PATH_PATTERN.match(arguments["jmes_path"]):
+                raise UnsupportedElement(f"The asyncio engine doesn't support the json path `{arguments['jmes_path']}`")
+            self.extractors.append((arguments["variable_name"], arguments["jmes_path"]))
+        elif element_type is ResponseAssertion:
+            substrings: List[str] = []
+            for name, args, _ in node.calls:
+                if name != "contains_substrings":
+                    raise _unsupported(node)
+                substrings.extend(args)
+            self.assertions.append(tuple(substrings))
+        else:
+            return False
+        return True
+
+
+def _check_no_warmup(node: ElementNode):
+    arguments = node.bind().arguments
+    if arguments.get("warmup_seconds") or arguments.get("warmup_iterations"):
+        raise UnsupportedElement("The asyncio engine doesn't support warmup")
+
+
+class PlanCompiler:
+    """translates the node of a test plan into the thread groups run by the engine"""
+
+    def __init__(self, test_plan_node: ElementNode) -> None:
+        self.variables: Dict[str, str] = {}
+        self.thread_groups: List[ThreadGroup] = []
+        _check_no_warmup(test_plan_node)
+        for child in _child_nodes(test_plan_node):
+            element_type = child.element_type()
+            if element_type is Vars:
+                self._vars(child)
+            elif element_type is ThreadGroupSimple:
+                self.thread_groups.append(self._thread_group(child))
+            else:
+                raise _unsupported(child)
+
+    def _vars(self, node: ElementNode):
+        for key, value in node.kwargs.items():
+            self.variables[key] = str(value)
+        for name, args, _ in node.calls:
+            if name != "set":
+                raise _unsupported(node)
+            self.variables[args[0]] = str(args[1])
+
+    def _thread_group(self, node: ElementNode) -> ThreadGroup:
+        _check_no_warmup(node)
+        arguments = node.bind().arguments
+        scope, samplers = Scope(), []
+        for child in _child_nodes(node):
+            if child.element_type() in (HttpSampler, DummySampler):
+                samplers.append(child)
+            elif not scope.add(child):
+                raise _unsupported(child)
+        return ThreadGroup(
+            arguments.get("name", "Thread Group"),
+            arguments["number_of_threads"],
+            arguments["iterations"],
+            tuple(self._sampler(sampler, scope) for sampler in samplers),
+        )
+
+    def _sampler(self, node: ElementNode, thread_group_scope: Scope) -> Sampler:
+        scope = Scope()
+        for child in _child_nodes(node):
+            if not scope.add(child):
+                raise _unsupported(child)
+        arguments = node.bind().arguments
+        if node.element_type() is DummySampler:
+            if node.calls:
+                raise _unsupported(node)
+            request = (arguments["name"], arguments["response_body"])
+        else:
+            request = self._http_request(node, arguments)
+        # post-processors and assertions of the sampler run before the ones of the thread group, timers all add up
+        return Sampler(
+            request,
+            tuple(thread_group_scope.timers + scope.timers),
+            tuple(scope.extractors + thread_group_scope.extractors),
+            tuple(scope.assertions + thread_group_scope.assertions),
+        )
+
+    @staticmethod
+    def _http_request(node: ElementNode, arguments: dict) -> HttpRequest:
+        request = HttpRequest(arguments["name"], arguments["url"])
+        for name, args, kwargs in node.calls:
+            if name == "header":
+                request = request._replace(headers=request.headers + ((args[0], args[1]),))
+            elif name == "post":
+                body, content_type = args
+                request = request._replace(
+                    method="POST",
+                    body=body if isinstance(body, str) else json.dumps(body),
+                    headers=request.headers + (("Content-Type", content_type.get_mime_type()),),
+                )
+            elif name == "connection_settings":
+                settings = inspect.signature(HttpSampler.connection_settings).bind(None, *args, **kwargs).arguments
+                if settings.get("client") is not None or settings.get("max_connections_per_host") is not None:
+                    raise UnsupportedElement("The asyncio engine only supports keep alive and timeout connection settings")
+                if settings.get("keep_alive") is not None:
+                    request = request._replace(keep_alive=settings["keep_alive"])
+                if settings.get("connect_timeout_milliseconds") is not None:
+                    request = request._replace(connect_timeout_seconds=settings["connect_timeout_milliseconds"] / 1000)
+                if settings.get("response_timeout_milliseconds") is not None:
+                    request = request._replace(response_timeout_seconds=settings["response_timeout_milliseconds"] / 1000)
+            elif name not in ("store_response_body", "children"):
+                raise UnsupportedElement(f"The asyncio engine doesn't support `HttpSampler.{name}`")
+        return request
+
+
+class HttpClient:
+    """
+    http/1.1 client of a single virtual thread, connections are kept alive and reused by scheme, host and port
+    """
+
+    def __init__(self) -> None:
+        self._idle: Dict[Tuple[str, str, int], Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+
+    async def send(self, request: HttpRequest, variables: Dict[str, str]) -> SampleResult:
+        """sends the request and reads the whole response"""
+        label = substitute(request.label, variables)
+        start_milliseconds = int(time.time() * 1000)
+        started = time.perf_counter()
+        try:
+            url = urlsplit(substitute(request.url, variables))
+            key = (url.scheme, url.hostname, url.port or (443 if url.scheme == "https" else 80))
+            payload = self._payload(request, url, variables)
+            connection = self._idle.pop(key, None)
+            if connection is not None:
+                try:
+                    return await self._exchange(
+                        request, key, connection, payload, label, start_milliseconds, started, 0
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # the server closed the idle connection, retry once on a new one
+                    start_milliseconds = int(time.time() * 1000)
+                    started = time.perf_counter()
+            connection = await asyncio.wait_for(
+                asyncio.open_connection(
+                    key[1],
+                    key[2],
+                    ssl=ssl.create_default_context() if url.scheme == "https" else None,
+                ),
+                request.connect_timeout_seconds,
+            )
+            connect_milliseconds = max(1, round((time.perf_counter() - started) * 1000))
+            return await self._exchange(
+                request, key, connection, payload, label, start_milliseconds, started, connect_milliseconds
+            )
+        except Exception as exception:  # pylint: disable=broad-except
+            return SampleResult(
+                label,
+                start_milliseconds,
+                round((time.perf_counter() - started) * 1000),
+                False,
+                f"Non HTTP response code: {type(exception).__name__}",
+            )
+
+    @staticmethod
+    def _payload(request: HttpRequest, url, variables: Dict[str, str]) -> bytes:
+        target = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        host = url.hostname if url.port is None else f"{url.hostname}:{url.port}"
+        lines = [f"{request.method} {target} HTTP/1.1", f"Host: {host}"]
+        lines.append("Connection: keep-alive" if request.keep_alive else "Connection: close")
+        lines.extend(f"{name}: {substitute(value, variables)}" for name, value in request.headers)
+        body = substitute(request.body, variables).encode("utf-8") if request.body is not None else b""
+        if request.body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _exchange(
+        self, request, key, connection, payload, label, start_milliseconds, started, connect_milliseconds
+    ) -> SampleResult:
+        reader, writer = connection
+        try:
+            writer.write(payload)
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), request.response_timeout_seconds)
+            if not status_line:
+                raise ConnectionResetError("The connection was closed before the response")
+            latency_milliseconds = round((time.perf_counter() - started) * 1000)
+            headers, header_bytes = await asyncio.wait_for(self._headers(reader), request.response_timeout_seconds)
+            body, reusable = await asyncio.wait_for(
+                self._body(reader, request.method, int(status_line.split()[1]), headers),
+                request.response_timeout_seconds,
+            )
+        except BaseException:
+            writer.close()
+            raise
+        elapsed_milliseconds = round((time.perf_counter() - started) * 1000)
+        version, code = status_line.decode("latin-1").split()[:2]
+        keep = (
+            request.keep_alive
+            and reusable
+            and headers.get("connection", "").lower() != "close"
+            and (version != "HTTP/1.0" or headers.get("connection", "").lower() == "keep-alive")
+        )
+        if keep:
+            self._idle[key] = connection
+        else:
+            writer.close()
+        return SampleResult(
+            label,
+            start_milliseconds,
+            elapsed_milliseconds,
+            code[:1] in ("1", "2", "3"),
+            code,
+            body,
+            len(status_line) + header_bytes + len(body),
+            len(payload),
+            latency_milliseconds,
+            connect_milliseconds,
+        )
+
+    @staticmethod
+    async def _headers(reader: asyncio.StreamReader) -> Tuple[Dict[str, str], int]:
+        headers, size = {}, 0
+        while True:
+            line = await reader.readline()
+            size += len(line)
+            if line in (b"\r\n", b"\n", b""):
+                return headers, size
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _body(reader: asyncio.StreamReader, method: str, code: int, headers: Dict[str, str]) -> Tuple[bytes, bool]:
+        if method == "HEAD" or 100 <= code < 200 or code in (204, 304):
+            return b"", True
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks), True
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"])), True
+        return await reader.read(), False
+
+    def close(self):
+        """closes the idle connections"""
+        for _, writer in self._idle.values():
+            writer.close()
+        self._idle.clear()
+
+
+class AsyncioEngine:
+    """
+    runs the thread groups of a test plan node on the running event loop, each thread is a task
+    """
+
+    def __init__(self, test_plan_node: ElementNode) -> None:
+        compiler = PlanCompiler(test_plan_node)
+        self.variables = compiler.variables
+        self.thread_groups = compiler.thread_groups
+        self.collected: Dict[Tuple[str, str, str], SampleStats] = {}
+
+    async def execute(self) -> Tuple[float, Dict[Tuple[str, str, str], SampleStats]]:
+        """
+        runs the test
+
+        Returns:
+
+            Tuple[float, Dict[Tuple[str, str, str], SampleStats]]: the test duration in milliseconds,
+            and stats keyed by thread group kind, thread group name and label
+        """
+        self.collected = {}
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                self._thread(thread_group)
+                for thread_group in self.thread_groups
+                for _ in range(thread_group.threads)
+            )
+        )
+        return (time.perf_counter() - started) * 1000, self.collected
+
+    async def _thread(self, thread_group: ThreadGroup):
+        variables = dict(self.variables)
+        client = HttpClient()
+        try:
+            for _ in range(thread_group.iterations):
+                for sampler in thread_group.samplers:
+                    await self._sample(thread_group, sampler, client, variables)
+        finally:
+            client.close()
+
+    async def _sample(self, thread_group: ThreadGroup, sampler: Sampler, client: HttpClient, variables: Dict[str, str]):
+        delay_milliseconds = sum(random.uniform(bottom, top) for bottom, top in sampler.timers)
+        if delay_milliseconds:
+            await asyncio.sleep(delay_milliseconds / 1000)
+        if isinstance(sampler.request, HttpRequest):
+            result = await client.send(sampler.request, variables)
+        else:
+            label, response_body = sampler.request
+            body = substitute(response_body, variables).encode("utf-8")
+            result = SampleResult(
+                substitute(label, variables), int(time.time() * 1000), 0, True, "200", body, len(body)
+            )
+        for variable_name, path in sampler.extractors:
+            variables[variable_name] = extract(result.response_body, path)
+        if result.successful and sampler.assertions:
+            text = result.response_body.decode("utf-8", errors="replace")
+            if not all(substring in text for substrings in sampler.assertions for substring in substrings):
+                result = result._replace(successful=False)
+        self._record((MAIN, thread_group.name, result.label), result)
+
+    def _record(self, key: Tuple[str, str, str], result: SampleResult):
+        stats = self.collected.get(key)
+        if stats is None:
+            stats = self.collected[key] = SampleStats()
+        stats.count += 1
+        stats.errors += 0 if result.successful else 1
+        stats.received_bytes += result.received_bytes
+        stats.sent_bytes += result.sent_bytes
+        stats.sample_time_sum_milliseconds += result.elapsed_milliseconds
+        stats.latency_sum_milliseconds += result.latency_milliseconds
+        stats.connect_time_sum_milliseconds += result.connect_time_milliseconds
+        stats.connections += 1 if result.connect_time_milliseconds else 0
+        end_milliseconds = result.start_milliseconds + result.elapsed_milliseconds
+        if stats.first_timestamp_milliseconds is None or result.start_milliseconds < stats.first_timestamp_milliseconds:
+            stats.first_timestamp_milliseconds = result.start_milliseconds
+        stats.last_timestamp_milliseconds = max(stats.last_timestamp_milliseconds or 0, end_milliseconds)
+        stats.histogram[result.elapsed_milliseconds] = stats.histogram.get(result.elapsed_milliseconds, 0) + 1
+
+
+def run_test_plan(test_plan):
+    """
+    runs a test plan on a new event loop
+
+    Args:
+
+        test_plan (TestPlan): the test plan to run
+
+    Returns:
+
+        TestPlan.TestPlanStats: the stats of the test, without a java instance
+    """
+    duration_milliseconds, collected = asyncio.run(AsyncioEngine(test_plan.node).execute())
+    return TestPlan.TestPlanStats(None, collected, duration_milliseconds)
@@ -0,0 +1,208 @@
+"""
+The autostop module stops a test as soon as it is clear that it fails, instead of running it to its end.
+
+`AutoStop` is appended to a test plan, it watches the samples of all the thread groups over a rolling window
+of the last seconds, and stops the test once one of its conditions is met:
+
+* a limit of the SLO is exceeded, with the same keys as `find_capacity() <capacity.html>`_:
+  `error_rate`, `mean_ms` and `p<N>_ms`
+* the throughput falls under `min_throughput_per_second`
+
+Samples are counted in per second buckets inside the JVM once their assertions have run, the conditions are evaluated
+once per second, by the first sample counted in a new second. Why the test was stopped is returned by `TestPlanStats.stop_reason`.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.autostop import AutoStop
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            thread_group = ThreadGroupWithRampUpAndHold(50, 30, 3600, http_sampler)
+            auto_stop = AutoStop(
+                slo=dict(error_rate=0.4, p99_ms=3000),
+                min_throughput_per_second=10,
+                window_seconds=30,
+                delay_seconds=30,
+            )
+            stats = TestPlan(thread_group, auto_stop).run()
+            if stats.stop_reason:
+                print(stats.stop_reason)
+
+.. note::
+    As conditions are evaluated when samples end, a test whose samples stop ending altogether is not stopped.
+    With workers, each worker stops on its own.
+"""
+import uuid
+from typing import Dict, Optional
+
+from pymeter.api import AfterAssertions, ChildrenAreNotAllowed, JavaClass, TestPlanChildElement
+from pymeter.api.capacity import PERCENTILE_KEY
+
+
+class AutoStop(TestPlanChildElement):
+    """
+    Stops the test once the samples of the last seconds break an SLO, or their throughput is too low.
+    """
+
+    jmx_cacheable = False
+
+    java_system = JavaClass("java.lang.System")
+
+    # per second buckets: second, count, errors, sum of sample times and histogram of sample times,
+    # then the last second the conditions were evaluated at
+    setup_script = """
+def s = System.getProperties().computeIfAbsent("{key}", {
+    int n = {slots}
+    def histograms = new HashMap[n]
+    for (int i = 0; i < n; i++) histograms[i] = new HashMap<Long, Long>()
+    [new long[n], new long[n], new long[n], new long[n], histograms, new long[1]] as Object[]
+} as java.util.function.Function)
+long[] seconds = s[0]
+long[] counts = s[1]
+long[] errors = s[2]
+long[] sums = s[3]
+HashMap[] histograms = s[4]
+long[] evaluated = s[5]
+"""
+
+    # counts the sample result `r` once its assertions have run, then evaluates the conditions
+    handle_script = """
+long elapsed = r.getTime()
+long second = r.getEndTime().intdiv(1000)
+int slot = (int) (second % {slots})
+synchronized (s) {
+    if (seconds[slot] > second) return
+    if (seconds[slot] < second) {
+        seconds[slot] = second
+        counts[slot] = 0
+        errors[slot] = 0
+        sums[slot] = 0
+        histograms[slot].clear()
+    }
+    counts[slot]++
+    if (!r.isSuccessful()) errors[slot]++
+    sums[slot] += elapsed
+    Long seen = histograms[slot].get(elapsed)
+    histograms[slot].put(elapsed, seen == null ? 1L : seen + 1L)
+    if (evaluated[0] >= second) return
+    evaluated[0] = second
+}
+long testStart = org.apache.jmeter.threads.JMeterContextService.getTestStartTime()
+if (second - {window} < (testStart + {delay}).intdiv(1000) + 1) return
+long count = 0
+long errorCount = 0
+long sum = 0
+def histogram = new TreeMap<Long, Long>()
+synchronized (s) {
+    for (long w = second - {window}; w < second; w++) {
+        int i = (int) (w % {slots})
+        if (seconds[i] != w) continue
+        count += counts[i]
+        errorCount += errors[i]
+        sum += sums[i]
+        histograms[i].each { value, n -> histogram.merge(value, n, { a, b -> a + b } as java.util.function.BiFunction) }
+    }
+}
+def percentile = { double p ->
+    long rank = Math.max(1L, (long) Math.ceil(p / 100 * count))
+    long cumulated = 0
+    for (e in histogram) {
+        cumulated += e.value
+        if (cumulated >= rank) return e.key
+    }
+    return 0L
+}
+String reason = null
+{conditions}
+if (reason != null && System.getProperties().putIfAbsent("{key}.reason", reason + " over the last {window} seconds") == null) {
+    org.apache.jmeter.engine.StandardJMeterEngine.stopEngine()
+}
+"""
+
+    def __init__(
+        self,
+        slo: Optional[Dict[str, float]] = None,
+        min_throughput_per_second: Optional[float] = None,
+        window_seconds: int = 10,
+        min_samples: int = 100,
+        delay_seconds: float = 0,
+    ) -> None:
+        """
+
+        Args:
+
+            slo (Optional[Dict[str, float]]): maximal values by SLO key, e.g `dict(error_rate=0.4, p99_ms=3000)`
+
+            min_throughput_per_second (Optional[float]): the test is stopped when fewer samples per second end
+
+            window_seconds (int): length of the rolling window the conditions are evaluated on
+
+            min_samples (int): number of samples the window needs before the SLO is evaluated
+
+            delay_seconds (float): time from the start of the test before the conditions are evaluated,
+            to let the load ramp up
+        """
+        slo = dict(slo or {})
+        if not slo and min_throughput_per_second is None:
+            raise ValueError("At least one condition is required")
+        if window_seconds < 1 or min_samples < 1 or delay_seconds < 0:
+            raise ValueError("window_seconds and min_samples must be positive, delay_seconds can't be negative")
+        conditions = []
+        for key, limit in slo.items():
+            conditions.append(
+                f'if (reason == null && count >= {min_samples} && {AutoStop._measure(key)} > {float(limit)!r}) '
+                f'reason = "{key} " + {AutoStop._measure(key)} + " > {limit}"'
+            )
+        if min_throughput_per_second is not None:
+            conditions.append(
+                f"if (reason == null && count / {float(window_seconds)!r} < {float(min_throughput_per_second)!r}) "
+                f'reason = "throughput " + count / {float(window_seconds)!r} + "/s < {min_throughput_per_second}/s"'
+            )
+        self.stop_reason: Optional[str] = None
+        self._key = f"pymeter.autostop.{uuid.uuid4().hex}"
+        self._after_assertions = AfterAssertions(
+            self._key,
+            AutoStop.setup_script.replace("{key}", self._key).replace("{slots}", str(int(window_seconds) + 2)),
+            "",
+            AutoStop.handle_script.replace("{key}", self._key)
+            .replace("{slots}", str(int(window_seconds) + 2))
+            .replace("{window}", str(int(window_seconds)))
+            .replace("{delay}", str(int(delay_seconds * 1000)))
+            .replace("{conditions}", "\n".join(conditions)),
+        )
+        self._auto_stop_instance = AutoStop.jmeter_class.jsr223PostProcessor(self._after_assertions.script)
+        super().__init__()
+
+    @staticmethod
+    def _measure(key: str) -> str:
+        """returns the groovy expression measuring the value limited by an SLO key"""
+        if key == "error_rate":
+            return "(errorCount / (double) count)"
+        if key == "mean_ms":
+            return "(sum / (double) count)"
+        match = PERCENTILE_KEY.match(key)
+        if match:
+            return f"percentile({float(match[1])!r})"
+        raise ValueError(f"Unknown SLO `{key}`, expected `error_rate`, `mean_ms` or `p<N>_ms`")
+
+    def children(self, *children):
+        raise ChildrenAreNotAllowed("Cant append children to an auto stop")
+
+    def test_started(self):
+        self.stop_reason = None
+        properties = AutoStop.java_system.getProperties()
+        properties.remove(self._key)
+        properties.remove(f"{self._key}.reason")
+        self._after_assertions.test_started()
+
+    def test_ended(self):
+        properties = AutoStop.java_system.getProperties()
+        # read before counting the pending samples, the test is already over when they break a condition
+        self.stop_reason = properties.get(f"{self._key}.reason")
+        self._after_assertions.test_ended()
+        properties.remove(self._key)
+        properties.remove(f"{self._key}.reason")
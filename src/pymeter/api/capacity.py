@@ -0,0 +1,324 @@
+"""
+The capacity module searches the highest load a system under test sustains while meeting a service level objective (SLO).
+
+`find_capacity()` runs the plan at increasing load levels, doubling the level while the SLO is met,
+then bisects between the highest level that met the SLO and the lowest one that didn't.
+The load is the number of threads, or of iterations per second, of the main thread groups of the plan,
+as for `sweep <sweep.html>`_, the level the plan was built with is the first level probed.
+
+Each probe is watched while it runs: once it has `min_samples` samples and the SLO is clearly broken,
+exceeded by more than `early_stop_margin` times, the probe is stopped instead of running to its end.
+
+The SLO is a dictionary of maximal values, keys are:
+
+* `error_rate`: ratio of failed samples
+* `mean_ms`: mean sample time in milliseconds
+* `p<N>_ms`: N-th percentile of sample times in milliseconds, e.g `p99_ms`
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.capacity import find_capacity
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            test_plan = TestPlan(ThreadGroupWithRampUpAndHold(10, 5, 30, http_sampler))
+
+            report = find_capacity(test_plan, slo=dict(p99_ms=300, error_rate=0.01))
+            print(report.capacity)
+            print(report.to_json())
+
+example - 2:
+--------------
+Reports are saved as json with a stable layout, so they can be compared from one release to the next.
+
+      .. code-block:: python
+
+            from pymeter.api.capacity import CapacityReport
+
+            with open("capacity-1.4.json", encoding="utf-8") as previous_file:
+                previous = CapacityReport.from_json(previous_file.read())
+            for difference in previous.diff(report):
+                print(difference)
+"""
+import json
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pymeter.api import ElementNode
+from pymeter.api.config import TestPlan
+from pymeter.api.stats import SampleStats
+from pymeter.api.sweep import KINDS, at_level
+
+PERCENTILE_KEY = re.compile(r"^p(\d+(?:\.\d+)?)_ms$")
+
+
+def slo_values(slo: Dict[str, float], stats: SampleStats) -> Dict[str, float]:
+    """returns the values the SLO limits, measured on `stats`"""
+    values = {}
+    for key in slo:
+        if key == "error_rate":
+            values[key] = stats.error_rate
+        elif key == "mean_ms":
+            values[key] = stats.sample_time_mean_milliseconds
+        elif PERCENTILE_KEY.match(key):
+            values[key] = stats.percentile(float(PERCENTILE_KEY.match(key)[1]))
+        else:
+            raise ValueError(f"Unknown SLO `{key}`, expected `error_rate`, `mean_ms` or `p<N>_ms`")
+    return values
+
+
+def slo_violations(slo: Dict[str, float], stats: SampleStats, margin: float = 1.0) -> Tuple[str, ...]:
+    """
+    returns the SLO keys whose value measured on `stats` exceeds `margin` times the limit
+
+    Args:
+
+        slo (Dict[str, float]): maximal values by SLO key
+
+        stats (SampleStats): the measured stats
+
+        margin (float): factor applied to the limits
+    """
+    return tuple(key for key, value in slo_values(slo, stats).items() if value > slo[key] * margin)
+
+
+class CapacityProbe(NamedTuple):
+    """outcome of the plan run at one load level"""
+
+    level: float
+    passed: bool
+    # whether the probe was stopped before its end because the SLO was clearly broken
+    stopped_early: bool
+    # SLO keys the probe didn't meet
+    violations: Tuple[str, ...]
+    samples: int
+    error_rate: float
+    throughput_per_second: float
+    sample_time_mean_milliseconds: float
+    sample_time_99_percentile_milliseconds: int
+
+    def to_dict(self) -> dict:
+        """returns the probe as a flat dictionary, floats are rounded so reports diff cleanly"""
+        return {
+            name: round(value, 3) if isinstance(value, float) else list(value) if isinstance(value, tuple) else value
+            for name, value in self._asdict().items()
+        }
+
+
+class CapacityReport(NamedTuple):
+    """outcome of a capacity search"""
+
+    # `threads` or `rps`
+    kind: str
+    slo: Dict[str, float]
+    # the highest level that met the SLO, None if none did
+    capacity: Optional[float]
+    # probes in the order they were run
+    probes: List[CapacityProbe]
+
+    @property
+    def at_capacity(self) -> Optional[CapacityProbe]:
+        """returns the probe run at the capacity level"""
+        return next(
+            (candidate for candidate in self.probes if candidate.passed and candidate.level == self.capacity), None
+        )
+
+    def to_dict(self) -> dict:
+        """returns the report as a dictionary"""
+        at_capacity = self.at_capacity
+        return {
+            "kind": self.kind,
+            "slo": dict(sorted(self.slo.items())),
+            "capacity": self.capacity,
+            "at_capacity": at_capacity.to_dict() if at_capacity else None,
+            "probes": [candidate.to_dict() for candidate in sorted(self.probes, key=lambda candidate: candidate.level)],
+        }
+
+    def to_json(self) -> str:
+        """returns the report as json, keys are sorted and probes ordered by level"""
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text: str) -> "CapacityReport":
+        """reads a report written by `to_json()`"""
+        values = json.loads(text)
+        probes = [
+            CapacityProbe(**{**probe_values, "violations": tuple(probe_values["violations"])})
+            for probe_values in values["probes"]
+        ]
+        return cls(values["kind"], values["slo"], values["capacity"], probes)
+
+    def diff(self, other: "CapacityReport") -> List[str]:
+        """returns the differences with another report, one `path: this != other` line per difference"""
+        differences = []
+        this_values, other_values = self.to_dict(), other.to_dict()
+        for key in ("kind", "slo", "capacity"):
+            if this_values[key] != other_values[key]:
+                differences.append(f"{key}: {this_values[key]!r} != {other_values[key]!r}")
+        this_probe, other_probe = this_values["at_capacity"] or {}, other_values["at_capacity"] or {}
+        for name in CapacityProbe._fields:
+            if name != "level" and this_probe.get(name) != other_probe.get(name):
+                differences.append(f"at_capacity.{name}: {this_probe.get(name)!r} != {other_probe.get(name)!r}")
+        return differences
+
+
+def _current_level(node: ElementNode, kind: str) -> Optional[float]:
+    argument = getattr(node.element_type(), f"{kind}_argument", None)
+    if argument is not None:
+        return node.bind().arguments[argument]
+    for child_node in node.child_nodes():
+        level = _current_level(child_node, kind)
+        if level is not None:
+            return level
+    return None
+
+
+def probe(
+    test_plan: TestPlan,
+    kind: str,
+    level: float,
+    slo: Dict[str, float],
+    early_stop_margin: float = 1.5,
+    min_samples: int = 100,
+    poll_interval_seconds: float = 1.0,
+) -> CapacityProbe:
+    """
+    runs the test plan at one load level, stops it early once the SLO is clearly broken
+
+    Args:
+
+        test_plan (TestPlan): the test plan
+
+        kind (str): `threads` or `rps`
+
+        level (float): the number of threads or of iterations per second
+
+        slo (Dict[str, float]): maximal values by SLO key
+
+        early_stop_margin (float): factor of the SLO limits over which the probe is stopped
+
+        min_samples (int): number of samples needed before the probe may be stopped
+
+        poll_interval_seconds (float): time between two checks of the live stats
+    """
+    level_plan = at_level(test_plan.node, kind, level).replace(breakdown=True).build()
+    test_run = level_plan.start()
+    stopped_early = False
+    stats = test_run.wait(poll_interval_seconds)
+    while stats is None:
+        live = level_plan.live_stats().overall
+        if live.count >= min_samples and slo_violations(slo, live, early_stop_margin):
+            stopped_early = True
+            test_run.stop()
+            stats = test_run.wait()
+            break
+        stats = test_run.wait(poll_interval_seconds)
+    overall = stats.overall
+    violations = slo_violations(slo, overall)
+    return CapacityProbe(
+        level,
+        not violations and not stopped_early,
+        stopped_early,
+        violations,
+        overall.count,
+        overall.error_rate,
+        overall.throughput_per_second,
+        overall.sample_time_mean_milliseconds,
+        overall.sample_time_99_percentile_milliseconds,
+    )
+
+
+def find_capacity(
+    test_plan: TestPlan,
+    slo: Dict[str, float],
+    kind: Optional[str] = None,
+    max_level: Optional[float] = None,
+    precision: float = 0.05,
+    early_stop_margin: float = 1.5,
+    min_samples: int = 100,
+    poll_interval_seconds: float = 1.0,
+    cooldown_seconds: float = 0.0,
+) -> CapacityReport:
+    """
+    searches the highest load level at which the test plan meets the SLO
+
+    Args:
+
+        test_plan (TestPlan): the test plan, its load level is the first level probed
+
+        slo (Dict[str, float]): maximal values by SLO key, e.g `dict(p99_ms=300, error_rate=0.01)`
+
+        kind (Optional[str]): `threads` or `rps`, found from the thread groups of the plan by default
+
+        max_level (Optional[float]): highest level probed, 1024 times the first level by default
+
+        precision (float): the search stops once the failing and passing levels are closer than this ratio of the
+        failing level, or one thread apart
+
+        early_stop_margin (float): factor of the SLO limits over which a probe is stopped before its end
+
+        min_samples (int): number of samples a probe needs before it may be stopped
+
+        poll_interval_seconds (float): time between two checks of the live stats of a probe
+
+        cooldown_seconds (float): pause between two probes, to let the system under test settle
+    """
+    if not slo:
+        raise ValueError("The SLO needs at least one limit")
+    slo_values(slo, SampleStats())
+    kinds = KINDS if kind is None else (kind,)
+    start = None
+    for candidate in kinds:
+        start = _current_level(test_plan.node, candidate)
+        if start is not None:
+            kind = candidate
+            break
+    if start is None or start <= 0:
+        raise ValueError("The test plan needs a thread group with a positive number of threads or rps")
+    max_level = max_level or start * 1024
+    integer = kind == "threads"
+    probes: List[CapacityProbe] = []
+
+    def run(level: float) -> bool:
+        if probes and cooldown_seconds:
+            time.sleep(cooldown_seconds)
+        result = probe(
+            test_plan,
+            kind,
+            level,
+            slo,
+            early_stop_margin=early_stop_margin,
+            min_samples=min_samples,
+            poll_interval_seconds=poll_interval_seconds,
+        )
+        probes.append(result)
+        return result.passed
+
+    # highest passing level and lowest failing level
+    passing, failing = 0, None
+    level = start
+    while True:
+        if not run(level):
+            failing = level
+            break
+        passing = level
+        if level >= max_level:
+            break
+        level = min(level * 2, max_level)
+        level = int(level) if integer else level
+    while failing is not None and failing - passing > max(precision * failing, 1 if integer else 0):
+        level = (passing + failing) / 2
+        level = int(level) if integer else level
+        if level in (passing, failing):
+            break
+        if run(level):
+            passing = level
+        else:
+            failing = level
+    capacity = passing or None
+    return CapacityReport(kind, dict(slo), capacity, probes)
@@ -162,18 +162,130 @@ We Can also generate data for each thread group:
             test_plan = TestPlan(thread_group1, thread_group2)
             stats = test_plan.run()
 
+example - 6:
+--------------
+
+`run()` blocks until the test is over, use `start()` to get a handle to the running test instead.
+The handle can gracefully `stop()` the test (threads finish their current sample),
+`cancel()` it immediately or `wait()` for it with a timeout.
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            thread_group = ThreadGroupWithRampUpAndHold(10, 1, 1800, http_sampler)
+            test_plan = TestPlan(thread_group)
+
+            test_run = test_plan.start()
+            stats = test_run.wait(timeout=600)
+            if stats is None:
+                # wall clock budget is exhausted, stop the test and collect the partial results
+                test_run.stop()
+                stats = test_run.wait()
+
+Within asyncio code, `run_async()` can be awaited, cancelling the awaiting task cancels the test:
+
+      .. code-block:: python
+
+            import asyncio
+
+            async def main():
+                stats = await asyncio.wait_for(test_plan.run_async(), timeout=600)
+
+            asyncio.run(main())
+
+example - 7:
+--------------
+
+A test plan can be split between several worker processes, each of them with its own JVM.
+Read more about it in the `workers <workers.html>`_ page.
+
+      .. code-block:: python
+
+            stats = test_plan.run(workers=4)
+
+example - 8:
+--------------
+
+Thread groups above are closed models: a thread only starts its next iteration when the previous one is over,
+so when the server slows down, the offered load quietly drops.
+`ArrivalRateThreadGroup` is an open model, iterations start at a target rate, and threads are added on demand up to a cap.
+Arrivals that couldn't be served on time are reported by `arrival_stats`.
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ArrivalRateThreadGroup
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+
+            # ramp up to 50 iterations per second in 10 seconds, hold for 60 seconds, with at most 200 threads
+            thread_group = ArrivalRateThreadGroup(50, 10, 60, 200, http_sampler)
+            stats = TestPlan(thread_group).run()
+            print(thread_group.arrival_stats)
+
+example - 9:
+--------------
+
+`ThreadGroupStages` and `ArrivalRateStages` follow a load profile made of several stages,
+each stage ramps from the level of the previous stage to its own level, then holds it.
+Stats are broken out per stage, to see at which level latency knees appear.
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupStages, ArrivalRateStages
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+
+            # a step ladder of threads: (threads, ramp up seconds, hold seconds)
+            ladder = ThreadGroupStages([(10, 5, 60), (20, 5, 60), (40, 5, 60)], http_sampler)
+
+            # a spike and its recovery, in iterations per second
+            spike = ArrivalRateStages([(20, 10, 60), (200, 5, 30), (20, 5, 120)], 500, http_sampler, name="Spike")
+
+            TestPlan(ladder, spike).run()
+            for stage, stage_stats in zip(ladder.stages, ladder.stage_stats()):
+                print(stage.target, stage_stats.sample_time_99_percentile_milliseconds)
 
 Classes
 -------------
 """
+import asyncio
 import os
-from jnius import JavaException
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import Future
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from pymeter.api import (
     ChildrenAreNotAllowed,
+    ElementNode,
+    JavaBuilder,
+    JavaClass,
     TestPlanChildElement,
     ThreadGroupChildElement,
+    end_test_elements,
+    recorded,
+    start_test_elements,
 )
+from pymeter.api.hdr import HdrHistogram, read_interval_log, write_interval_log
+from pymeter.api.stats import (
+    MAIN,
+    WARMUP,
+    WARMUP_VARIABLE,
+    SampleStats,
+    StageStatsCollector,
+    StatsCollector,
+    StatsSnapshot,
+)
+from pymeter.api.workers import shard_csv_file, split_count
 
 
 class BaseConfigElement(TestPlanChildElement):
@@ -192,6 +304,7 @@ class Vars(TestPlanChildElement):
     def children(self, *children):
         raise ChildrenAreNotAllowed("Cant append children to vars")
 
+    @recorded
     def set(self, key: str, value: str):
         """Sets a single key value pair"""
         if not isinstance(key, str):
@@ -206,6 +319,8 @@ class CsvDataset(TestPlanChildElement, ThreadGroupChildElement):
     csv data set allows you to append unique data set to samplers
     """
 
+    file_arguments = ("csv_file",)
+
     def __init__(self, csv_file: str) -> None:
         if not os.path.exists(csv_file):
             raise FileNotFoundError(f"Couldn't find file {csv_file}")
@@ -217,70 +332,506 @@ class CsvDataset(TestPlanChildElement, ThreadGroupChildElement):
     def children(self, *children):
         raise ChildrenAreNotAllowed("Cant append children to a csv_data_set")
 
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        return node.replace(
+            csv_file=shard_csv_file(node.bind().arguments["csv_file"], index, count, directory)
+        )
+
+
+class HttpConnectionSettings:
+    """
+    connection settings of http samplers, applied by JMeter pre and post processors right before each sample.
+
+    Settings left as `None` keep the value set by any enclosing settings, or JMeter's default.
+    """
+
+    clients = {"httpclient4": "HttpClient4", "java": "Java"}
+    java_system = JavaClass("java.lang.System")
+    java_concurrent_hash_map = JavaClass("java.util.concurrent.ConcurrentHashMap")
+    # time a sample waits for a free connection slot when its sampler has no timeouts
+    max_wait_milliseconds = 60000
+
+    pre_processor_script = """
+if (!(sampler instanceof org.apache.jmeter.protocol.http.sampler.HTTPSamplerBase)) return
+{settings}
+"""
+
+    reset_script = """
+def iteration = vars.getObject("pymeter.http.iteration")
+if (iteration != vars.getIteration()) {
+    if (iteration != null) sampler.threadFinished()
+    vars.putObject("pymeter.http.iteration", vars.getIteration())
+}
+"""
+
+    acquire_script = """
+def held = vars.getObject("{slot_key}")
+if (held != null) {
+    // the slot of a sample that was skipped before the post processors ran
+    vars.remove("{slot_key}")
+    held.release()
+}
+def limits = System.getProperties().get("{limits_key}")
+if (limits == null) return
+def host = sampler.getUrl().getHost()
+def semaphore = limits.computeIfAbsent(host, {
+    new java.util.concurrent.Semaphore({max_connections}, true)
+} as java.util.function.Function)
+long timeout = sampler.getConnectTimeout() + sampler.getResponseTimeout()
+if (timeout <= 0) timeout = {max_wait}
+if (semaphore.tryAcquire(timeout, java.util.concurrent.TimeUnit.MILLISECONDS)) vars.putObject("{slot_key}", semaphore)
+else log.warn("No free connection slot to " + host + " after " + timeout + " ms, the sample is sent anyway")
+"""
+
+    release_script = """
+def semaphore = vars.getObject("{slot_key}")
+if (semaphore == null) return
+vars.remove("{slot_key}")
+semaphore.release()
+"""
+
+    def __init__(
+        self,
+        keep_alive: Optional[bool] = None,
+        reuse_connections: bool = True,
+        connect_timeout_milliseconds: Optional[int] = None,
+        response_timeout_milliseconds: Optional[int] = None,
+        client: Optional[str] = None,
+        max_connections_per_host: Optional[int] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            keep_alive (Optional[bool]): whether connections are kept open between samples of the same thread
+
+            reuse_connections (bool): connections are kept open from one iteration to the next by default,
+            with `False` the connections of a thread are closed before the first sample of each iteration,
+            for all the samplers in scope
+
+            connect_timeout_milliseconds (Optional[int]): maximal time to establish a connection
+
+            response_timeout_milliseconds (Optional[int]): maximal time to wait for the response
+
+            client (Optional[str]): http client implementation, `httpclient4` or `java`
+
+            max_connections_per_host (Optional[int]): maximal number of requests in flight to each host,
+            shared by all the threads in scope, samples wait for a free slot before they start,
+            for at most the connect and response timeouts of their sampler
+        """
+        if client is not None and client.lower() not in HttpConnectionSettings.clients:
+            raise ValueError(
+                f"Unknown http client `{client}`, expected one of {sorted(HttpConnectionSettings.clients)}"
+            )
+        if max_connections_per_host is not None and max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be positive")
+        self.keep_alive = keep_alive
+        self.reuse_connections = reuse_connections
+        self.connect_timeout_milliseconds = connect_timeout_milliseconds
+        self.response_timeout_milliseconds = response_timeout_milliseconds
+        self.client = client
+        self.max_connections_per_host = max_connections_per_host
+        self._key = uuid.uuid4().hex
+
+    @property
+    def limits_key(self) -> str:
+        """returns the name of the system property holding the connection slots of the running test"""
+        return f"pymeter.http.limits.{self._key}"
+
+    def test_started(self):
+        """registers the connection slots of a new test"""
+        if self.max_connections_per_host is not None:
+            HttpConnectionSettings.java_system.getProperties().put(
+                self.limits_key, HttpConnectionSettings.java_concurrent_hash_map()
+            )
+
+    def test_ended(self):
+        """unregisters the connection slots of the test"""
+        if self.max_connections_per_host is not None:
+            HttpConnectionSettings.java_system.getProperties().remove(self.limits_key)
+
+    def pre_processor(self) -> str:
+        """returns the groovy script applying the settings"""
+        settings = []
+        if self.keep_alive is not None:
+            settings.append(f"sampler.setUseKeepAlive({'true' if self.keep_alive else 'false'})")
+        if self.connect_timeout_milliseconds is not None:
+            settings.append(f'sampler.setConnectTimeout("{int(self.connect_timeout_milliseconds)}")')
+        if self.response_timeout_milliseconds is not None:
+            settings.append(f'sampler.setResponseTimeout("{int(self.response_timeout_milliseconds)}")')
+        if self.client is not None:
+            settings.append(
+                f'sampler.setImplementation("{HttpConnectionSettings.clients[self.client.lower()]}")'
+            )
+        if not self.reuse_connections:
+            settings.append(HttpConnectionSettings.reset_script.strip())
+        return HttpConnectionSettings.pre_processor_script.replace("{settings}", "\n".join(settings))
+
+    def java_processors(self) -> list:
+        """returns the JMeter elements applying the settings"""
+        processors = [
+            BaseConfigElement.jmeter_class.jsr223PreProcessor(self.pre_processor())
+        ]
+        if self.max_connections_per_host is not None:
+            slot_key = f"pymeter.http.slot.{self._key}"
+            processors.append(
+                BaseConfigElement.jmeter_class.jsr223PreProcessor(
+                    HttpConnectionSettings.acquire_script.replace("{slot_key}", slot_key)
+                    .replace("{limits_key}", self.limits_key)
+                    .replace("{max_connections}", str(self.max_connections_per_host))
+                    .replace("{max_wait}", str(HttpConnectionSettings.max_wait_milliseconds))
+                )
+            )
+            processors.append(
+                BaseConfigElement.jmeter_class.jsr223PostProcessor(
+                    HttpConnectionSettings.release_script.replace("{slot_key}", slot_key)
+                )
+            )
+        return processors
+
+
+class ResponseBodyLimit:
+    """
+    limit of the response body bytes kept in the results of http samplers, applied by JMeter pre and post processors.
+
+    With a limit of 0, response bodies are drained and discarded as they are read, only their MD5 hash is kept.
+    With a positive limit, bodies are truncated right after the sample, before post processors and listeners get them.
+
+    Limits are turned off for samplers with a `JsonExtractor` or a `ResponseAssertion` in scope.
+    """
+
+    limit_script = """
+if (!(sampler instanceof org.apache.jmeter.protocol.http.sampler.HTTPSamplerBase)) return
+if (vars.getObject("pymeter.body.needed").is(sampler)) return
+sampler.setMD5({discard})
+vars.putObject("pymeter.body.max", [sampler, {max_bytes}] as Object[])
+"""
+
+    truncate_script = """
+def limit = vars.getObject("pymeter.body.max")
+if (limit == null || !limit[0].is(sampler) || vars.getObject("pymeter.body.needed").is(sampler)) return
+def data = prev.getResponseData()
+if (data.length > limit[1]) prev.setResponseData(java.util.Arrays.copyOf(data, (int) limit[1]))
+"""
+
+    keep_script = """
+vars.putObject("pymeter.body.needed", sampler)
+if (sampler instanceof org.apache.jmeter.protocol.http.sampler.HTTPSamplerBase) sampler.setMD5(false)
+"""
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+
+        Args:
+
+            max_bytes (int): maximal number of bytes kept from each response body, 0 discards bodies
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes can't be negative")
+        self.max_bytes = max_bytes
+
+    def java_processors(self) -> list:
+        """returns the JMeter elements applying the limit"""
+        processors = [
+            BaseConfigElement.jmeter_class.jsr223PreProcessor(
+                ResponseBodyLimit.limit_script.replace(
+                    "{discard}", "false" if self.max_bytes else "true"
+                ).replace("{max_bytes}", str(int(self.max_bytes)))
+            )
+        ]
+        if self.max_bytes:
+            processors.append(
+                BaseConfigElement.jmeter_class.jsr223PostProcessor(ResponseBodyLimit.truncate_script)
+            )
+        return processors
+
+    @staticmethod
+    def java_keep_processor():
+        """returns the JMeter element turning off the limits for the samplers in its scope"""
+        return BaseConfigElement.jmeter_class.jsr223PreProcessor(ResponseBodyLimit.keep_script)
+
+
+class HttpDefaults(TestPlanChildElement, ThreadGroupChildElement):
+    """
+    connection settings of all the http samplers in scope, settings of a sampler take precedence.
+    Read more about the settings in `HttpConnectionSettings`.
+    """
+
+    def __init__(
+        self,
+        keep_alive: Optional[bool] = None,
+        reuse_connections: bool = True,
+        connect_timeout_milliseconds: Optional[int] = None,
+        response_timeout_milliseconds: Optional[int] = None,
+        client: Optional[str] = None,
+        max_connections_per_host: Optional[int] = None,
+    ) -> None:
+        self.settings = HttpConnectionSettings(
+            keep_alive,
+            reuse_connections,
+            connect_timeout_milliseconds,
+            response_timeout_milliseconds,
+            client,
+            max_connections_per_host,
+        )
+        self._http_defaults_instance, *self._extra_instances = self.settings.java_processors()
+        super().__init__()
+
+    @property
+    def java_wrapped_elements(self) -> tuple:
+        return (self.java_wrapped_element, *self._extra_instances)
+
+    @classmethod
+    def is_jmx_cacheable(cls, node: ElementNode) -> bool:
+        # the connection slots are shared with python under a key of their own
+        return node.bind().arguments.get("max_connections_per_host") is None
+
+    def children(self, *children):
+        raise ChildrenAreNotAllowed("Cant append children to http defaults")
+
+    def test_started(self):
+        super().test_started()
+        self.settings.test_started()
+
+    def test_ended(self):
+        super().test_ended()
+        self.settings.test_ended()
+
 
 class TestPlan(BaseConfigElement):
     """
     This is the object that will call on the invocation of the test in the JMeter engine.
+
+    Building a test plan doesn't need a JVM: elements only record recipes of their java objects,
+    which are created when the plan is lowered, right before it runs.
+    `test_plan.node` is the pure python model of the plan, it can be pickled, hashed, compared and diffed.
     """
 
     class TestPlanStats(BaseConfigElement):
-        """test stats"""
+        """
+        test stats
+
+        Headline numbers are the overall stats computed by JMeter, they are transferred from the JVM
+        in a single call the first time one of them is read.
 
-        def __init__(self, java_instance) -> None:
+        The breakdown (`collected`, `overall`, `warmup`, `by_label()`, `by_thread_group()` and the HDR histograms)
+        is only available for plans created with `TestPlan(breakdown=True)`.
+
+        .. note::
+            When samples were sent during the warmup of the test or of a thread group, headline numbers
+            only account for the samples of the main thread groups sent after it, samples of setup and teardown
+            thread groups are then only reported by `by_thread_group()`, and warmup samples by `warmup`.
+        """
+
+        def __init__(
+            self,
+            java_instance,
+            collected: Optional[Dict[Tuple[str, str, str], SampleStats]] = None,
+            duration_milliseconds: Optional[float] = None,
+            stop_reason: Optional[str] = None,
+        ) -> None:
             self._test_plan_stats_instance = java_instance
+            self._collected = collected
+            self._duration_milliseconds = duration_milliseconds
+            self._stop_reason = stop_reason
+            self._overall = None
+            self._snapshot = None
             super().__init__()
 
+        @property
+        def collected(self) -> Dict[Tuple[str, str, str], SampleStats]:
+            """returns the stats keyed by thread group kind (main, setup or teardown), thread group name and label"""
+            if self._collected is None:
+                raise ValueError("The breakdown of the stats is only collected by `TestPlan(breakdown=True)`")
+            return self._collected
+
+        @property
+        def stop_reason(self) -> Optional[str]:
+            """returns why the test was stopped before its end by an `AutoStop` element, None if it wasn't"""
+            return self._stop_reason
+
+        @property
+        def overall(self) -> SampleStats:
+            """returns the stats of all samples from the main thread groups"""
+            if self._overall is None:
+                self._overall = SampleStats.combine(
+                    stats for (kind, _, _), stats in self.collected.items() if kind == MAIN
+                )
+            return self._overall
+
+        @property
+        def warmup(self) -> SampleStats:
+            """returns the stats of the samples sent during the warmup, left out of all the other numbers"""
+            return SampleStats.combine(stats for (kind, _, _), stats in self.collected.items() if kind == WARMUP)
+
+        def by_label(self) -> Dict[str, SampleStats]:
+            """returns the stats of the main thread groups samples by sampler label"""
+            grouped: Dict[str, list] = {}
+            for (kind, _, label), stats in self.collected.items():
+                if kind == MAIN:
+                    grouped.setdefault(label, []).append(stats)
+            return {label: SampleStats.combine(group) for label, group in grouped.items()}
+
+        def by_thread_group(self) -> Dict[str, SampleStats]:
+            """returns the stats by thread group name, setup and teardown thread groups included"""
+            grouped: Dict[str, list] = {}
+            for (kind, thread_group, _), stats in self.collected.items():
+                if kind != WARMUP:
+                    grouped.setdefault(thread_group, []).append(stats)
+            return {name: SampleStats.combine(group) for name, group in grouped.items()}
+
+        def hdr_histogram(self, significant_figures: int = 3) -> HdrHistogram:
+            """returns the sample times of the main thread groups as a mergeable HDR histogram"""
+            return self.overall.hdr_histogram(significant_figures)
+
+        def hdr_histograms(self, significant_figures: int = 3) -> Dict[Tuple[str, str, str], HdrHistogram]:
+            """
+            returns the sample times as mergeable HDR histograms, keyed like `collected`,
+            each histogram is tagged with its url encoded key parts, separated by slashes
+            """
+            histograms = {}
+            for key, stats in self.collected.items():
+                histogram = stats.hdr_histogram(significant_figures)
+                histogram.tag = "/".join(urllib.parse.quote(part, safe="") for part in key)
+                histograms[key] = histogram
+            return histograms
+
+        def write_hdr_log(self, path: str, significant_figures: int = 3) -> None:
+            """
+            writes the sample times to a file in the HdrHistogram interval log format,
+            with one histogram per key of `collected`
+
+            Args:
+
+                path (str): path to the log file
+
+                significant_figures (int): number of significant decimal figures kept from each sample time
+            """
+            with open(path, "w", encoding="utf-8") as log_file:
+                write_interval_log(log_file, self.hdr_histograms(significant_figures).values())
+
+        @classmethod
+        def from_hdr_log(cls, path: str) -> "TestPlan.TestPlanStats":
+            """
+            reads stats from an interval log written by `write_hdr_log()`, histograms with the same tag are merged.
+
+            Only sample counts, sample times and time ranges are held by the log, the other numbers are 0.
+
+            Args:
+
+                path (str): path to the log file
+            """
+            with open(path, encoding="utf-8") as log_file:
+                histograms = read_interval_log(log_file)
+            merged: Dict[Tuple[str, str, str], HdrHistogram] = {}
+            for histogram in histograms:
+                key = tuple(urllib.parse.unquote(part) for part in (histogram.tag or "").split("/"))
+                if len(key) != 3:
+                    key = (MAIN, "", histogram.tag or "")
+                if key in merged:
+                    merged[key].add(histogram)
+                else:
+                    merged[key] = histogram
+            collected = {key: SampleStats.from_hdr_histogram(histogram) for key, histogram in merged.items()}
+            overall = SampleStats.combine(stats for (kind, _, _), stats in collected.items() if kind == MAIN)
+            return cls(None, collected, overall.duration_milliseconds)
+
+        def snapshot(self) -> StatsSnapshot:
+            """returns all the headline numbers, means and the duration aren't rounded to whole milliseconds"""
+            if self._snapshot is None:
+                excludes_warmup = self._collected is not None and any(
+                    kind == WARMUP for kind, _, _ in self._collected
+                )
+                if self._test_plan_stats_instance is not None and not excludes_warmup:
+                    self._snapshot = StatsSnapshot.from_java_stats(
+                        self._test_plan_stats_instance, None if self._collected is None else self.overall
+                    )
+                else:
+                    self._snapshot = StatsSnapshot.from_sample_stats(self.overall, self._duration_milliseconds or 0)
+            return self._snapshot
+
+        def to_dict(self) -> dict:
+            """returns all the headline numbers as a flat dictionary"""
+            return self.snapshot().to_dict()
+
         @property
         def sample_time_mean_milliseconds(self):
             """returns the mean of sample times in milliseconds"""
-            return self.java_wrapped_element.overallStats.sampleTime().mean().toMillis()
+            return int(self.snapshot().sample_time_mean_milliseconds)
 
         @property
         def sample_time_min_milliseconds(self):
             """returns the min of sample times in milliseconds"""
-            return self.java_wrapped_element.overallStats.sampleTime().min().toMillis()
+            return int(self.snapshot().sample_time_min_milliseconds)
 
         @property
         def sample_time_median_milliseconds(self):
             """returns the median of sample times in milliseconds"""
-            return (
-                self.java_wrapped_element.overallStats.sampleTime().median().toMillis()
-            )
+            return int(self.snapshot().sample_time_median_milliseconds)
 
         @property
         def sample_time_90_percentile_milliseconds(self):
             """returns the 90th percentile of sample times in milliseconds"""
-            return (
-                self.java_wrapped_element.overallStats.sampleTime().perc90().toMillis()
-            )
+            return int(self.snapshot().sample_time_90_percentile_milliseconds)
 
         @property
         def sample_time_95_percentile_milliseconds(self):
             """returns the 95th percentile of sample times in milliseconds"""
-            return (
-                self.java_wrapped_element.overallStats.sampleTime().perc95().toMillis()
-            )
+            return int(self.snapshot().sample_time_95_percentile_milliseconds)
 
         @property
         def sample_time_99_percentile_milliseconds(self):
             """returns the 99th percentile of sample times in milliseconds"""
-            return (
-                self.java_wrapped_element.overallStats.sampleTime().perc99().toMillis()
-            )
+            return int(self.snapshot().sample_time_99_percentile_milliseconds)
 
         @property
         def sample_time_max_milliseconds(self):
             """returns the max of sample times in milliseconds"""
-            return self.java_wrapped_element.overallStats.sampleTime().max().toMillis()
+            return int(self.snapshot().sample_time_max_milliseconds)
 
         @property
         def duration_milliseconds(self):
-            """returns the max of sample times in milliseconds"""
-            return self.java_wrapped_element.duration().toMillis()
+            """returns the duration of the test in milliseconds"""
+            return int(self.snapshot().duration_milliseconds)
+
+    def __init__(
+        self,
+        *children: TestPlanChildElement,
+        max_response_body_bytes: Optional[int] = None,
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
+        breakdown: bool = False,
+    ) -> None:
+        """
+
+        Args:
+
+            max_response_body_bytes (Optional[int]): maximal number of bytes kept from each http response body,
+            0 discards bodies as they are read. Read more in `ResponseBodyLimit`
+
+            warmup_seconds (Optional[float]): samples of the main thread groups started during this time from the start
+            of the test are still sent, but reported by `TestPlanStats.warmup` instead of the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread of the main thread groups
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
 
-    def __init__(self, *children: TestPlanChildElement) -> None:
+            breakdown (bool): collects the stats by thread group and label while the test is running, read more
+            in the `stats <stats.html>`_ page. Plans with a warmup always collect them
+        """
+        _check_warmup(warmup_seconds, warmup_iterations)
 
         self._test_plan_instance = BaseConfigElement.jmeter_class.testPlan()
+        if max_response_body_bytes is not None:
+            self._test_plan_instance.children(
+                *ResponseBodyLimit(max_response_body_bytes).java_processors()
+            )
+        self._children = []
+        self._stats_collector = None
+        if breakdown or warmup_seconds or warmup_iterations:
+            self._stats_collector = StatsCollector(warmup_seconds, warmup_iterations)
+            self._children.append(self._stats_collector)
+            self._test_plan_instance.children(*self._stats_collector.java_wrapped_elements)
         self.children(*children)
 
         super().__init__()
@@ -288,9 +839,22 @@ class TestPlan(BaseConfigElement):
     def children(self, *children):
         if not all(isinstance(c, TestPlanChildElement) for c in children):
             raise TypeError("only takes children of type `TestPlanChildElement`")
-        return super().children(*children)
-
-    def run(self):
+        self._children.extend(children)
+        result = super().children(*children)
+        if self._stats_collector is None and any(getattr(c, "has_warmup", False) for c in children):
+            # the warmup of a thread group is only kept out of the headline numbers by the collector,
+            # it isn't a recorded call, replaying the call on a copy of the plan adds it again
+            self._stats_collector = StatsCollector()
+            self._children.append(self._stats_collector)
+            self.java_wrapped_element.children(*self._stats_collector.java_wrapped_elements)
+        return result
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        # the stats of the workers are merged from their breakdown
+        return super().shard(node.replace(breakdown=True), index, count, directory)
+
+    def run(self, workers: int = 1, engine: str = "jmeter", jmx_cache: Optional[str] = None):
         """
         *run()* will execute the test plan code and return an object with aggregated results.
 
@@ -298,25 +862,280 @@ class TestPlan(BaseConfigElement):
 
         By default, run prints stats to the stdio, for other reporting options please do check the `reporters <reporters.html>`_ page
 
+        Args:
+
+            workers (int): number of processes the test plan is split between, read more in the `workers <workers.html>`_ page
+
+            engine (str): `jmeter`, or `asyncio` to run a subset of the elements on a python event loop,
+            read more in the `asyncio engine <asyncio_engine.html>`_ page
+
+            jmx_cache (Optional[str]): directory caching the JMX files of plans, unchanged plans are loaded from it
+            instead of being built again, read more in the `jmx <jmx.html>`_ page
+
         """
+        if workers < 1:
+            raise ValueError("workers must be a positive number")
+        if engine not in ("jmeter", "asyncio"):
+            raise ValueError(f"Unknown engine `{engine}`, expected `jmeter` or `asyncio`")
+        if engine == "asyncio":
+            if workers > 1:
+                raise ValueError("workers are only supported by the jmeter engine")
+            # pylint: disable-next=import-outside-toplevel
+            from pymeter.api.asyncio_engine import run_test_plan
+
+            return run_test_plan(self)
+        if workers > 1:
+            # pylint: disable-next=import-outside-toplevel
+            from pymeter.api.workers import run_workers
+
+            with tempfile.TemporaryDirectory(prefix="pymeter-workers-") as directory:
+                return run_workers(self, workers, directory, jmx_cache)
+
+        from jnius import JavaException  # pylint: disable=import-outside-toplevel
+
+        started = []
         try:
-            return TestPlan.TestPlanStats(self._test_plan_instance.run())
+            for child in self._children:
+                child.test_started()
+                started.append(child)
+            # the plan is only turned into java objects now, building it didn't need the JVM
+            if jmx_cache is None:
+                java_stats = self.lower().run()
+            else:
+                from pymeter.api.jmx import lower_cached  # pylint: disable=import-outside-toplevel
+
+                java_stats = lower_cached(self, jmx_cache).run()
         except JavaException as java_exception:
             print("\n\t at ".join(java_exception.stacktrace))
             raise java_exception
+        finally:
+            # only the children that started are ended, a child failing to start doesn't leak the others
+            end_test_elements(started)
+        duration_milliseconds, collected = None, None
+        if self._stats_collector is not None:
+            # collected once the children ended, the last sample of each thread is only aggregated then
+            duration_milliseconds, collected = self._stats_collector.collect(java_stats)
+        # auto stop elements record why they stopped the test when it ends
+        stop_reason = next(
+            (child.stop_reason for child in self._children if getattr(child, "stop_reason", None)), None
+        )
+        return TestPlan.TestPlanStats(java_stats, collected, duration_milliseconds, stop_reason)
+
+    def live_stats(self) -> "TestPlan.TestPlanStats":
+        """
+        returns the stats of the samples collected so far, may be called while the test is running.
+
+        The duration of the returned stats is the time between the first and the last sample of the main thread groups.
+        Live stats are only available for plans created with `TestPlan(breakdown=True)`.
+        """
+        if self._stats_collector is None:
+            raise ValueError("Live stats are only collected by `TestPlan(breakdown=True)`")
+        _, collected = self._stats_collector.collect()
+        overall = SampleStats.combine(
+            stats for (kind, _, _), stats in collected.items() if kind == MAIN
+        )
+        return TestPlan.TestPlanStats(None, collected, overall.duration_milliseconds)
+
+    def save_as_jmx(self, path: str) -> None:
+        """
+        saves the test plan as a JMX file, which can be opened in the JMeter GUI or run by plain JMeter
+
+        Args:
+
+            path (str): path to the JMX file
+        """
+        self.lower().saveAsJmx(path)
+
+    @staticmethod
+    def from_jmx(path: str, *children: TestPlanChildElement, breakdown: bool = False) -> "TestPlan":
+        """
+        loads a test plan from a JMX file, saved by `save_as_jmx()` or by JMeter
+
+        Args:
+
+            path (str): path to the JMX file
+
+            children (TestPlanChildElement): elements appended to the loaded plan
+
+            breakdown (bool): collects the stats by thread group and label while the test is running
+        """
+        from pymeter.api.jmx import JmxTestPlan  # pylint: disable=import-outside-toplevel
+
+        return JmxTestPlan(path, *children, breakdown=breakdown)
+
+    def start(self) -> "TestPlanRun":
+        """
+        *start()* executes the test plan in a background thread and returns immediately.
+
+        Returns:
+
+            TestPlanRun: a handle to stop, cancel or wait for the running test
+        """
+        return TestPlanRun(self)
+
+    async def run_async(self) -> "TestPlan.TestPlanStats":
+        """
+        *run_async()* is the asyncio flavour of `run()`, the event loop is not blocked while the test is running.
+
+        Cancelling the awaiting task cancels the test immediately.
+        """
+        test_run = self.start()
+        try:
+            return await asyncio.wrap_future(test_run.future)
+        except asyncio.CancelledError:
+            test_run.cancel()
+            raise
+
+
+class TestPlanRun:
+    """
+    Handle to a test plan running in a background thread, returned by `TestPlan.start()`.
+
+    .. note::
+        JMeter runs a single engine per JVM, `stop()` and `cancel()` therefore act on the test currently executed.
+    """
+
+    jmeter_engine = JavaClass("org.apache.jmeter.engine.StandardJMeterEngine")
+    jmeter_context_service = JavaClass("org.apache.jmeter.threads.JMeterContextService")
+
+    def __init__(self, test_plan: TestPlan) -> None:
+        self.future: Future = Future()
+        self._test_plan = test_plan
+        self._stop_requested = False
+        for child in test_plan._children:  # pylint: disable=protected-access
+            child.test_scheduled(self.future)
+        self._thread = threading.Thread(
+            target=self._run, name="pymeter-test-plan", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            if self._stop_requested:
+                raise RuntimeError("Test plan was stopped before it started")
+            self.future.set_result(self._test_plan.run())
+        except BaseException as exception:  # pylint: disable=broad-except
+            self.future.set_exception(exception)
+        finally:
+            _detach()
+
+    def _stop_once_started(self, method: str):
+        # the static stop methods of the engine do nothing until the engine exists, the plan may still be lowered
+        try:
+            while not self.future.done():
+                if "jnius" in sys.modules and TestPlanRun.jmeter_context_service.getTestStartTime():
+                    getattr(TestPlanRun.jmeter_engine, method)()
+                    return
+                time.sleep(0.05)
+        finally:
+            _detach()
+
+    def _request_stop(self, method: str):
+        self._stop_requested = True
+        threading.Thread(
+            target=self._stop_once_started, args=(method,), name="pymeter-test-plan-stop", daemon=True
+        ).start()
+
+    def done(self) -> bool:
+        """returns True once the test is over"""
+        return self.future.done()
+
+    def stop(self) -> None:
+        """gracefully stops the test, threads finish their current sample before exiting"""
+        self._request_stop("stopEngine")
+
+    def cancel(self) -> None:
+        """stops the test immediately, in-flight samples are interrupted"""
+        self._request_stop("stopEngineNow")
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[TestPlan.TestPlanStats]:
+        """
+        Waits for the test to be over.
+
+        Args:
+
+            timeout (Optional[float]): maximal number of seconds to wait, waits forever by default
+
+        Returns:
+
+            Optional[TestPlan.TestPlanStats]: the test stats, or None if the timeout has expired first
+        """
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return None
+        return self.future.result()
+
+
+def _detach():
+    """detaches the current thread from the JVM, without starting the JVM when it isn't running"""
+    if "jnius" in sys.modules:
+        from jnius import detach  # pylint: disable=import-outside-toplevel
+
+        detach()
+
+
+def _check_warmup(warmup_seconds: Optional[float], warmup_iterations: Optional[int]):
+    if (warmup_seconds or 0) < 0 or (warmup_iterations or 0) < 0:
+        raise ValueError("warmup_seconds and warmup_iterations can't be negative")
 
 
 class BaseThreadGroup(BaseConfigElement):
     """base class for all thread groups"""
 
-    def __init__(self, *children: ThreadGroupChildElement) -> None:
+    # constructor arguments holding the number of threads and the target rate, for thread groups that have one,
+    # they are the load levels changed by sweeps
+    threads_argument: Optional[str] = None
+    rps_argument: Optional[str] = None
+    # thread groups with a warmup add a stats collector to their test plan
+    has_warmup = False
+
+    # marks the samples sent while the thread is warming up, for the stats collector
+    warmup_script_template = """
+long offset = System.currentTimeMillis() - org.apache.jmeter.threads.JMeterContextService.getTestStartTime()
+if (offset < {milliseconds} || vars.getIteration() <= {iterations}) vars.put("{variable}", "true")
+else vars.remove("{variable}")
+"""
+
+    def __init__(
+        self,
+        *children: ThreadGroupChildElement,
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
+    ) -> None:
+        _check_warmup(warmup_seconds, warmup_iterations)
+        if warmup_seconds or warmup_iterations:
+            self.has_warmup = True
+            self.java_wrapped_element.children(
+                BaseConfigElement.jmeter_class.jsr223PreProcessor(
+                    BaseThreadGroup.warmup_script_template.replace(
+                        "{milliseconds}", str(round((warmup_seconds or 0) * 1000))
+                    )
+                    .replace("{iterations}", str(int(warmup_iterations or 0)))
+                    .replace("{variable}", WARMUP_VARIABLE)
+                )
+            )
         self.children(*children)
         super().__init__()
 
     def children(self, *children):
         if not all(isinstance(c, ThreadGroupChildElement) for c in children):
             raise TypeError("only takes children of type `ThreadGroupChildElement`")
-        return super().children(*children)
+        result = super().children(*children)
+        self.__dict__.setdefault("_children", []).extend(children)
+        if not self.__dict__.get("_keeps_response_body") and any(
+            c.needs_response_body for c in children
+        ):
+            self._keeps_response_body = True
+            self.java_wrapped_element.children(ResponseBodyLimit.java_keep_processor())
+        return result
+
+    def test_started(self):
+        start_test_elements(self.__dict__.get("_children", ()))
+
+    def test_ended(self):
+        end_test_elements(self.__dict__.get("_children", ()))
 
 
 class SetupThreadGroup(BaseThreadGroup):
@@ -347,22 +1166,49 @@ class ThreadGroupSimple(BaseThreadGroup):
 
     """
 
+    threads_argument = "number_of_threads"
+
     def __init__(
         self,
         number_of_threads: int,
         iterations: int,
         *children: ThreadGroupChildElement,
         name: str = "Thread Group",
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
     ) -> None:
+        """
+
+        Args:
+
+            warmup_seconds (Optional[float]): samples started during this time from the start of the test
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+        """
         self._thread_group_simple_instance = BaseConfigElement.jmeter_class.threadGroup(
             name, number_of_threads, iterations
         )
-        super().__init__(*children)
+        super().__init__(*children, warmup_seconds=warmup_seconds, warmup_iterations=warmup_iterations)
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        return super().shard(
+            node.replace(
+                number_of_threads=split_count(node.bind().arguments["number_of_threads"], index, count)
+            ),
+            index,
+            count,
+            directory,
+        )
 
 
 class ThreadGroupWithRampUpAndHold(BaseThreadGroup):
     """Thread group that rumps up a number of thread in a given number of seconds and then holds the load for a given number of seconds."""
 
+    threads_argument = "number_of_threads"
+
     def __init__(
         self,
         number_of_threads: int,
@@ -370,7 +1216,19 @@ class ThreadGroupWithRampUpAndHold(BaseThreadGroup):
         holdup_time_seconds: float,
         *children,
         name: str = "Thread Group",
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
     ) -> None:
+        """
+
+        Args:
+
+            warmup_seconds (Optional[float]): samples started during this time from the start of the test
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+        """
 
         self._thread_group_with_ramp_up_and_hold_instance = (
             BaseConfigElement.jmeter_class.threadGroup(name)
@@ -382,4 +1240,386 @@ class ThreadGroupWithRampUpAndHold(BaseThreadGroup):
                 BaseConfigElement.java_duration.ofSeconds(holdup_time_seconds),
             )
         )
-        super().__init__(*children)
+        super().__init__(*children, warmup_seconds=warmup_seconds, warmup_iterations=warmup_iterations)
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        return super().shard(
+            node.replace(
+                number_of_threads=split_count(node.bind().arguments["number_of_threads"], index, count)
+            ),
+            index,
+            count,
+            directory,
+        )
+
+
+class Stage(NamedTuple):
+    """a stage of a load profile: ramp from the target of the previous stage to `target`, then hold it"""
+
+    # number of threads, or of iterations per second for arrival rate thread groups
+    target: float
+    rampup_time_seconds: float
+    holdup_time_seconds: float = 0
+
+
+def _stage_end_offsets_milliseconds(stages: List[Stage]) -> List[int]:
+    offsets, elapsed = [], 0.0
+    for stage in stages:
+        elapsed += stage.rampup_time_seconds + stage.holdup_time_seconds
+        offsets.append(round(elapsed * 1000))
+    return offsets
+
+
+def _java_duration(seconds: float):
+    return BaseConfigElement.java_duration.ofMillis(round(seconds * 1000))
+
+
+class ThreadGroupStages(BaseThreadGroup):
+    """
+    Thread group following a multi stage load profile, e.g - a step ladder, a spike and its recovery or a soak test.
+
+    Each stage ramps the number of threads from the number of the previous stage (0 for the first one),
+    then holds it. Stats of each stage are reported by `stage_stats()`.
+    """
+
+    jmx_cacheable = False
+
+    def __init__(
+        self,
+        stages: List[Tuple[int, float, float]],
+        *children: ThreadGroupChildElement,
+        name: str = "Thread Group",
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            stages (List[Tuple[int, float, float]]): number of threads, ramp up time and hold time in seconds of each stage
+
+            name (str): name of the thread group
+
+            warmup_seconds (Optional[float]): samples started during this time from the start of the test
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+        """
+        self.stages = [Stage(*stage) for stage in stages]
+        if not self.stages:
+            raise ValueError("At least one stage is required")
+        self._thread_group_stages_instance = BaseConfigElement.jmeter_class.threadGroup(name)
+        for stage in self.stages:
+            self._thread_group_stages_instance.rampTo(
+                int(stage.target), _java_duration(stage.rampup_time_seconds)
+            )
+            if stage.holdup_time_seconds:
+                self._thread_group_stages_instance.holdFor(_java_duration(stage.holdup_time_seconds))
+        self._stage_stats_collector = StageStatsCollector(_stage_end_offsets_milliseconds(self.stages))
+        self._thread_group_stages_instance.children(
+            BaseConfigElement.jmeter_class.jsr223PostProcessor(self._stage_stats_collector.script)
+        )
+        super().__init__(*children, warmup_seconds=warmup_seconds, warmup_iterations=warmup_iterations)
+
+    def stage_stats(self) -> List[SampleStats]:
+        """returns the stats of the samples of each stage, may be called while the test is running"""
+        return self._stage_stats_collector.collect()
+
+    def test_started(self):
+        super().test_started()
+        self._stage_stats_collector.test_started()
+
+    def test_ended(self):
+        super().test_ended()
+        self._stage_stats_collector.test_ended()
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        return super().shard(
+            node.replace(
+                stages=[
+                    (split_count(int(stage.target), index, count), *stage[1:])
+                    for stage in (Stage(*stage) for stage in node.bind().arguments["stages"])
+                ]
+            ),
+            index,
+            count,
+            directory,
+        )
+
+
+class ArrivalStats(NamedTuple):
+    """arrivals of an arrival rate thread group"""
+
+    # iterations the schedule asked for, up to the end of the test
+    scheduled: int
+    # iterations that were actually started
+    started: int
+    # iterations started later than their time in the schedule, e.g. as all the threads were busy
+    late: int
+
+    @property
+    def dropped(self) -> int:
+        """iterations of the schedule that were never started"""
+        return max(0, self.scheduled - self.started)
+
+
+class BaseArrivalRateThreadGroup(BaseThreadGroup):
+    """
+    base class for thread groups that start iterations at a target rate (open model),
+    instead of keeping a number of threads busy.
+
+    Threads are added on demand up to `max_threads`, when all of them are busy arrivals start late,
+    and arrivals that can't be started before the end of the test are dropped.
+    """
+
+    jmx_cacheable = False
+
+    java_event_type = JavaBuilder("us.abstracta.jmeter.javadsl.core.threadgroups.RpsThreadGroup$EventType")
+    java_atomic_long_array = JavaClass("java.util.concurrent.atomic.AtomicLongArray")
+    java_system = JavaClass("java.lang.System")
+
+    # counters: started arrivals, late arrivals, timestamp of the first arrival.
+    # segments of the schedule: start and duration in seconds, rates at the start and at the end of the segment
+    script_template = """
+def counters = System.getProperties().get("{key}")
+if (counters == null || vars.getIteration() == vars.getObject("{key}")) return
+vars.putObject("{key}", vars.getIteration())
+long now = System.currentTimeMillis()
+counters.compareAndSet(2, 0L, now)
+long arrival = counters.incrementAndGet(0)
+double[][] segments = {segments}
+def due = { double n ->
+    for (segment in segments) {
+        double duration = segment[1]
+        double first = segment[2]
+        double last = segment[3]
+        double count = (first + last) / 2 * duration
+        if (n <= count) {
+            double a = (last - first) / (2 * duration)
+            return segment[0] + (Math.abs(a) < 1e-9 ? n / first : (Math.sqrt(first * first + 4 * a * n) - first) / (2 * a))
+        }
+        n -= count
+    }
+    return Double.MAX_VALUE
+}
+// the first arrival starts the schedule, the time of the others is relative to it
+if (now - counters.get(2) > (due(arrival) - due(1)) * 1000 + {tolerance}) counters.incrementAndGet(1)
+"""
+
+    # an arrival started later than this after its time in the schedule is counted as late
+    late_tolerance_milliseconds = 10
+
+    def __init__(
+        self,
+        *children: ThreadGroupChildElement,
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
+    ) -> None:
+        self.arrival_stats: Optional[ArrivalStats] = None
+        self._counters = None
+        super().__init__(*children, warmup_seconds=warmup_seconds, warmup_iterations=warmup_iterations)
+
+    def _rps_thread_group(self, name: str, stages: List[Stage], max_threads: int):
+        if max_threads < 1 or any(stage.target < 0 for stage in stages):
+            raise ValueError("rps can't be negative and max_threads must be positive")
+        if not stages:
+            raise ValueError("At least one stage is required")
+        self.stages = stages
+        self._key = f"pymeter.arrivals.{uuid.uuid4().hex}"
+        java_thread_group = (
+            BaseConfigElement.jmeter_class.rpsThreadGroup(name)
+            .maxThreads(max_threads)
+            .counting(BaseArrivalRateThreadGroup.java_event_type.ITERATIONS)
+        )
+        for stage in stages:
+            java_thread_group.rampTo(float(stage.target), _java_duration(stage.rampup_time_seconds))
+            if stage.holdup_time_seconds:
+                java_thread_group.holdFor(_java_duration(stage.holdup_time_seconds))
+        java_thread_group.children(
+            BaseConfigElement.jmeter_class.jsr223PreProcessor(
+                BaseArrivalRateThreadGroup.script_template.replace("{key}", self._key)
+                .replace("{segments}", self._schedule_segments())
+                .replace("{tolerance}", str(BaseArrivalRateThreadGroup.late_tolerance_milliseconds))
+            )
+        )
+        return java_thread_group
+
+    def _schedule_segments(self) -> str:
+        """returns the ramps and holds of the stages as a groovy array, see `script_template`"""
+        segments, start, rate = [], 0.0, 0.0
+        for stage in self.stages:
+            for duration, target in ((stage.rampup_time_seconds, stage.target), (stage.holdup_time_seconds, stage.target)):
+                if duration > 0:
+                    segments.append(f"[{start!r}, {float(duration)!r}, {float(rate)!r}, {float(target)!r}]")
+                    start += duration
+                rate = target
+        return f"[{', '.join(segments)}] as double[][]"
+
+    def scheduled_arrivals(self, elapsed_seconds: float) -> float:
+        """returns the number of iterations the schedule asks for in the first `elapsed_seconds` of the test"""
+        scheduled, rate, remaining = 0.0, 0.0, elapsed_seconds
+        for stage in self.stages:
+            ramp = min(remaining, stage.rampup_time_seconds)
+            if ramp > 0:
+                reached = rate + (stage.target - rate) * ramp / stage.rampup_time_seconds
+                scheduled += (rate + reached) * ramp / 2
+            hold = min(max(0.0, remaining - stage.rampup_time_seconds), stage.holdup_time_seconds)
+            scheduled += stage.target * hold
+            remaining -= stage.rampup_time_seconds + stage.holdup_time_seconds
+            rate = stage.target
+            if remaining <= 0:
+                break
+        return scheduled
+
+    def test_started(self):
+        super().test_started()
+        self.arrival_stats = None
+        self._counters = BaseArrivalRateThreadGroup.java_atomic_long_array(3)
+        BaseArrivalRateThreadGroup.java_system.getProperties().put(self._key, self._counters)
+
+    def test_ended(self):
+        super().test_ended()
+        if self._counters is None:
+            # the test ended before this thread group started
+            return
+        BaseArrivalRateThreadGroup.java_system.getProperties().remove(self._key)
+        first_arrival = self._counters.get(2)
+        elapsed_seconds = time.time() - first_arrival / 1000 if first_arrival else 0.0
+        self.arrival_stats = ArrivalStats(
+            int(self.scheduled_arrivals(elapsed_seconds)), self._counters.get(0), self._counters.get(1)
+        )
+
+    @classmethod
+    def _shard_max_threads(cls, node: ElementNode, index: int, count: int) -> int:
+        return max(1, split_count(node.bind().arguments["max_threads"], index, count))
+
+
+class ArrivalRateThreadGroup(BaseArrivalRateThreadGroup):
+    """
+    Thread group that starts iterations at a target rate (open model), instead of keeping a number of threads busy.
+
+    The rate is linearly ramped up from 0 to `rps` iterations per second, then held.
+    """
+
+    rps_argument = "rps"
+
+    def __init__(
+        self,
+        rps: float,
+        rampup_time_seconds: float,
+        holdup_time_seconds: float,
+        max_threads: int,
+        *children: ThreadGroupChildElement,
+        name: str = "Thread Group",
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            rps (float): target number of iterations started per second
+
+            rampup_time_seconds (float): time to ramp up from 0 to `rps`
+
+            holdup_time_seconds (float): time to hold `rps` once it is reached
+
+            max_threads (int): maximal number of threads
+
+            name (str): name of the thread group
+
+            warmup_seconds (Optional[float]): samples started during this time from the start of the test
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+        """
+        self._arrival_rate_thread_group_instance = self._rps_thread_group(
+            name, [Stage(rps, rampup_time_seconds, holdup_time_seconds)], max_threads
+        )
+        super().__init__(*children, warmup_seconds=warmup_seconds, warmup_iterations=warmup_iterations)
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        return super().shard(
+            node.replace(
+                rps=node.bind().arguments["rps"] / count,
+                max_threads=cls._shard_max_threads(node, index, count),
+            ),
+            index,
+            count,
+            directory,
+        )
+
+
+class ArrivalRateStages(BaseArrivalRateThreadGroup):
+    """
+    Arrival rate thread group following a multi stage load profile.
+
+    Each stage ramps the rate from the rate of the previous stage (0 for the first one), then holds it.
+    Stats of each stage are reported by `stage_stats()`.
+    """
+
+    def __init__(
+        self,
+        stages: List[Tuple[float, float, float]],
+        max_threads: int,
+        *children: ThreadGroupChildElement,
+        name: str = "Thread Group",
+        warmup_seconds: Optional[float] = None,
+        warmup_iterations: Optional[int] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            stages (List[Tuple[float, float, float]]): iterations per second, ramp up time and hold time in seconds of each stage
+
+            max_threads (int): maximal number of threads
+
+            name (str): name of the thread group
+
+            warmup_seconds (Optional[float]): samples started during this time from the start of the test
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread
+            are reported by `TestPlanStats.warmup` instead of the headline numbers
+        """
+        self._arrival_rate_stages_instance = self._rps_thread_group(
+            name, [Stage(*stage) for stage in stages], max_threads
+        )
+        self._stage_stats_collector = StageStatsCollector(_stage_end_offsets_milliseconds(self.stages))
+        self._arrival_rate_stages_instance.children(
+            BaseConfigElement.jmeter_class.jsr223PostProcessor(self._stage_stats_collector.script)
+        )
+        super().__init__(*children, warmup_seconds=warmup_seconds, warmup_iterations=warmup_iterations)
+
+    def stage_stats(self) -> List[SampleStats]:
+        """returns the stats of the samples of each stage, may be called while the test is running"""
+        return self._stage_stats_collector.collect()
+
+    def test_started(self):
+        super().test_started()
+        self._stage_stats_collector.test_started()
+
+    def test_ended(self):
+        super().test_ended()
+        self._stage_stats_collector.test_ended()
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        return super().shard(
+            node.replace(
+                stages=[
+                    (stage.target / count, *stage[1:])
+                    for stage in (Stage(*stage) for stage in node.bind().arguments["stages"])
+                ],
+                max_threads=cls._shard_max_threads(node, index, count),
+            ),
+            index,
+            count,
+            directory,
+        )
@@ -0,0 +1,486 @@
+"""
+The distributed module runs a test plan on several load generator machines.
+
+Each machine runs a worker, started from the command line:
+
+      .. code-block:: bash
+
+            PYMETER_WORKER_TOKEN=<secret> pymeter worker --host 0.0.0.0 --port 7600
+
+A coordinator splits the test plan between the workers the same way `TestPlan.run(workers=N)` does
+(read more in the `workers <workers.html>`_ page), ships each worker its shard over TCP, and starts all of them
+at the same wall clock time. While the test is running, workers stream the stats of the samples they executed
+since their previous update, and the coordinator merges them as they arrive.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.distributed import Coordinator
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            thread_group = ThreadGroupWithRampUpAndHold(300, 10, 60, http_sampler)
+            test_plan = TestPlan(thread_group)
+
+            coordinator = Coordinator(
+                [("generator-1", 7600), ("generator-2", 7600), ("generator-3", 7600)], token="<secret>"
+            )
+            stats = coordinator.run(
+                test_plan, on_update=lambda live: print(live.overall.throughput_per_second)
+            )
+
+.. note::
+    The start of the workers is synchronized with their wall clocks, which are assumed to be synchronized (e.g. by NTP).
+
+.. note::
+    Workers listen on localhost by default. A worker listening on another address requires a token, and only runs
+    plans sent with the same token. Plans are made of pymeter elements only, any other class is rejected
+    before anything is built.
+
+Protocol
+-------------
+Messages are JSON objects, each one prefixed by its length as a 4 bytes big endian integer.
+
+* coordinator → worker: `{"type": "plan", "token": ..., "plan": ...}` the shard of the test plan
+* worker → coordinator: `{"type": "ready"}` once the plan is built, and the JVM is up
+* coordinator → worker: `{"type": "start", "start_at": epoch_seconds, "interval": seconds}`
+* worker → coordinator: `{"type": "delta", "stats": ...}` every `interval` seconds while the test is running
+* coordinator → worker: `{"type": "stop"}` or `{"type": "cancel"}` to stop the test early
+* worker → coordinator: `{"type": "done", "duration": milliseconds}` after the last delta
+* worker → coordinator: `{"type": "error", "message": ...}` when anything goes wrong
+"""
+import concurrent.futures
+import hmac
+import importlib
+import inspect
+import ipaddress
+import json
+import os
+import re
+import selectors
+import socket
+import struct
+import tempfile
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymeter.api import BaseJMeterClass, ContentType, ElementNode
+from pymeter.api.stats import MAIN, SampleStats
+from pymeter.api.workers import WorkerError, merge_results
+
+DEFAULT_PORT = 7600
+HEADER = struct.Struct(">I")
+ELEMENT_MODULE = re.compile(r"^pymeter\.api(\.[a-z_][a-z0-9_]*)*$")
+
+
+class ProtocolError(Exception):
+    """exception raised when a peer sends an unexpected message"""
+
+
+def send_message(connection: socket.socket, message: dict):
+    """sends a single message"""
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    connection.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = connection.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def receive_message(connection: socket.socket) -> Optional[dict]:
+    """receives a single message, returns None when the peer has closed the connection"""
+    header = _receive_exactly(connection, HEADER.size)
+    if header is None:
+        return None
+    payload = _receive_exactly(connection, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def encode_node(node: ElementNode) -> dict:
+    """
+    encodes a node as JSON compatible data, content of files read by elements (e.g - csv data sets) is embedded
+    """
+    file_arguments = node.element_type().file_arguments
+    if file_arguments:
+        arguments = node.bind().arguments
+        node = node.replace(
+            **{name: _EmbeddedFile(arguments[name]) for name in file_arguments if name in arguments}
+        )
+    return {
+        "element": node.element_class,
+        "args": [_encode_value(a) for a in node.args],
+        "kwargs": {k: _encode_value(v) for k, v in node.kwargs.items()},
+        "calls": [
+            [name, [_encode_value(a) for a in args], {k: _encode_value(v) for k, v in kwargs.items()}]
+            for name, args, kwargs in node.calls
+        ],
+    }
+
+
+def element_type(element_class: str) -> type:
+    """
+    returns the class of a pymeter element from the name held by its node,
+    names of anything else than an element class of the `pymeter.api` modules are rejected
+    """
+    module_name, _, qualified_name = element_class.partition(":")
+    if not ELEMENT_MODULE.match(module_name) or not qualified_name:
+        raise ProtocolError(f"Unexpected element {element_class}")
+    try:
+        result = importlib.import_module(module_name)
+    except ImportError as import_error:
+        raise ProtocolError(f"Unexpected element {element_class}") from import_error
+    for name in qualified_name.split("."):
+        result = getattr(result, name, None) if name.isidentifier() and not name.startswith("_") else None
+        if not inspect.isclass(result):
+            raise ProtocolError(f"Unexpected element {element_class}")
+    if not issubclass(result, BaseJMeterClass):
+        raise ProtocolError(f"Unexpected element {element_class}")
+    return result
+
+
+def decode_node(data: dict, directory: str) -> ElementNode:
+    """
+    decodes a node encoded by `encode_node`, embedded files are written to `directory`.
+    Only pymeter elements, and calls to their recorded methods, are accepted.
+    """
+    decoded_type = element_type(data["element"])
+    for name, _, _ in data["calls"]:
+        if not isinstance(name, str) or not getattr(getattr(decoded_type, name, None), "records_calls", False):
+            raise ProtocolError(f"Unexpected call {name} on {data['element']}")
+    return ElementNode(
+        data["element"],
+        tuple(_decode_value(a, directory) for a in data["args"]),
+        {k: _decode_value(v, directory) for k, v in data["kwargs"].items()},
+        [
+            (
+                name,
+                tuple(_decode_value(a, directory) for a in args),
+                {k: _decode_value(v, directory) for k, v in kwargs.items()},
+            )
+            for name, args, kwargs in data["calls"]
+        ],
+    )
+
+
+class _EmbeddedFile:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+
+def _encode_value(value):
+    if isinstance(value, ElementNode):
+        return {"node": encode_node(value)}
+    if isinstance(value, ContentType):
+        return {"content_type": value.name}
+    if isinstance(value, _EmbeddedFile):
+        with open(value.path, encoding="utf-8") as embedded_file:
+            return {"file": {"name": os.path.basename(value.path), "content": embedded_file.read()}}
+    if isinstance(value, dict):
+        return {"dict": value}
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Can't send a value of type {type(value)} to a worker")
+
+
+def _decode_value(value, directory: str):
+    if isinstance(value, list):
+        return [_decode_value(v, directory) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "node" in value:
+        return decode_node(value["node"], directory)
+    if "content_type" in value:
+        return ContentType[value["content_type"]]
+    if "file" in value:
+        path = os.path.join(directory, f"{len(os.listdir(directory))}-{os.path.basename(value['file']['name'])}")
+        with open(path, "w", encoding="utf-8") as embedded_file:
+            embedded_file.write(value["file"]["content"])
+        return path
+    return value["dict"]
+
+
+def encode_stats(collected: Dict[Tuple[str, str, str], SampleStats]) -> list:
+    """encodes stats keyed by thread group kind, thread group name and label as JSON compatible data"""
+    return [
+        [
+            list(key),
+            [
+                stats.count,
+                stats.errors,
+                stats.received_bytes,
+                stats.sent_bytes,
+                stats.sample_time_sum_milliseconds,
+                stats.first_timestamp_milliseconds,
+                stats.last_timestamp_milliseconds,
+                stats.latency_sum_milliseconds,
+                stats.connect_time_sum_milliseconds,
+                stats.connections,
+                [item for pair in stats.histogram.items() for item in pair],
+            ],
+        ]
+        for key, stats in collected.items()
+    ]
+
+
+def decode_stats(data: list) -> Dict[Tuple[str, str, str], SampleStats]:
+    """decodes stats encoded by `encode_stats`"""
+    collected = {}
+    for key, values in data:
+        *counters, connections, histogram = values
+        collected[tuple(key)] = SampleStats(
+            *counters, histogram=dict(zip(histogram[::2], histogram[1::2])), connections=connections
+        )
+    return collected
+
+
+class Worker:
+    """
+    Executes the shards of test plans sent by a coordinator, one at a time.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, token: Optional[str] = None) -> None:
+        """
+
+        Args:
+
+            host (str): address to listen on
+
+            port (int): port to listen on, 0 picks a free port
+
+            token (Optional[str]): secret the coordinators must send, required unless the worker listens on localhost
+        """
+        if not token and not _is_loopback(host):
+            raise ValueError("A token is required for a worker that doesn't listen on localhost")
+        self.token = token or ""
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+    def serve_forever(self):
+        """accepts coordinators until the process is killed"""
+        while True:
+            connection, _ = self._server.accept()
+            with connection:
+                try:
+                    self.handle(connection)
+                except (OSError, ProtocolError):
+                    traceback.print_exc()
+
+    def close(self):
+        """stops accepting coordinators"""
+        self._server.close()
+
+    def handle(self, connection: socket.socket):
+        """runs a single test plan shard for the coordinator on the other end of the connection"""
+        with tempfile.TemporaryDirectory(prefix="pymeter-worker-") as directory:
+            try:
+                message = self._expect(connection, "plan")
+                if not hmac.compare_digest(str(message.get("token") or "").encode(), self.token.encode()):
+                    send_message(connection, {"type": "error", "message": "wrong token"})
+                    raise ProtocolError("The coordinator sent a wrong token")
+                test_plan = decode_node(message["plan"], directory).build()
+                # lowered before the worker is ready, so that the JVM boots before the start time
+                test_plan.lower()
+                send_message(connection, {"type": "ready"})
+                message = self._expect(connection, "start")
+                time.sleep(max(0.0, message["start_at"] - time.time()))
+                self._run(connection, test_plan, message["interval"])
+            except (OSError, ProtocolError):
+                raise
+            except Exception:  # pylint: disable=broad-except
+                send_message(connection, {"type": "error", "message": traceback.format_exc()})
+
+    @staticmethod
+    def _expect(connection: socket.socket, message_type: str) -> dict:
+        message = receive_message(connection)
+        if message is None or message["type"] != message_type:
+            raise ProtocolError(f"Expected a `{message_type}` message, got {message}")
+        return message
+
+    @staticmethod
+    def _run(connection: socket.socket, test_plan, interval: float):
+        test_run = test_plan.start()
+        sent: Dict[Tuple[str, str, str], SampleStats] = {}
+
+        def send_delta():
+            collected = test_plan.live_stats().collected
+            delta = {
+                key: stats.subtract(sent[key]) if key in sent else stats
+                for key, stats in collected.items()
+            }
+            delta = {key: stats for key, stats in delta.items() if stats.count}
+            if delta:
+                send_message(connection, {"type": "delta", "stats": encode_stats(delta)})
+            sent.update(collected)
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(connection, selectors.EVENT_READ)
+            while not test_run.done():
+                if selector.select(interval):
+                    message = receive_message(connection)
+                    if message is None:
+                        # the coordinator is gone, the results have nobody to be sent to anymore
+                        test_run.cancel()
+                        concurrent.futures.wait([test_run.future])
+                        return
+                    if message["type"] == "cancel":
+                        test_run.cancel()
+                    elif message["type"] == "stop":
+                        test_run.stop()
+                send_delta()
+        stats = test_run.wait()
+        send_delta()
+        send_message(connection, {"type": "done", "duration": stats.snapshot().duration_milliseconds})
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class Coordinator:
+    """
+    Splits a test plan between remote workers, starts them together and merges their results.
+    """
+
+    def __init__(
+        self,
+        workers: List[Tuple[str, int]],
+        start_delay_seconds: float = 2.0,
+        update_interval_seconds: float = 1.0,
+        connect_timeout_seconds: float = 10.0,
+        token: Optional[str] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            workers (List[Tuple[str, int]]): host and port of each worker
+
+            start_delay_seconds (float): time between the moment all workers are ready and the start of the test,
+            gives the start message time to reach all workers
+
+            update_interval_seconds (float): time between two updates sent by each worker
+
+            connect_timeout_seconds (float): timeout for connecting to a worker
+
+            token (Optional[str]): secret the workers were started with
+        """
+        if not workers:
+            raise ValueError("At least one worker is required")
+        self.workers = list(workers)
+        self.start_delay_seconds = start_delay_seconds
+        self.update_interval_seconds = update_interval_seconds
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self.token = token
+        self._connections: List[socket.socket] = []
+        self._lock = threading.Lock()
+
+    def stop(self, cancel: bool = False):
+        """stops the test on all workers, immediately if `cancel` is set"""
+        with self._lock:
+            for connection in self._connections:
+                try:
+                    send_message(connection, {"type": "cancel" if cancel else "stop"})
+                except OSError:
+                    pass
+
+    def run(self, test_plan, on_update: Optional[Callable] = None):
+        """
+        runs the test plan on all the workers
+
+        Args:
+
+            test_plan (TestPlan): the test plan to run
+
+            on_update (Optional[Callable]): called with the merged `TestPlanStats` each time a worker sends an update
+
+        Returns:
+
+            TestPlan.TestPlanStats: the merged stats of all the workers
+        """
+        from pymeter.api.config import TestPlan  # pylint: disable=import-outside-toplevel
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="pymeter-coordinator-") as directory:
+                for index, address in enumerate(self.workers):
+                    connection = socket.create_connection(address, self.connect_timeout_seconds)
+                    connection.settimeout(None)
+                    with self._lock:
+                        self._connections.append(connection)
+                    shard = test_plan.node.shard(index, len(self.workers), directory)
+                    send_message(connection, {"type": "plan", "token": self.token, "plan": encode_node(shard)})
+            for index, connection in enumerate(self._connections):
+                self._expect(connection, index, "ready")
+            start_at = time.time() + self.start_delay_seconds
+            for connection in self._connections:
+                send_message(
+                    connection,
+                    {"type": "start", "start_at": start_at, "interval": self.update_interval_seconds},
+                )
+            merged: Dict[Tuple[str, str, str], SampleStats] = {}
+            durations = self._collect(merged, on_update)
+        finally:
+            with self._lock:
+                for connection in self._connections:
+                    connection.close()
+                self._connections = []
+        return TestPlan.TestPlanStats(None, merged, max(durations))
+
+    def _receive(self, connection: socket.socket, index: int) -> dict:
+        message = receive_message(connection)
+        if message is None:
+            raise WorkerError(f"worker {self.workers[index]} closed the connection")
+        if message["type"] == "error":
+            raise WorkerError(f"worker {self.workers[index]} failed:\n{message['message']}")
+        return message
+
+    def _expect(self, connection: socket.socket, index: int, message_type: str) -> dict:
+        message = self._receive(connection, index)
+        if message["type"] != message_type:
+            raise ProtocolError(f"Expected a `{message_type}` message, got {message}")
+        return message
+
+    def _collect(self, merged: Dict[Tuple[str, str, str], SampleStats], on_update: Optional[Callable]) -> List[float]:
+        from pymeter.api.config import TestPlan  # pylint: disable=import-outside-toplevel
+
+        durations = []
+        with selectors.DefaultSelector() as selector:
+            for index, connection in enumerate(self._connections):
+                selector.register(connection, selectors.EVENT_READ, index)
+            while len(durations) < len(self._connections):
+                for key, _ in selector.select():
+                    message = self._receive(key.fileobj, key.data)
+                    if message["type"] == "done":
+                        durations.append(message["duration"])
+                        selector.unregister(key.fileobj)
+                    elif message["type"] == "delta":
+                        _, updated = merge_results([(0.0, merged), (0.0, decode_stats(message["stats"]))])
+                        merged.update(updated)
+                        if on_update is not None:
+                            overall = SampleStats.combine(
+                                stats for (kind, _, _), stats in merged.items() if kind == MAIN
+                            )
+                            on_update(TestPlan.TestPlanStats(None, dict(merged), overall.duration_milliseconds))
+                    else:
+                        raise ProtocolError(f"Unexpected message {message}")
+        return durations
@@ -0,0 +1,468 @@
+"""
+The hdr module holds latency histograms that can be merged and subtracted without losing percentile accuracy,
+to combine the results of several runs, workers or time windows. Averaging percentiles is wrong, merging histograms isn't.
+
+`HdrHistogram` uses the bucket layout of `HdrHistogram <https://hdrhistogram.github.io/HdrHistogram/>`_:
+values are exact up to `2 * 10 ** significant_figures`, and above, each power of two is split in the same number
+of buckets, so the relative error of a value never exceeds `10 ** -significant_figures`.
+Counts are kept in a flat array, merges, subtractions and percentile queries work on the whole array at once.
+
+Histograms are encoded with the compressed encoding of HdrHistogram, and written to and read from the standard
+interval log format, so logs can be processed by the HdrHistogram tools, e.g - HistogramLogAnalyzer.
+Sample times are in milliseconds.
+
+example - 1:
+--------------
+Histograms of the samples of a test, keyed the same way as `TestPlanStats.collected`, are merged across runs.
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupSimple
+            from pymeter.api.samplers import HttpSampler
+
+            test_plan = TestPlan(ThreadGroupSimple(10, 100, HttpSampler("echo", "https://postman-echo.com/get")), breakdown=True)
+            first, second = test_plan.run(), test_plan.run()
+
+            overall = first.hdr_histogram()
+            overall.add(second.hdr_histogram())
+            print(overall.percentiles([50, 90, 99, 99.9]))
+
+example - 2:
+--------------
+Stats are saved as an interval log, with one histogram per thread group and label, and loaded back.
+
+      .. code-block:: python
+
+            first.write_hdr_log("run-1.hlog")
+            loaded = TestPlan.TestPlanStats.from_hdr_log("run-1.hlog")
+            print(loaded.by_label()["echo"].sample_time_99_percentile_milliseconds)
+"""
+import base64
+import bisect
+import itertools
+import math
+import operator
+import struct
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, TextIO
+
+ENCODING_COOKIE = 0x1C849303 | 0x10
+COMPRESSED_ENCODING_COOKIE = 0x1C849304 | 0x10
+# cookie, payload length, normalizing index offset, significant figures, lowest and highest trackable values,
+# and integer to double conversion ratio
+HEADER = struct.Struct(">iiiiqqd")
+COMPRESSED_HEADER = struct.Struct(">ii")
+
+LOG_FORMAT_VERSION = "1.3"
+LOG_LEGEND = '"StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"'
+
+
+class HdrHistogram:
+    """
+    histogram of integer values in log-linear buckets
+    """
+
+    def __init__(
+        self,
+        lowest_discernible_value: int = 1,
+        highest_trackable_value: int = 3_600_000,
+        significant_figures: int = 3,
+    ) -> None:
+        """
+
+        Args:
+
+            lowest_discernible_value (int): smallest value distinguished from 0
+
+            highest_trackable_value (int): highest value that can be recorded, 1 hour in milliseconds by default
+
+            significant_figures (int): number of significant decimal figures kept from each value, from 1 to 5
+        """
+        if lowest_discernible_value < 1:
+            raise ValueError("lowest_discernible_value must be positive")
+        if highest_trackable_value < 2 * lowest_discernible_value:
+            raise ValueError("highest_trackable_value must be at least twice lowest_discernible_value")
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.lowest_discernible_value = lowest_discernible_value
+        self.highest_trackable_value = highest_trackable_value
+        self.significant_figures = significant_figures
+        # name and time range of the interval the histogram covers, used by interval logs
+        self.tag: Optional[str] = None
+        self.start_timestamp_milliseconds: Optional[int] = None
+        self.end_timestamp_milliseconds: Optional[int] = None
+
+        self._unit_magnitude = lowest_discernible_value.bit_length() - 1
+        sub_bucket_count_magnitude = math.ceil(math.log2(2 * 10**significant_figures))
+        self._sub_bucket_half_count_magnitude = max(sub_bucket_count_magnitude, 1) - 1
+        self._sub_bucket_count = 1 << (self._sub_bucket_half_count_magnitude + 1)
+        self._sub_bucket_half_count = self._sub_bucket_count // 2
+        self._sub_bucket_mask = (self._sub_bucket_count - 1) << self._unit_magnitude
+        smallest_untrackable_value = self._sub_bucket_count << self._unit_magnitude
+        bucket_count = 1
+        while smallest_untrackable_value <= highest_trackable_value:
+            smallest_untrackable_value <<= 1
+            bucket_count += 1
+        self._counts = array("q", bytes(8 * (bucket_count + 1) * self._sub_bucket_half_count))
+
+    @property
+    def total_count(self) -> int:
+        """returns the number of recorded values"""
+        return sum(self._counts)
+
+    def _same_layout(self, other: "HdrHistogram") -> bool:
+        return (
+            self.lowest_discernible_value == other.lowest_discernible_value
+            and self.significant_figures == other.significant_figures
+            and len(self._counts) == len(other._counts)
+        )
+
+    def _bucket_indexes(self, value: int):
+        bucket_index = max(
+            0, (value | self._sub_bucket_mask).bit_length() - self._unit_magnitude - self._sub_bucket_half_count_magnitude - 1
+        )
+        return bucket_index, value >> (bucket_index + self._unit_magnitude)
+
+    def _index(self, value: int) -> int:
+        bucket_index, sub_bucket_index = self._bucket_indexes(value)
+        return ((bucket_index + 1) << self._sub_bucket_half_count_magnitude) + sub_bucket_index - self._sub_bucket_half_count
+
+    def _value_at(self, index: int) -> int:
+        bucket_index = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self._sub_bucket_half_count
+            bucket_index = 0
+        return sub_bucket_index << (bucket_index + self._unit_magnitude)
+
+    def lowest_equivalent_value(self, value: int) -> int:
+        """returns the smallest value counted in the same bucket as `value`"""
+        bucket_index, sub_bucket_index = self._bucket_indexes(value)
+        return sub_bucket_index << (bucket_index + self._unit_magnitude)
+
+    def highest_equivalent_value(self, value: int) -> int:
+        """returns the largest value counted in the same bucket as `value`"""
+        bucket_index, sub_bucket_index = self._bucket_indexes(value)
+        if sub_bucket_index >= self._sub_bucket_count:
+            bucket_index += 1
+        return self.lowest_equivalent_value(value) + (1 << (self._unit_magnitude + bucket_index)) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        """
+        records a value
+
+        Args:
+
+            value (int): the value, from 0 to `highest_trackable_value`
+
+            count (int): number of times the value is recorded
+        """
+        if value < 0 or value > self.highest_trackable_value:
+            raise ValueError(f"{value} is out of the range of the histogram, 0 to {self.highest_trackable_value}")
+        self._counts[self._index(value)] += count
+
+    @classmethod
+    def from_dict(cls, histogram: Dict[int, int], significant_figures: int = 3) -> "HdrHistogram":
+        """
+        creates a histogram from the number of samples of each value, e.g - `SampleStats.histogram`
+
+        Args:
+
+            histogram (Dict[int, int]): number of samples for each value
+
+            significant_figures (int): number of significant decimal figures kept from each value
+        """
+        result = cls(highest_trackable_value=max(3_600_000, max(histogram, default=0)), significant_figures=significant_figures)
+        for value, count in histogram.items():
+            result.record(value, count)
+        return result
+
+    def to_dict(self) -> Dict[int, int]:
+        """returns the number of values of each bucket, keyed by the highest value of the bucket"""
+        return {
+            self.highest_equivalent_value(self._value_at(index)): count
+            for index, count in enumerate(self._counts)
+            if count
+        }
+
+    def copy(self) -> "HdrHistogram":
+        """returns a copy of the histogram"""
+        result = HdrHistogram(self.lowest_discernible_value, self.highest_trackable_value, self.significant_figures)
+        result._counts = array("q", self._counts)
+        result.tag = self.tag
+        result.start_timestamp_milliseconds = self.start_timestamp_milliseconds
+        result.end_timestamp_milliseconds = self.end_timestamp_milliseconds
+        return result
+
+    def add(self, other: "HdrHistogram") -> "HdrHistogram":
+        """adds the values of another histogram to this one, time ranges are merged, returns this histogram"""
+        if self._same_layout(other):
+            self._counts = array("q", map(operator.add, self._counts, other._counts))
+        else:
+            for index, count in enumerate(other._counts):
+                if count:
+                    self.record(other._value_at(index), count)
+        self.start_timestamp_milliseconds = _merged_timestamp(
+            min, self.start_timestamp_milliseconds, other.start_timestamp_milliseconds
+        )
+        self.end_timestamp_milliseconds = _merged_timestamp(
+            max, self.end_timestamp_milliseconds, other.end_timestamp_milliseconds
+        )
+        return self
+
+    def subtract(self, other: "HdrHistogram") -> "HdrHistogram":
+        """
+        removes the values of another histogram from this one, returns this histogram.
+
+        Subtracting an earlier cumulative histogram from a later one gives the histogram of the values in between.
+        """
+        if self._same_layout(other):
+            counts = array("q", map(operator.sub, self._counts, other._counts))
+        else:
+            counts = array("q", self._counts)
+            for index, count in enumerate(other._counts):
+                if count:
+                    value = other._value_at(index)
+                    if value > self.highest_trackable_value:
+                        raise ValueError("Can't subtract values the histogram doesn't hold")
+                    counts[self._index(value)] -= count
+        if min(counts, default=0) < 0:
+            raise ValueError("Can't subtract values the histogram doesn't hold")
+        self._counts = counts
+        return self
+
+    def percentiles(self, percents: Iterable[float]) -> List[int]:
+        """
+        returns several percentiles at once, in a single pass over the counts
+
+        Args:
+
+            percents (Iterable[float]): percents from 0 to 100
+        """
+        cumulated = list(itertools.accumulate(self._counts))
+        total = cumulated[-1] if cumulated else 0
+        results = []
+        for percent in percents:
+            if not 0 <= percent <= 100:
+                raise ValueError("percent must be between 0 and 100")
+            if not total:
+                results.append(0)
+                continue
+            rank = max(1, math.ceil(percent / 100 * total))
+            results.append(self.highest_equivalent_value(self._value_at(bisect.bisect_left(cumulated, rank))))
+        return results
+
+    def percentile(self, percent: float) -> int:
+        """returns the given percentile of the values, the same rank as `SampleStats.percentile` is used"""
+        return self.percentiles([percent])[0]
+
+    @property
+    def min(self) -> int:
+        """returns the lowest recorded value, 0 if no value was recorded"""
+        index = next((index for index, count in enumerate(self._counts) if count), None)
+        return 0 if index is None else self.lowest_equivalent_value(self._value_at(index))
+
+    @property
+    def max(self) -> int:
+        """returns the highest recorded value, 0 if no value was recorded"""
+        index = self._max_index()
+        return 0 if index is None else self.highest_equivalent_value(self._value_at(index))
+
+    @property
+    def mean(self) -> float:
+        """returns the mean of the values, each value counts as the middle of its bucket"""
+        total = self.total_count
+        if not total:
+            return 0.0
+        return self._sum() / total
+
+    def _sum(self) -> int:
+        """returns the sum of the values, each value counts as the middle of its bucket"""
+        total = 0
+        for index, count in enumerate(self._counts):
+            if count:
+                value = self._value_at(index)
+                total += count * ((self.lowest_equivalent_value(value) + self.highest_equivalent_value(value) + 1) // 2)
+        return total
+
+    def _max_index(self) -> Optional[int]:
+        return next((index for index in range(len(self._counts) - 1, -1, -1) if self._counts[index]), None)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, HdrHistogram) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(total_count={self.total_count}, min={self.min}, max={self.max}, "
+            f"significant_figures={self.significant_figures})"
+        )
+
+    def encode(self) -> str:
+        """returns the histogram in the base64 compressed encoding of HdrHistogram"""
+        payload = bytearray()
+        counts_limit = self._max_index()
+        index = 0
+        while counts_limit is not None and index <= counts_limit:
+            count = self._counts[index]
+            index += 1
+            if count == 0:
+                zeros = 1
+                while index <= counts_limit and self._counts[index] == 0:
+                    zeros += 1
+                    index += 1
+                if zeros > 1:
+                    count = -zeros
+            _put_zig_zag(payload, count)
+        encoded = (
+            HEADER.pack(
+                ENCODING_COOKIE,
+                len(payload),
+                0,
+                self.significant_figures,
+                self.lowest_discernible_value,
+                self.highest_trackable_value,
+                1.0,
+            )
+            + payload
+        )
+        compressed = zlib.compress(encoded)
+        return base64.b64encode(COMPRESSED_HEADER.pack(COMPRESSED_ENCODING_COOKIE, len(compressed)) + compressed).decode()
+
+    @classmethod
+    def decode(cls, text: str) -> "HdrHistogram":
+        """reads a histogram from the base64 compressed encoding of HdrHistogram, e.g - from an interval log"""
+        data = base64.b64decode(text)
+        cookie, length = COMPRESSED_HEADER.unpack_from(data)
+        if cookie & ~0xF0 != COMPRESSED_ENCODING_COOKIE & ~0xF0:
+            raise ValueError("Not a compressed HdrHistogram encoding")
+        encoded = zlib.decompress(data[COMPRESSED_HEADER.size : COMPRESSED_HEADER.size + length])
+        (
+            cookie,
+            payload_length,
+            _,
+            significant_figures,
+            lowest_discernible_value,
+            highest_trackable_value,
+            _,
+        ) = HEADER.unpack_from(encoded)
+        if cookie & ~0xF0 != ENCODING_COOKIE & ~0xF0:
+            raise ValueError("Unsupported HdrHistogram encoding, only the V2 encoding is read")
+        result = cls(lowest_discernible_value, max(highest_trackable_value, 2 * lowest_discernible_value), significant_figures)
+        position, end, index = HEADER.size, HEADER.size + payload_length, 0
+        while position < end:
+            count, position = _get_zig_zag(encoded, position)
+            if count < 0:
+                index -= count
+            else:
+                result._counts[index] = count
+                index += 1
+        return result
+
+
+def _merged_timestamp(choose, first: Optional[int], second: Optional[int]) -> Optional[int]:
+    if first is None or second is None:
+        return first if second is None else second
+    return choose(first, second)
+
+
+def _put_zig_zag(buffer: bytearray, value: int):
+    """appends a 64 bits value as zig-zag LEB128, the 9th byte holds 8 bits like HdrHistogram does"""
+    value = ((value << 1) ^ (value >> 63)) & 0xFFFFFFFFFFFFFFFF
+    for _ in range(8):
+        if value < 0x80:
+            buffer.append(value)
+            return
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _get_zig_zag(data: bytes, position: int):
+    value, shift = 0, 0
+    for _ in range(8):
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    else:
+        value |= data[position] << 56
+        position += 1
+    return (value >> 1) ^ -(value & 1), position
+
+
+def write_interval_log(
+    log_file: TextIO,
+    histograms: Iterable[HdrHistogram],
+    start_timestamp_milliseconds: Optional[int] = None,
+) -> None:
+    """
+    writes histograms in the HdrHistogram interval log format
+
+    Args:
+
+        log_file (TextIO): the text file written to
+
+        histograms (Iterable[HdrHistogram]): the histograms, their time ranges are the intervals of the log
+
+        start_timestamp_milliseconds (Optional[int]): time the intervals are relative to,
+        the start of the earliest histogram by default
+    """
+    histograms = list(histograms)
+    if start_timestamp_milliseconds is None:
+        starts = [h.start_timestamp_milliseconds for h in histograms if h.start_timestamp_milliseconds is not None]
+        start_timestamp_milliseconds = min(starts) if starts else int(time.time() * 1000)
+    start_seconds = start_timestamp_milliseconds / 1000
+    log_file.write(f"#[Histogram log format version {LOG_FORMAT_VERSION}]\n")
+    log_file.write(
+        f"#[StartTime: {start_seconds:.3f} (seconds since epoch), "
+        f"{time.strftime('%a %b %d %H:%M:%S %Z %Y', time.localtime(start_seconds))}]\n"
+    )
+    log_file.write(f"#[BaseTime: {start_seconds:.3f} (seconds since epoch)]\n")
+    log_file.write(LOG_LEGEND + "\n")
+    for histogram in histograms:
+        start = histogram.start_timestamp_milliseconds
+        start = start_timestamp_milliseconds if start is None else start
+        end = histogram.end_timestamp_milliseconds
+        end = start if end is None else end
+        tag = f"Tag={histogram.tag}," if histogram.tag else ""
+        if histogram.tag and any(character in histogram.tag for character in ", \t\n"):
+            raise ValueError(f"Tags can't hold commas or white spaces: `{histogram.tag}`")
+        log_file.write(
+            f"{tag}{(start - start_timestamp_milliseconds) / 1000:.3f},{(end - start) / 1000:.3f},"
+            f"{histogram.max:.3f},{histogram.encode()}\n"
+        )
+
+
+def read_interval_log(log_file: TextIO) -> List[HdrHistogram]:
+    """
+    reads the histograms of a log in the HdrHistogram interval log format, with their tags and time ranges
+
+    Args:
+
+        log_file (TextIO): the text file read from
+    """
+    base_seconds = start_seconds = None
+    histograms = []
+    for line in log_file:
+        line = line.strip()
+        if line.startswith("#[StartTime: "):
+            start_seconds = float(line[len("#[StartTime: ") :].split()[0])
+        elif line.startswith("#[BaseTime: "):
+            base_seconds = float(line[len("#[BaseTime: ") :].split()[0])
+        elif line and not line.startswith("#") and not line.startswith('"'):
+            tag = None
+            if line.startswith("Tag="):
+                tag, line = line[len("Tag=") :].split(",", 1)
+            start, length, _, encoded = line.split(",")
+            histogram = HdrHistogram.decode(encoded)
+            histogram.tag = tag
+            # without a base time, interval timestamps are absolute when they are larger than a year
+            base = base_seconds if base_seconds is not None else 0.0 if float(start) > 365 * 24 * 3600 else start_seconds or 0.0
+            histogram.start_timestamp_milliseconds = round((base + float(start)) * 1000)
+            histogram.end_timestamp_milliseconds = round((base + float(start) + float(length)) * 1000)
+            histograms.append(histogram)
+    return histograms
@@ -0,0 +1,154 @@
+"""
+The jmx module saves test plans as JMX files, loads them back, and caches the JMX files of plans that didn't change.
+
+A JMX file is the format of JMeter itself, plans saved by `TestPlan.save_as_jmx()` can be opened in the JMeter GUI
+or run by plain JMeter on any load generator. `TestPlan.from_jmx()` loads a JMX file, saved by pymeter or by JMeter,
+into a test plan that runs like any other one, python elements may be appended to it.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupSimple
+            from pymeter.api.reporters import HtmlReporter
+            from pymeter.api.samplers import HttpSampler
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            TestPlan(ThreadGroupSimple(10, 5, http_sampler)).save_as_jmx("echo.jmx")
+
+            stats = TestPlan.from_jmx("echo.jmx", HtmlReporter()).run()
+
+example - 2:
+--------------
+With a cache directory, the java objects of a plan are built once and saved as a JMX file named after
+the content hash of the plan, later runs of an unchanged plan load the file instead of building them again.
+Worker processes share the directory, so identical shards are only built once.
+
+      .. code-block:: python
+
+            stats = test_plan.run(jmx_cache=".pymeter-cache")
+            stats = test_plan.run(workers=4, jmx_cache=".pymeter-cache")
+
+.. note::
+    Plans with elements sharing state with python, such as throughput timers, result listeners,
+    replays, arrival rate thread groups, stages and python samplers are always built, they are never cached.
+"""
+import hashlib
+import os
+import tempfile
+from enum import Enum
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional
+
+from pymeter.api import ElementNode, JavaBuilder
+from pymeter.api.config import TestPlan, TestPlanChildElement
+from pymeter.api.stats import StatsCollector
+
+
+class JmxTestPlan(TestPlan):
+    """
+    Test plan loaded from a JMX file, returned by `TestPlan.from_jmx()`.
+    """
+
+    file_arguments = ("jmx_file",)
+    # the loaded plan takes the place of the plan built by `TestPlan`
+    wrapped_instance_name = "test_plan"
+
+    java_test_plan = JavaBuilder("us.abstracta.jmeter.javadsl.core.DslTestPlan")
+
+    # pylint: disable-next=super-init-not-called
+    def __init__(self, jmx_file: str, *children: TestPlanChildElement, breakdown: bool = False) -> None:
+        """
+
+        Args:
+
+            jmx_file (str): path to the JMX file
+
+            children (TestPlanChildElement): elements appended to the loaded plan
+
+            breakdown (bool): collects the stats by thread group and label while the test is running
+        """
+        if not os.path.exists(jmx_file):
+            raise FileNotFoundError(f"Couldn't find file {jmx_file}")
+        self._test_plan_instance = JmxTestPlan.java_test_plan.fromJmx(jmx_file)
+        self._children = []
+        self._stats_collector = None
+        if breakdown:
+            self._stats_collector = StatsCollector()
+            self._children.append(self._stats_collector)
+            with open(jmx_file, encoding="utf-8", errors="replace") as jmx:
+                # plans saved by pymeter with a breakdown already hold the script aggregating the stats
+                aggregates_stats = StatsCollector.state_key in jmx.read()
+            if not aggregates_stats:
+                self._test_plan_instance.children(*self._stats_collector.java_wrapped_elements)
+        self.children(*children)
+        super(TestPlan, self).__init__()  # pylint: disable=bad-super-call
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        if count > 1:
+            raise ValueError("A test plan loaded from a JMX file can't be split between workers")
+        return node.replace(breakdown=True)
+
+
+def _stable(value) -> bool:
+    if isinstance(value, tuple):
+        return all(_stable(item) for item in value)
+    return value is None or isinstance(value, (bool, int, float, str, Enum))
+
+
+def _element_nodes(node: ElementNode):
+    yield node
+    for child_node in node.child_nodes():
+        yield from _element_nodes(child_node)
+
+
+def plan_digest(node: ElementNode) -> Optional[str]:
+    """
+    returns the content hash of a test plan node, or None if the plan can't be cached
+
+    Plans can't be cached when one of their elements shares state with python,
+    or when an argument has no representation that stays the same from one process to the next (a function for instance).
+    """
+    key = node.key()
+    if not _stable(key) or not all(
+        element_node.element_type().is_jmx_cacheable(element_node) for element_node in _element_nodes(node)
+    ):
+        return None
+    try:
+        pymeter_version = version("pymeter")
+    except PackageNotFoundError:
+        pymeter_version = ""
+    # the version is part of the digest as the java elements of a plan change between versions
+    return hashlib.sha256(repr((pymeter_version, key)).encode("utf-8")).hexdigest()
+
+
+def lower_cached(test_plan: TestPlan, directory: str):
+    """
+    returns the java test plan, loaded from the cached JMX file of the plan or built and saved to the cache
+
+    Args:
+
+        test_plan (TestPlan): the test plan
+
+        directory (str): the cache directory, created if needed
+    """
+    digest = plan_digest(test_plan.node)
+    if digest is None:
+        return test_plan.lower()
+    jmx_file = os.path.join(directory, f"{digest}.jmx")
+    if os.path.exists(jmx_file):
+        return JmxTestPlan.java_test_plan.get().fromJmx(jmx_file)
+    java_test_plan = test_plan.lower()
+    os.makedirs(directory, exist_ok=True)
+    # written aside and renamed, so other processes never load a partially written file
+    descriptor, partial_file = tempfile.mkstemp(suffix=".jmx.partial", dir=directory)
+    os.close(descriptor)
+    try:
+        java_test_plan.saveAsJmx(partial_file)
+        os.replace(partial_file, jmx_file)
+    finally:
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+    return java_test_plan
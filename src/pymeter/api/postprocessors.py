@@ -38,6 +38,8 @@ class JsonExtractor(BasePostProcessors):
     Read more about json path `here <https://support.smartbear.com/alertsite/docs/monitors/api/endpoint/jsonpath.html>`_
     """
 
+    needs_response_body = True
+
     def __init__(self, variable_name: str, jmes_path: str) -> None:
         self._json_extractor_instance = BasePostProcessors.jmeter_class.jsonExtractor(
             variable_name, jmes_path
@@ -0,0 +1,323 @@
+"""
+The replay module reproduces production traffic from access logs, with the original timing of the requests.
+
+The log is streamed line by line into a schedule file, so logs of several gigabytes are replayed with a constant memory.
+JMeter reads the schedule the same way, one row per iteration, and each request is sent at the time it was
+originally received, relative to the first request of the log, optionally sped up.
+
+Two log formats are supported:
+
+* `csv`: rows of `timestamp,method,url,body`, with a header line. Timestamps are epoch seconds or ISO 8601 dates,
+  and the optional body is the path of a file holding the request body, relative to the log file.
+* `combined`: the combined log format of Apache and Nginx, urls are resolved against `base_url`.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan
+            from pymeter.api.replay import ReplayThreadGroup
+
+            # replay a day of traffic in an hour, with up to 200 requests in flight
+            replay = ReplayThreadGroup(
+                "logs/access.log",
+                log_format="combined",
+                base_url="https://staging.example.com",
+                speed_up=24,
+                threads=200,
+            )
+            stats = TestPlan(replay).run()
+            print(replay.report())
+
+.. note::
+    Requests are only sent on time while there is a free thread, requests sent late are counted in `report()`.
+"""
+import csv
+import os
+import re
+import tempfile
+import uuid
+import weakref
+from datetime import datetime
+from typing import IO, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+from pymeter.api import ElementNode, JavaClass
+from pymeter.api.config import BaseConfigElement, BaseThreadGroup
+from pymeter.api.workers import shard_csv_file
+
+COMBINED_LOG_PATTERN = re.compile(
+    r'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*"'
+)
+COMBINED_LOG_TIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+
+
+class ReplayRecord(NamedTuple):
+    """a single request of an access log"""
+
+    timestamp_seconds: float
+    method: str
+    url: str
+    # path of a file holding the request body
+    body_file: Optional[str] = None
+
+
+class ReplayReport(NamedTuple):
+    """outcome of a replay"""
+
+    # requests in the schedule
+    scheduled: int
+    # requests that were sent
+    sent: int
+    # requests sent later than their original time, because all the threads were busy
+    late: int
+
+
+def parse_timestamp(value: str) -> float:
+    """parses epoch seconds or an ISO 8601 date into epoch seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def read_csv_log(log_file: IO[str], directory: str = "") -> Iterator[ReplayRecord]:
+    """
+    streams the records of a csv log of `timestamp,method,url,body` rows
+
+    Args:
+
+        log_file (IO[str]): the log, the first line is a header
+
+        directory (str): directory body files are relative to
+    """
+    reader = csv.reader(log_file)
+    next(reader, None)
+    for row in reader:
+        if not row:
+            continue
+        timestamp, method, url, *body = row
+        body_file = body[0] if body and body[0] else None
+        yield ReplayRecord(
+            parse_timestamp(timestamp),
+            method.upper(),
+            url,
+            os.path.join(directory, body_file) if body_file else None,
+        )
+
+
+def read_combined_log(log_file: IO[str], base_url: str) -> Iterator[ReplayRecord]:
+    """
+    streams the records of a log in the combined log format, lines that don't match the format are skipped
+
+    Args:
+
+        log_file (IO[str]): the log
+
+        base_url (str): url the paths of the log are resolved against
+    """
+    for line in log_file:
+        match = COMBINED_LOG_PATTERN.match(line)
+        if match is None:
+            continue
+        yield ReplayRecord(
+            datetime.strptime(match["time"], COMBINED_LOG_TIME_FORMAT).timestamp(),
+            match["method"],
+            urljoin(base_url, match["path"]),
+        )
+
+
+def write_schedule(
+    records: Iterator[ReplayRecord],
+    schedule_file: IO[str],
+    speed_up: float = 1.0,
+    first_timestamp: Optional[float] = None,
+) -> Tuple[int, bool]:
+    """
+    writes records into a tab separated schedule of `offset,method,url,body` rows,
+    offsets are in milliseconds from the first record, or from `first_timestamp`, divided by `speed_up`
+
+    Returns:
+
+        Tuple[int, bool]: the number of records, and whether any of them has a body
+    """
+    schedule_file.write("replay_offset\treplay_method\treplay_url\treplay_body\n")
+    count, has_bodies = 0, False
+    for record in records:
+        if first_timestamp is None:
+            first_timestamp = record.timestamp_seconds
+        offset = max(0, round((record.timestamp_seconds - first_timestamp) * 1000 / speed_up))
+        fields = (record.method, record.url, record.body_file or "")
+        schedule_file.write(
+            f"{offset}\t" + "\t".join(field.replace("\t", "%09").replace("\n", "") for field in fields) + "\n"
+        )
+        count += 1
+        has_bodies = has_bodies or bool(record.body_file)
+    return count, has_bodies
+
+
+class ReplayThreadGroup(BaseThreadGroup):
+    """
+    Thread group replaying the requests of an access log at their original inter-arrival times.
+    """
+
+    jmx_cacheable = False
+
+    file_arguments = ("log_file",)
+
+    java_system = JavaClass("java.lang.System")
+    java_atomic_long_array = JavaClass("java.util.concurrent.atomic.AtomicLongArray")
+
+    # counters: time of the first request, sent requests, late requests
+    script_template = """
+def c = System.getProperties().get("{key}")
+if (c != null) {
+    c.compareAndSet(0, 0L, System.currentTimeMillis())
+    long due = c.get(0) + Long.parseLong(vars.get("replay_offset"))
+    long now = System.currentTimeMillis()
+    if (due > now) Thread.sleep(due - now) else if (now - due > {tolerance}) c.incrementAndGet(2)
+    c.incrementAndGet(1)
+}
+def body = vars.get("replay_body")
+vars.put("replay_body_content", body ? new File(body).getText("UTF-8") : "")
+"""
+
+    # a request sent later than this after its original time is counted as late
+    late_tolerance_milliseconds = 10
+
+    def __init__(
+        self,
+        log_file: str,
+        *children,
+        log_format: str = "csv",
+        base_url: str = "",
+        speed_up: float = 1.0,
+        threads: int = 50,
+        name: str = "Replay",
+        directory: Optional[str] = None,
+        body_directory: Optional[str] = None,
+        first_timestamp_seconds: Optional[float] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            log_file (str): path to the access log
+
+            log_format (str): format of the log, `csv` or `combined`
+
+            base_url (str): url the paths of a combined log are resolved against
+
+            speed_up (float): factor the inter-arrival times are divided by
+
+            threads (int): maximal number of requests in flight
+
+            name (str): name of the thread group, and label of its samples
+
+            directory (str): directory of the schedule file, defaults to the temporary directory
+
+            body_directory (str): directory body files of a csv log are relative to, defaults to the directory of the log
+
+            first_timestamp_seconds (Optional[float]): time the requests are replayed relative to,
+            defaults to the time of the first request of the log
+        """
+        if not os.path.exists(log_file):
+            raise FileNotFoundError(f"Couldn't find file {log_file}")
+        if log_format not in ("csv", "combined"):
+            raise ValueError(f"Unknown log format `{log_format}`, expected `csv` or `combined`")
+        if speed_up <= 0 or threads < 1:
+            raise ValueError("speed_up and threads must be positive")
+        self.log_format = log_format
+        self._key = f"pymeter.replay.{uuid.uuid4().hex}"
+        self._counters = None
+        self.schedule_file = os.path.join(directory or tempfile.gettempdir(), f"pymeter-{self._key}.tsv")
+        with open(log_file, encoding="utf-8", errors="replace") as log, open(
+            self.schedule_file, "w", encoding="utf-8"
+        ) as schedule:
+            records = _read_log(log, log_format, base_url, body_directory or os.path.dirname(os.path.abspath(log_file)))
+            self.scheduled, has_bodies = write_schedule(records, schedule, speed_up, first_timestamp_seconds)
+        weakref.finalize(self, os.remove, self.schedule_file)
+
+        http_sampler = BaseConfigElement.jmeter_class.httpSampler(name, "${replay_url}").method(
+            "${replay_method}"
+        )
+        if has_bodies:
+            http_sampler = http_sampler.body("${replay_body_content}")
+        self._replay_thread_group_instance = BaseConfigElement.jmeter_class.threadGroup(
+            name, threads, max(1, self.scheduled)
+        )
+        self._replay_thread_group_instance.children(
+            BaseConfigElement.jmeter_class.csvDataSet(self.schedule_file)
+            .delimiter("\t")
+            .stopThreadOnEOF(True),
+            BaseConfigElement.jmeter_class.jsr223PreProcessor(
+                ReplayThreadGroup.script_template.replace("{key}", self._key).replace(
+                    "{tolerance}", str(ReplayThreadGroup.late_tolerance_milliseconds)
+                )
+            ),
+            http_sampler,
+        )
+        super().__init__(*children)
+
+    def test_started(self):
+        super().test_started()
+        self._counters = None
+        ReplayThreadGroup.java_system.getProperties().put(self._key, ReplayThreadGroup.java_atomic_long_array(3))
+
+    def test_ended(self):
+        super().test_ended()
+        java_counters = ReplayThreadGroup.java_system.getProperties().remove(self._key)
+        if java_counters is not None:
+            self._counters = [java_counters.get(i) for i in range(java_counters.length())]
+
+    def report(self) -> ReplayReport:
+        """returns the number of scheduled, sent and late requests of the last test, may be called while the test is running"""
+        counters = self._counters
+        if counters is None:
+            java_counters = ReplayThreadGroup.java_system.getProperties().get(self._key)
+            if java_counters is None:
+                return ReplayReport(self.scheduled, 0, 0)
+            counters = [java_counters.get(i) for i in range(java_counters.length())]
+        return ReplayReport(self.scheduled, counters[1], counters[2])
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        arguments = node.bind().arguments
+        replaced = {"threads": max(1, arguments.get("threads", 50) // count)}
+        if arguments.get("first_timestamp_seconds") is None:
+            # the requests of all the shards are replayed relative to the first request of the whole log
+            with open(arguments["log_file"], encoding="utf-8", errors="replace") as log:
+                first = next(_read_log(log, arguments.get("log_format", "csv"), arguments.get("base_url", "")), None)
+            replaced["first_timestamp_seconds"] = first.timestamp_seconds if first is not None else None
+        if arguments.get("log_format", "csv") == "csv":
+            replaced["log_file"] = shard_csv_file(arguments["log_file"], index, count, directory)
+            replaced["body_directory"] = arguments.get("body_directory") or os.path.dirname(
+                os.path.abspath(arguments["log_file"])
+            )
+        else:
+            replaced["log_file"] = _shard_lines(arguments["log_file"], index, count, directory)
+        return super().shard(
+            node.replace(**replaced),
+            index,
+            count,
+            directory,
+        )
+
+
+def _read_log(log_file: IO[str], log_format: str, base_url: str, directory: str = "") -> Iterator[ReplayRecord]:
+    if log_format == "csv":
+        return read_csv_log(log_file, directory)
+    return read_combined_log(log_file, base_url)
+
+
+def _shard_lines(log_file: str, index: int, count: int, directory: str) -> str:
+    name, extension = os.path.splitext(os.path.basename(log_file))
+    shard_path = os.path.join(directory, f"{name}-{abs(hash(log_file))}-{index}{extension}")
+    with open(log_file, encoding="utf-8", errors="replace") as source, open(
+        shard_path, "w", encoding="utf-8"
+    ) as shard:
+        for line_number, line in enumerate(source):
+            if line_number % count == index:
+                shard.write(line)
+    return shard_path
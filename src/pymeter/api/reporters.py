@@ -29,12 +29,42 @@ By default, resulting dashboard will be saved at output/html-report-{current-dat
 
             html_reporter = HtmlReporter("somefolder")
 
+example - 3:
+--------------
+ResultListener streams the individual sample results into python while the test is running.
+Results are buffered by JMeter in a bounded queue and are drained in batches, so the load generator is never slowed down by python.
+When the queue is full, new results are dropped and counted in `dropped`.
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.reporters import ResultListener
+            from pymeter.api.samplers import HttpSampler
+
+
+            http_sampler = HttpSampler("Echo", "https://postman-echo.com/get?var=1")
+            thread_group = ThreadGroupWithRampUpAndHold(2, 1, 2, http_sampler)
+            result_listener = ResultListener()
+            test_plan = TestPlan(thread_group, result_listener)
+            test_run = test_plan.start()
+            for sample in result_listener:
+                print(sample.label, sample.elapsed_milliseconds, sample.success)
+            stats = test_run.wait()
+
 """
 import os
+import time
+import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, List, NamedTuple, Optional
 
-from pymeter.api import ChildrenAreNotAllowed, TestPlanChildElement
+from pymeter.api import (
+    AfterAssertions,
+    ChildrenAreNotAllowed,
+    ElementNode,
+    JavaClass,
+    TestPlanChildElement,
+)
 
 class BaseReporter(TestPlanChildElement):
     """base class for all reporters"""
@@ -57,3 +87,174 @@ class HtmlReporter(BaseReporter):
                 "output", f'html-report-{datetime.now().strftime("%m%d%Y%H%M%S")}'
             )
         super().__init__()
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        report_directory = node.bind().arguments.get("directory") or os.path.join(
+            "output", f'html-report-{datetime.now().strftime("%m%d%Y%H%M%S")}'
+        )
+        return node.replace(directory=os.path.join(report_directory, f"worker-{index}"))
+
+
+class SampleRecord(NamedTuple):
+    """a single sample result"""
+
+    label: str
+    timestamp_milliseconds: int
+    elapsed_milliseconds: int
+    latency_milliseconds: int
+    connect_time_milliseconds: int
+    received_bytes: int
+    sent_bytes: int
+    response_code: str
+    success: bool
+    thread_name: str
+
+    @classmethod
+    def from_line(cls, line: str) -> "SampleRecord":
+        """parses a record serialized by the JMeter side of the `ResultListener`"""
+        (
+            label,
+            timestamp,
+            elapsed,
+            latency,
+            connect_time,
+            received_bytes,
+            sent_bytes,
+            response_code,
+            success,
+            thread_name,
+        ) = line.split("\t")
+        return cls(
+            label,
+            int(timestamp),
+            int(elapsed),
+            int(latency),
+            int(connect_time),
+            int(received_bytes),
+            int(sent_bytes),
+            response_code,
+            success == "true",
+            thread_name,
+        )
+
+
+class ResultListener(BaseReporter):
+    """
+    Streams sample results into python while the test is running.
+
+    Each sample is serialized on the JMeter side into a bounded queue once its assertions have run,
+    python drains the queue in batches with a single call to the JVM per batch.
+    """
+
+    jmx_cacheable = False
+
+    java_system = JavaClass("java.lang.System")
+    java_string = JavaClass("java.lang.String")
+    java_array_list = JavaClass("java.util.ArrayList")
+    java_array_blocking_queue = JavaClass("java.util.concurrent.ArrayBlockingQueue")
+    java_atomic_long = JavaClass("java.util.concurrent.atomic.AtomicLong")
+
+    setup_script = """
+def queue = System.getProperties().get("{key}")
+if (queue == null) return
+"""
+
+    handle_script = """
+def record = [
+    r.getSampleLabel().replace('\\t', ' ').replace('\\n', ' '), r.getStartTime(), r.getTime(), r.getLatency(),
+    r.getConnectTime(), r.getBytesAsLong(), r.getSentBytes(), r.getResponseCode().replace('\\t', ' ').replace('\\n', ' '),
+    r.isSuccessful(), r.getThreadName().replace('\\t', ' ').replace('\\n', ' ')
+].join('\\t')
+if (!queue.offer(record)) System.getProperties().get("{key}.dropped").incrementAndGet()
+"""
+
+    def __init__(self, capacity: int = 100000, batch_size: int = 10000) -> None:
+        """
+
+        Args:
+
+            capacity (int): maximal number of results buffered on the JMeter side
+
+            batch_size (int): maximal number of results transferred to python at once
+        """
+        if capacity <= 0 or batch_size <= 0:
+            raise ValueError("capacity and batch_size must be positive")
+        self._key = f"pymeter.listener.{uuid.uuid4().hex}"
+        self._capacity = capacity
+        self._batch_size = batch_size
+        # java objects are created once the JVM runs the test
+        self._queue = None
+        self._dropped = None
+        self._buffer = None
+        self._ended = False
+        # future of the test run started by `TestPlan.start()`, the listener may never be started if the run fails
+        self._future = None
+        self._after_assertions = AfterAssertions(
+            self._key,
+            ResultListener.setup_script.replace("{key}", self._key),
+            "",
+            ResultListener.handle_script.replace("{key}", self._key),
+        )
+        self._result_listener_instance = ResultListener.jmeter_class.jsr223PostProcessor(self._after_assertions.script)
+        super().__init__()
+
+    @property
+    def dropped(self) -> int:
+        """number of results dropped because the queue was full"""
+        return self._dropped.get() if self._dropped is not None else 0
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        raise ValueError("ResultListener can't stream results from worker processes")
+
+    def test_scheduled(self, future) -> None:
+        self._future = future
+
+    def test_started(self):
+        self._ended = False
+        if self._future is not None and self._future.done():
+            # left by a run that failed before the listener started
+            self._future = None
+        if self._queue is None:
+            self._queue = ResultListener.java_array_blocking_queue(self._capacity)
+            self._dropped = ResultListener.java_atomic_long()
+            self._buffer = ResultListener.java_array_list(self._batch_size)
+        properties = ResultListener.java_system.getProperties()
+        properties.put(self._key, self._queue)
+        properties.put(f"{self._key}.dropped", self._dropped)
+        self._after_assertions.test_started()
+
+    def test_ended(self):
+        self._after_assertions.test_ended()
+        properties = ResultListener.java_system.getProperties()
+        properties.remove(self._key)
+        properties.remove(f"{self._key}.dropped")
+        self._future = None
+        self._ended = True
+
+    def drain(self) -> List[SampleRecord]:
+        """returns the results currently buffered, up to `batch_size` results"""
+        if self._queue is None or not self._queue.drainTo(self._buffer, self._batch_size):
+            return []
+        lines = ResultListener.java_string.join("\n", self._buffer)
+        self._buffer.clear()
+        return [SampleRecord.from_line(line) for line in lines.split("\n")]
+
+    def batches(self, poll_interval_seconds: float = 0.1) -> Iterator[List[SampleRecord]]:
+        """
+        yields batches of results until the test is over and all buffered results were consumed
+        """
+        while True:
+            ended = self._ended or (self._future is not None and self._future.done())
+            batch = self.drain()
+            if batch:
+                yield batch
+            elif ended:
+                return
+            else:
+                time.sleep(poll_interval_seconds)
+
+    def __iter__(self) -> Iterator[SampleRecord]:
+        for batch in self.batches():
+            yield from batch
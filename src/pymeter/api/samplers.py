@@ -71,18 +71,106 @@ This post request has a multipart/form-data as a content type, and the body has
                 .post_multipart_formdata("name", "path/to/file.ext", ContentType.MULTIPART_FORM_DATA)
             )
 
+example - 6:
+--------------
+Connection handling decides whether a test measures the server or the TCP and TLS setup.
+`HttpDefaults` sets keep-alive, connection reuse across iterations, timeouts, the http client
+and a cap of requests in flight per host for all the http samplers in its scope, and `connection_settings` overrides them for a single sampler.
+Stats tell how many samples opened a new connection and which part of the time to first byte was spent connecting.
+
+
+      .. code-block:: python
+
+            from pymeter.api.config import HttpDefaults, TestPlan, ThreadGroupSimple
+            from pymeter.api.samplers import HttpSampler
+
+            http_defaults = HttpDefaults(
+                keep_alive=True,
+                connect_timeout_milliseconds=2000,
+                response_timeout_milliseconds=10000,
+                max_connections_per_host=50,
+            )
+            login = HttpSampler("login", "https://postman-echo.com/get?login=1").connection_settings(keep_alive=False)
+            search = HttpSampler("search", "https://postman-echo.com/get?search=1")
+            stats = TestPlan(ThreadGroupSimple(10, 20, login, search), http_defaults, breakdown=True).run()
+            for label, label_stats in stats.by_label().items():
+                print(label, label_stats.connection_reuse_rate, label_stats.connect_time_share)
+
+example - 7:
+--------------
+Large response bodies kept in every sample result blow up the heap of the load generator,
+and the garbage collection pauses show up as latency.
+Bodies can be discarded as they are read, or truncated, for a single sampler or for the whole test plan.
+Samplers with a `JsonExtractor` or a `ResponseAssertion` in scope keep their bodies.
+
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupSimple
+            from pymeter.api.postprocessors import JsonExtractor
+            from pymeter.api.samplers import HttpSampler
+
+            catalog = HttpSampler("catalog", "https://postman-echo.com/get?catalog=1").store_response_body(1024)
+            login = HttpSampler("login", "https://postman-echo.com/get?user=1", JsonExtractor("user", "args.user"))
+
+            # bodies of all the other samplers are discarded, login keeps its body for the extractor
+            test_plan = TestPlan(ThreadGroupSimple(10, 100, login, catalog), max_response_body_bytes=0)
+            stats = test_plan.run()
+
+example - 8:
+--------------
+Any protocol can be load tested with a python function, timed like any other sample.
+The function receives the JMeter variables listed in `variables` and returns the response body,
+an exception fails the sample.
+By default the function is called in a pool of worker processes, so the JMeter threads are not serialized on the GIL,
+the function must then be importable (defined at the top level of a module).
+The processes are started when the test starts and stopped when it ends, they only accept connections
+authenticated with the token of their pool.
+
+
+      .. code-block:: python
+
+            import redis
+
+            from pymeter.api.config import TestPlan, ThreadGroupSimple, Vars
+            from pymeter.api.samplers import PythonSampler
+
+            client = redis.Redis()
+
+            def get_user(variables):
+                return client.get(f"user:{variables['user_id']}")
+
+            if __name__ == "__main__":
+                python_sampler = PythonSampler("redis_get", get_user, variables=["user_id"], processes=4)
+                test_plan = TestPlan(ThreadGroupSimple(50, 100, python_sampler), Vars(user_id="42"))
+                stats = test_plan.run()
+
+.. note::
+    With `processes=0` the function is called from the JMeter threads through a pyjnius bridge instead,
+    there is no inter-process round trip, but calls are serialized on the GIL unless the function releases it.
 """
+import functools
+import hmac
+import inspect
 import json
+import multiprocessing
 import os
-from typing import Dict, List, Union
+import secrets
+import socket
+import threading
+import traceback
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Union
 
 
 try:
     from typing import Self
 except ImportError:
     from typing_extensions import Self
-from pymeter.api import ThreadGroupChildElement, ContentType
-from pymeter.api.config import BaseThreadGroup
+from pymeter.api import ThreadGroupChildElement, ContentType, ElementNode, GroovyScript, JavaClass, recorded
+from pymeter.api.config import BaseThreadGroup, HttpConnectionSettings, ResponseBodyLimit
+from pymeter.api.distributed import receive_message, send_message
+from pymeter.api.workers import WORKER_START_TIMEOUT_SECONDS, WorkerError
 
 
 class BaseSampler(ThreadGroupChildElement, BaseThreadGroup):
@@ -121,6 +209,7 @@ class HttpSampler(BaseSampler):
 
         super().__init__(*children)
 
+    @recorded
     def post(self, body: Union[Dict, List, str], content_type: ContentType) -> Self:
         """Create a post request sampler
 
@@ -144,10 +233,11 @@ class HttpSampler(BaseSampler):
             )
 
         self._http_sampler_instance = self.java_wrapped_element.post(
-            body, content_type.value
+            body, content_type.recipe
         )
         return self
 
+    @recorded
     def header(self, key: str, value: str) -> Self:
         """Append a header to request
 
@@ -168,6 +258,7 @@ class HttpSampler(BaseSampler):
         self._http_sampler_instance = self.java_wrapped_element.header(key, value)
         return self
 
+    @recorded
     def post_multipart_formdata(self, name: str, file_path: str, content_type: ContentType) -> Self:
         """Create a post request sampler
 
@@ -187,6 +278,352 @@ class HttpSampler(BaseSampler):
         if not os.path.exists(file_path):
             raise FileNotFoundError(file_path)
         self._http_sampler_instance = self.java_wrapped_element.bodyFilePart(
-            name, file_path, content_type.value
+            name, file_path, content_type.recipe
         ).method("POST")
         return self
+
+    @recorded
+    def connection_settings(
+        self,
+        keep_alive: Optional[bool] = None,
+        reuse_connections: bool = True,
+        connect_timeout_milliseconds: Optional[int] = None,
+        response_timeout_milliseconds: Optional[int] = None,
+        client: Optional[str] = None,
+        max_connections_per_host: Optional[int] = None,
+    ) -> Self:
+        """Overrides the connection settings of `HttpDefaults` for this sampler
+
+        Args:
+
+            keep_alive (Optional[bool]): whether connections are kept open between samples of the same thread
+
+            reuse_connections (bool): connections are kept open from one iteration to the next by default,
+            with `False` the connections of the thread are closed before the first sample of each iteration
+
+            connect_timeout_milliseconds (Optional[int]): maximal time to establish a connection
+
+            response_timeout_milliseconds (Optional[int]): maximal time to wait for the response
+
+            client (Optional[str]): http client implementation, `httpclient4` or `java`
+
+            max_connections_per_host (Optional[int]): maximal number of requests of this sampler in flight to each host
+
+
+        Returns:
+
+            Self: the sampler instance
+        """
+        settings = HttpConnectionSettings(
+            keep_alive,
+            reuse_connections,
+            connect_timeout_milliseconds,
+            response_timeout_milliseconds,
+            client,
+            max_connections_per_host,
+        )
+        self.java_wrapped_element.children(*settings.java_processors())
+        self.__dict__.setdefault("_connection_settings", []).append(settings)
+        return self
+
+    @classmethod
+    def is_jmx_cacheable(cls, node: ElementNode) -> bool:
+        # the connection slots are shared with python under a key of their own
+        return not any(
+            name == "connection_settings"
+            and inspect.signature(HttpSampler.connection_settings).bind(None, *args, **kwargs).arguments.get(
+                "max_connections_per_host"
+            )
+            is not None
+            for name, args, kwargs in node.calls
+        )
+
+    def test_started(self):
+        super().test_started()
+        for settings in self.__dict__.get("_connection_settings", ()):
+            settings.test_started()
+
+    def test_ended(self):
+        super().test_ended()
+        for settings in self.__dict__.get("_connection_settings", ()):
+            settings.test_ended()
+
+    @recorded
+    def store_response_body(self, max_bytes: int) -> Self:
+        """Limits the response body bytes kept in the results of this sampler, to cut the memory of the load generator.
+        The limit is turned off when a `JsonExtractor` or a `ResponseAssertion` in scope needs the body.
+
+        Args:
+
+            max_bytes (int): maximal number of bytes kept from the response body, 0 drains and discards the body
+
+
+        Returns:
+
+            Self: the sampler instance
+        """
+        self.java_wrapped_element.children(*ResponseBodyLimit(max_bytes).java_processors())
+        return self
+
+
+def call_python_function(fn: Callable, variables: Dict[str, str]) -> dict:
+    """calls the function of a python sampler and returns the outcome of the sample"""
+    try:
+        response = fn(variables)
+    except Exception as exception:  # pylint: disable=broad-except
+        return {
+            "ok": False,
+            "message": f"{type(exception).__name__}: {exception}",
+            "response": traceback.format_exc(),
+        }
+    if response is None:
+        response = ""
+    elif isinstance(response, bytes):
+        response = response.decode("utf-8", errors="replace")
+    return {"ok": True, "message": "OK", "response": str(response)}
+
+
+@functools.lru_cache(maxsize=None)
+def _java_function_class():
+    # pylint: disable-next=import-outside-toplevel
+    from jnius import PythonJavaClass, java_method
+
+    class JavaFunction(PythonJavaClass):
+        """java.util.function.Function calling a python sampler function with a JSON request"""
+
+        __javainterfaces__ = ["java/util/function/Function"]
+
+        def __init__(self, fn: Callable) -> None:
+            super().__init__()
+            self.fn = fn
+
+        @java_method("(Ljava/lang/Object;)Ljava/lang/Object;")
+        def apply(self, request):
+            request = request if isinstance(request, str) else request.toString()
+            return json.dumps(call_python_function(self.fn, json.loads(request)))
+
+    return JavaFunction
+
+
+def _serve_python_calls(fn: Callable, token: str, connection: socket.socket):
+    with connection:
+        try:
+            hello = receive_message(connection)
+        except (OSError, ValueError):
+            return
+        # the first message of a connection holds the token of the pool, other local processes can't call the function
+        if not isinstance(hello, dict) or not hmac.compare_digest(str(hello.get("token")).encode(), token.encode()):
+            return
+        while True:
+            try:
+                variables = receive_message(connection)
+                if variables is None:
+                    return
+                send_message(connection, call_python_function(fn, variables))
+            except OSError:
+                return
+
+
+def _python_worker_main(fn: Callable, token: str, connection):
+    server = socket.create_server(("127.0.0.1", 0))
+    connection.send(server.getsockname()[1])
+    connection.close()
+    while True:
+        client, _ = server.accept()
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=_serve_python_calls, args=(fn, token, client), daemon=True).start()
+
+
+class PythonProcessPool:
+    """
+    worker processes calling the function of a python sampler, each one listening on a local port.
+
+    Each JMeter thread keeps a connection to one of the processes, and the calls of the threads connected to
+    the same process run in their own python thread. Connections start with a `{"token": ...}` message holding
+    the token of the pool, connections sending another token are closed.
+    """
+
+    def __init__(self, fn: Callable, processes: int) -> None:
+        context = multiprocessing.get_context("spawn")
+        self.token = secrets.token_hex(16)
+        self.processes, self.ports, receivers = [], [], []
+        try:
+            for index in range(processes):
+                receiver, sender = context.Pipe(duplex=False)
+                receivers.append(receiver)
+                process = context.Process(
+                    target=_python_worker_main,
+                    args=(fn, self.token, sender),
+                    name=f"pymeter-python-sampler-{index}",
+                    daemon=True,
+                )
+                process.start()
+                sender.close()
+                self.processes.append(process)
+            for receiver in receivers:
+                if not receiver.poll(WORKER_START_TIMEOUT_SECONDS):
+                    raise WorkerError("A python sampler process didn't start in time")
+                self.ports.append(receiver.recv())
+        except EOFError as error:
+            self.close()
+            raise WorkerError(
+                "A python sampler process failed to start, is the function defined at the top level of a module?"
+            ) from error
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            for receiver in receivers:
+                receiver.close()
+
+    def close(self):
+        """stops the worker processes"""
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+
+
+class PythonSampler(BaseSampler):
+    """
+    Python sampler calls a python function, the sample time is the time of the call.
+
+    The function receives a dict of the JMeter variables listed in `variables` and returns the response body,
+    as a `str`, `bytes` or None. An exception fails the sample, with the traceback as the response body.
+
+    Worker processes are started when the test starts, and stopped when it ends.
+    """
+
+    jmx_cacheable = False
+
+    java_system = JavaClass("java.lang.System")
+
+    script_template = """
+def names = [{names}] as String[]
+def request = [:]
+for (name in names) request[name] = vars.get(name)
+byte[] payload = groovy.json.JsonOutput.toJson(request).getBytes("UTF-8")
+{call}
+def outcome = new groovy.json.JsonSlurper().parse(reply, "UTF-8")
+SampleResult.setSuccessful(outcome.ok)
+if (!outcome.ok) SampleResult.setResponseCode("500")
+SampleResult.setResponseMessage(outcome.message)
+SampleResult.setResponseData(outcome.response, "UTF-8")
+SampleResult.setSentBytes(payload.length)
+return null
+"""
+
+    inline_call = """
+String text = System.getProperties().get("{key}").apply(new String(payload, "UTF-8"))
+byte[] reply = text.getBytes("UTF-8")
+"""
+
+    process_call = """
+def connection = vars.getObject("{key}")
+if (connection == null) {
+    // token and ports of the worker processes of the test
+    def pool = System.getProperties().get("{key}").split('\\t')
+    def ports = pool[1].split(',')
+    def socket = new Socket("127.0.0.1", Integer.parseInt(ports[(int) (Thread.currentThread().getId() % ports.length)]))
+    // closed by python when the test ends
+    System.getProperties().get("{key}.sockets").add(socket)
+    socket.setTcpNoDelay(true)
+    connection = [
+        new DataInputStream(new BufferedInputStream(socket.getInputStream())),
+        new DataOutputStream(new BufferedOutputStream(socket.getOutputStream())),
+    ]
+    byte[] hello = groovy.json.JsonOutput.toJson([token: pool[0]]).getBytes("UTF-8")
+    connection[1].writeInt(hello.length)
+    connection[1].write(hello)
+    vars.putObject("{key}", connection)
+}
+connection[1].writeInt(payload.length)
+connection[1].write(payload)
+connection[1].flush()
+byte[] reply = new byte[connection[0].readInt()]
+connection[0].readFully(reply)
+"""
+
+    java_concurrent_linked_queue = JavaClass("java.util.concurrent.ConcurrentLinkedQueue")
+
+    close_sockets_script = GroovyScript("sockets.each { it.close() }")
+
+    # java proxies of the functions called from the JMeter threads by sampler key, registered while a test is running
+    _callees: Dict[str, object] = {}
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, str]], Union[str, bytes, None]],
+        *children,
+        variables: Iterable[str] = (),
+        processes: Optional[int] = None,
+    ) -> None:
+        """
+
+        Args:
+
+            name (str): name to be displayed in reports
+
+            fn (Callable[[Dict[str, str]], Union[str, bytes, None]]): function called for each sample
+
+            variables (Iterable[str]): names of the JMeter variables passed to the function
+
+            processes (Optional[int]): number of worker processes calling the function, defaults to the number of cpus.
+            0 calls the function from the JMeter threads, each call then holds the GIL
+        """
+        if not callable(fn):
+            raise TypeError(f"fn must be callable, got {type(fn)}")
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes < 0:
+            raise ValueError("processes can't be negative")
+        self.processes = processes
+        self._fn = fn
+        self._pool: Optional[PythonProcessPool] = None
+        self._key = f"pymeter.python.{uuid.uuid4().hex}"
+        call = PythonSampler.process_call if processes else PythonSampler.inline_call
+        script = PythonSampler.script_template.replace(
+            "{names}", ", ".join(json.dumps(str(name)) for name in variables)
+        ).replace("{call}", call.replace("{key}", self._key))
+        self._python_sampler_instance = BaseSampler.jmeter_class.jsr223Sampler(name, script)
+        super().__init__(*children)
+
+    def test_started(self):
+        """starts the worker processes of the sampler, or registers its function"""
+        super().test_started()
+        properties = PythonSampler.java_system.getProperties()
+        if not self.processes:
+            # the proxy must be referenced from python for as long as JMeter may call it
+            java_function = PythonSampler._callees[self._key] = _java_function_class()(self._fn)
+            properties.put(self._key, java_function)
+        elif self._pool is None:
+            self._pool = PythonProcessPool(self._fn, self.processes)
+            properties.put(f"{self._key}.sockets", PythonSampler.java_concurrent_linked_queue())
+            properties.put(self._key, f"{self._pool.token}\t{','.join(str(port) for port in self._pool.ports)}")
+
+    def test_ended(self):
+        """stops the worker processes of the sampler, or releases its function"""
+        super().test_ended()
+        properties = PythonSampler.java_system.getProperties()
+        properties.remove(self._key)
+        PythonSampler._callees.pop(self._key, None)
+        sockets = properties.remove(f"{self._key}.sockets")
+        if sockets is not None:
+            PythonSampler.close_sockets_script(sockets=sockets)
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def close(self):
+        """stops the worker processes of the sampler and releases its function"""
+        self.test_ended()
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        processes = node.bind().arguments.get("processes")
+        if processes == 0:
+            return super().shard(node, index, count, directory)
+        if processes is None:
+            processes = os.cpu_count() or 1
+        return super().shard(node.replace(processes=max(1, processes // count)), index, count, directory)
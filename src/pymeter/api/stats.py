@@ -0,0 +1,684 @@
+"""
+The stats module breaks down the results of a test by sampler label and by thread group.
+
+The breakdown is collected by the test plans created with `breakdown=True`, headline numbers of the other plans
+are the overall stats computed by JMeter. Sample results are aggregated inside the JVM while the test is running,
+and are transferred to python in a single call once the test is over. Setup and teardown thread groups are kept apart, so they don't pollute the headline numbers of the test.
+
+example - 1:
+--------------
+Per label and per thread group stats are exposed by the object returned from `TestPlan.run()`, for plans with a breakdown
+
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupSimple
+            from pymeter.api.samplers import HttpSampler
+
+            health_check = HttpSampler("health", "https://postman-echo.com/get?health=1")
+            checkout = HttpSampler("checkout", "https://postman-echo.com/post")
+            thread_group = ThreadGroupSimple(10, 5, health_check, checkout, name="Shoppers")
+            test_plan = TestPlan(thread_group, breakdown=True)
+            stats = test_plan.run()
+
+            for label, label_stats in stats.by_label().items():
+                print(label, label_stats.count, label_stats.error_rate, label_stats.sample_time_99_percentile_milliseconds)
+
+            print(stats.by_thread_group()["Shoppers"].throughput_per_second)
+
+example - 2:
+--------------
+All the headline numbers of a test are materialized at once by `snapshot()`. Sample times are recorded
+in whole milliseconds by JMeter, so minimums, maximums and percentiles are whole milliseconds, means aren't rounded.
+Reading values from the snapshot doesn't involve the JVM at all.
+
+      .. code-block:: python
+
+            snapshot = stats.snapshot()
+            print(snapshot.sample_time_mean_milliseconds, snapshot.sample_time_99_percentile_milliseconds)
+            print(stats.to_dict())
+
+example - 3:
+--------------
+Samples sent while the generator and the system under test warm up are kept out of the headline numbers,
+they are still sent and reported by `warmup`. A warmup is set for the whole test, or for a single thread group,
+plans with a warmup always collect the breakdown.
+
+      .. code-block:: python
+
+            test_plan = TestPlan(thread_group, warmup_seconds=30)
+            stats = test_plan.run()
+            print(stats.warmup.count, stats.warmup.sample_time_99_percentile_milliseconds)
+            print(stats.sample_time_99_percentile_milliseconds)
+
+            warm_checkout = ThreadGroupSimple(10, 50, checkout, name="Shoppers", warmup_iterations=5)
+
+"""
+import math
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymeter.api import (
+    AfterAssertions,
+    ChildrenAreNotAllowed,
+    GroovyScript,
+    JavaClass,
+    TestPlanChildElement,
+)
+from pymeter.api.hdr import HdrHistogram
+
+MAIN = "main"
+SETUP = "setup"
+TEARDOWN = "teardown"
+# samples of the main thread groups sent during their warmup, kept out of the headline numbers
+WARMUP = "warmup"
+# variable marking the samples of a thread that is warming up
+WARMUP_VARIABLE = "pymeter.warmup"
+
+
+class SampleStats:
+    """aggregated results of a set of samples"""
+
+    __slots__ = (
+        "count",
+        "errors",
+        "received_bytes",
+        "sent_bytes",
+        "sample_time_sum_milliseconds",
+        "first_timestamp_milliseconds",
+        "last_timestamp_milliseconds",
+        "latency_sum_milliseconds",
+        "connect_time_sum_milliseconds",
+        "histogram",
+        "connections",
+    )
+
+    def __init__(
+        self,
+        count: int = 0,
+        errors: int = 0,
+        received_bytes: int = 0,
+        sent_bytes: int = 0,
+        sample_time_sum_milliseconds: int = 0,
+        first_timestamp_milliseconds: Optional[int] = None,
+        last_timestamp_milliseconds: Optional[int] = None,
+        latency_sum_milliseconds: int = 0,
+        connect_time_sum_milliseconds: int = 0,
+        histogram: Optional[Dict[int, int]] = None,
+        connections: int = 0,
+    ) -> None:
+        """
+
+        Args:
+
+            histogram (Optional[Dict[int, int]]): number of samples for each sample time in milliseconds
+
+            connections (int): number of samples that opened a new connection
+        """
+        self.count = count
+        self.errors = errors
+        self.received_bytes = received_bytes
+        self.sent_bytes = sent_bytes
+        self.sample_time_sum_milliseconds = sample_time_sum_milliseconds
+        self.first_timestamp_milliseconds = first_timestamp_milliseconds
+        self.last_timestamp_milliseconds = last_timestamp_milliseconds
+        self.latency_sum_milliseconds = latency_sum_milliseconds
+        self.connect_time_sum_milliseconds = connect_time_sum_milliseconds
+        self.histogram = histogram if histogram is not None else {}
+        self.connections = connections
+
+    @classmethod
+    def combine(cls, all_stats: Iterable["SampleStats"]) -> "SampleStats":
+        """merges several stats into one, percentiles of the result are exact"""
+        combined = cls()
+        for stats in all_stats:
+            combined.count += stats.count
+            combined.errors += stats.errors
+            combined.received_bytes += stats.received_bytes
+            combined.sent_bytes += stats.sent_bytes
+            combined.sample_time_sum_milliseconds += stats.sample_time_sum_milliseconds
+            combined.latency_sum_milliseconds += stats.latency_sum_milliseconds
+            combined.connect_time_sum_milliseconds += stats.connect_time_sum_milliseconds
+            combined.connections += stats.connections
+            if stats.first_timestamp_milliseconds is not None:
+                combined.first_timestamp_milliseconds = min(
+                    stats.first_timestamp_milliseconds,
+                    combined.first_timestamp_milliseconds
+                    if combined.first_timestamp_milliseconds is not None
+                    else stats.first_timestamp_milliseconds,
+                )
+            if stats.last_timestamp_milliseconds is not None:
+                combined.last_timestamp_milliseconds = max(
+                    stats.last_timestamp_milliseconds,
+                    combined.last_timestamp_milliseconds or 0,
+                )
+            for value, count in stats.histogram.items():
+                combined.histogram[value] = combined.histogram.get(value, 0) + count
+        return combined
+
+    def hdr_histogram(self, significant_figures: int = 3) -> HdrHistogram:
+        """returns the sample times as a mergeable HDR histogram, covering the time range of the samples"""
+        histogram = HdrHistogram.from_dict(self.histogram, significant_figures)
+        histogram.start_timestamp_milliseconds = self.first_timestamp_milliseconds
+        histogram.end_timestamp_milliseconds = self.last_timestamp_milliseconds
+        return histogram
+
+    @classmethod
+    def from_hdr_histogram(cls, histogram: HdrHistogram) -> "SampleStats":
+        """
+        creates stats from the sample times of an HDR histogram,
+        errors, bytes and latencies are not held by histograms and are left to 0
+        """
+        values = histogram.to_dict()
+        return cls(
+            count=sum(values.values()),
+            sample_time_sum_milliseconds=round(histogram.mean * histogram.total_count),
+            first_timestamp_milliseconds=histogram.start_timestamp_milliseconds,
+            last_timestamp_milliseconds=histogram.end_timestamp_milliseconds,
+            histogram=values,
+        )
+
+    def subtract(self, earlier: "SampleStats") -> "SampleStats":
+        """returns the stats of the samples added since `earlier` was taken from the same aggregate"""
+        histogram = {}
+        for value, count in self.histogram.items():
+            difference = count - earlier.histogram.get(value, 0)
+            if difference:
+                histogram[value] = difference
+        return SampleStats(
+            self.count - earlier.count,
+            self.errors - earlier.errors,
+            self.received_bytes - earlier.received_bytes,
+            self.sent_bytes - earlier.sent_bytes,
+            self.sample_time_sum_milliseconds - earlier.sample_time_sum_milliseconds,
+            self.first_timestamp_milliseconds,
+            self.last_timestamp_milliseconds,
+            self.latency_sum_milliseconds - earlier.latency_sum_milliseconds,
+            self.connect_time_sum_milliseconds - earlier.connect_time_sum_milliseconds,
+            histogram,
+            self.connections - earlier.connections,
+        )
+
+    @property
+    def error_rate(self) -> float:
+        """returns the ratio of failed samples"""
+        return self.errors / self.count if self.count else 0.0
+
+    @property
+    def duration_milliseconds(self) -> int:
+        """returns the time between the start of the first sample and the end of the last one"""
+        if self.first_timestamp_milliseconds is None or self.last_timestamp_milliseconds is None:
+            return 0
+        return self.last_timestamp_milliseconds - self.first_timestamp_milliseconds
+
+    @property
+    def throughput_per_second(self) -> float:
+        """returns the number of samples per second"""
+        duration = self.duration_milliseconds
+        return self.count * 1000 / duration if duration else 0.0
+
+    @property
+    def received_bytes_per_second(self) -> float:
+        """returns the number of received bytes per second"""
+        duration = self.duration_milliseconds
+        return self.received_bytes * 1000 / duration if duration else 0.0
+
+    @property
+    def sample_time_mean_milliseconds(self) -> float:
+        """returns the mean of sample times in milliseconds"""
+        return self.sample_time_sum_milliseconds / self.count if self.count else 0.0
+
+    @property
+    def latency_mean_milliseconds(self) -> float:
+        """returns the mean time to first byte in milliseconds"""
+        return self.latency_sum_milliseconds / self.count if self.count else 0.0
+
+    @property
+    def connect_time_mean_milliseconds(self) -> float:
+        """returns the mean time to establish connections in milliseconds"""
+        return self.connect_time_sum_milliseconds / self.count if self.count else 0.0
+
+    @property
+    def connection_reuse_rate(self) -> float:
+        """returns the ratio of samples sent on an already open connection"""
+        return 1 - self.connections / self.count if self.count else 0.0
+
+    @property
+    def connect_time_share(self) -> float:
+        """returns the part of the time to first byte spent establishing connections"""
+        return (
+            self.connect_time_sum_milliseconds / self.latency_sum_milliseconds
+            if self.latency_sum_milliseconds
+            else 0.0
+        )
+
+    @property
+    def sample_time_min_milliseconds(self) -> int:
+        """returns the min of sample times in milliseconds"""
+        return min(self.histogram) if self.histogram else 0
+
+    @property
+    def sample_time_max_milliseconds(self) -> int:
+        """returns the max of sample times in milliseconds"""
+        return max(self.histogram) if self.histogram else 0
+
+    @property
+    def sample_time_median_milliseconds(self) -> int:
+        """returns the median of sample times in milliseconds"""
+        return self.percentile(50)
+
+    @property
+    def sample_time_90_percentile_milliseconds(self) -> int:
+        """returns the 90th percentile of sample times in milliseconds"""
+        return self.percentile(90)
+
+    @property
+    def sample_time_95_percentile_milliseconds(self) -> int:
+        """returns the 95th percentile of sample times in milliseconds"""
+        return self.percentile(95)
+
+    @property
+    def sample_time_99_percentile_milliseconds(self) -> int:
+        """returns the 99th percentile of sample times in milliseconds"""
+        return self.percentile(99)
+
+    def percentile(self, percent: float) -> int:
+        """returns the given percentile of sample times in milliseconds"""
+        if not 0 <= percent <= 100:
+            raise ValueError("percent must be between 0 and 100")
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for value in sorted(self.histogram):
+            seen += self.histogram[value]
+            if seen >= rank:
+                return value
+        return max(self.histogram)
+
+    def to_dict(self) -> dict:
+        """returns the stats as a flat dictionary"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "throughput_per_second": self.throughput_per_second,
+            "received_bytes": self.received_bytes,
+            "sent_bytes": self.sent_bytes,
+            "sample_time_mean_milliseconds": self.sample_time_mean_milliseconds,
+            "sample_time_min_milliseconds": self.sample_time_min_milliseconds,
+            "sample_time_median_milliseconds": self.sample_time_median_milliseconds,
+            "sample_time_90_percentile_milliseconds": self.sample_time_90_percentile_milliseconds,
+            "sample_time_95_percentile_milliseconds": self.sample_time_95_percentile_milliseconds,
+            "sample_time_99_percentile_milliseconds": self.sample_time_99_percentile_milliseconds,
+            "sample_time_max_milliseconds": self.sample_time_max_milliseconds,
+            "latency_mean_milliseconds": self.latency_mean_milliseconds,
+            "connect_time_mean_milliseconds": self.connect_time_mean_milliseconds,
+            "connection_reuse_rate": self.connection_reuse_rate,
+            "connect_time_share": self.connect_time_share,
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+class StatsSnapshot:
+    """immutable headline numbers of a test, durations and sample times are float milliseconds"""
+
+    __slots__ = (
+        "duration_milliseconds",
+        "count",
+        "errors",
+        "error_rate",
+        "throughput_per_second",
+        "received_bytes",
+        "sent_bytes",
+        "sample_time_mean_milliseconds",
+        "sample_time_min_milliseconds",
+        "sample_time_median_milliseconds",
+        "sample_time_90_percentile_milliseconds",
+        "sample_time_95_percentile_milliseconds",
+        "sample_time_99_percentile_milliseconds",
+        "sample_time_max_milliseconds",
+        "latency_mean_milliseconds",
+        "connect_time_mean_milliseconds",
+        "connection_reuse_rate",
+        "connect_time_share",
+    )
+
+    def __init__(self, **values) -> None:
+        for name in StatsSnapshot.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    @classmethod
+    def from_sample_stats(
+        cls, stats: SampleStats, duration_milliseconds: float
+    ) -> "StatsSnapshot":
+        """creates a snapshot from the aggregated stats of the headline samples"""
+        values = {
+            name: float(value) if name.endswith("_milliseconds") else value
+            for name, value in stats.to_dict().items()
+        }
+        return cls(duration_milliseconds=float(duration_milliseconds), **values)
+
+    @classmethod
+    def from_java_stats(cls, java_test_plan_stats, breakdown: Optional[SampleStats] = None) -> "StatsSnapshot":
+        """
+        creates a snapshot from the overall stats computed by JMeter, transferred from the JVM in a single call
+
+        Args:
+
+            java_test_plan_stats: the stats object returned by JMeter DSL
+
+            breakdown (Optional[SampleStats]): the collected stats of the same samples, JMeter doesn't compute latencies
+            and connect times so they are 0 without it
+        """
+        count, errors, received_bytes, sent_bytes, *nanoseconds = (
+            int(value) for value in overall_export_script(testPlanStats=java_test_plan_stats).split("\t")
+        )
+        duration, mean, minimum, median, perc90, perc95, perc99, maximum = (value / 1_000_000 for value in nanoseconds)
+        breakdown = breakdown or SampleStats()
+        return cls(
+            duration_milliseconds=duration,
+            count=count,
+            errors=errors,
+            error_rate=errors / count if count else 0.0,
+            throughput_per_second=count * 1000 / duration if duration else 0.0,
+            received_bytes=received_bytes,
+            sent_bytes=sent_bytes,
+            sample_time_mean_milliseconds=mean,
+            sample_time_min_milliseconds=minimum,
+            sample_time_median_milliseconds=median,
+            sample_time_90_percentile_milliseconds=perc90,
+            sample_time_95_percentile_milliseconds=perc95,
+            sample_time_99_percentile_milliseconds=perc99,
+            sample_time_max_milliseconds=maximum,
+            latency_mean_milliseconds=breakdown.latency_mean_milliseconds,
+            connect_time_mean_milliseconds=breakdown.connect_time_mean_milliseconds,
+            connection_reuse_rate=breakdown.connection_reuse_rate,
+            connect_time_share=breakdown.connect_time_share,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, StatsSnapshot) and self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.to_dict().items()))
+
+    def __reduce__(self):
+        return (_snapshot_from_dict, (self.to_dict(),))
+
+    def to_dict(self) -> dict:
+        """returns the snapshot as a flat dictionary"""
+        return {name: getattr(self, name) for name in StatsSnapshot.__slots__}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+# the overall stats computed by JMeter, times are exported in nanoseconds so means aren't rounded
+overall_export_script = GroovyScript(
+    """
+def o = testPlanStats.overallStats
+def t = o.sampleTime()
+[
+    o.samplesCount().total(), o.errorsCount().total(), o.receivedBytes().total(), o.sentBytes().total(),
+    testPlanStats.duration().toNanos(), t.mean().toNanos(), t.min().toNanos(), t.median().toNanos(),
+    t.perc90().toNanos(), t.perc95().toNanos(), t.perc99().toNanos(), t.max().toNanos()
+].join('\t')
+"""
+)
+
+
+def _snapshot_from_dict(values: dict) -> StatsSnapshot:
+    return StatsSnapshot(**values)
+
+
+def aggregation(state_key: str, key_script: str) -> AfterAssertions:
+    """
+    returns the groovy post-processor aggregating sample results into the map stored in the system property `state_key`,
+    once their assertions have run
+
+    Args:
+
+        state_key (str): name of the system property holding the map of aggregated results
+
+        key_script (str): groovy code assigning the `key` of the sample result `r` in the map,
+        tab separated parts of the key are exported as the parts of a tuple
+    """
+    return AfterAssertions(
+        state_key,
+        """
+def stats = System.getProperties().get("{state_key}")
+if (stats == null) return
+""".replace("{state_key}", state_key),
+        key_script,
+        """
+def entry = stats.get(key)
+if (entry == null) {
+    def counters = new long[10]
+    counters[5] = Long.MAX_VALUE
+    stats.putIfAbsent(key, [counters, new HashMap<Long, Long>()] as Object[])
+    entry = stats.get(key)
+}
+def c = entry[0]
+def h = entry[1]
+long elapsed = r.getTime()
+synchronized (c) {
+    c[0]++
+    if (!r.isSuccessful()) c[1]++
+    c[2] += r.getBytesAsLong()
+    c[3] += r.getSentBytes()
+    c[4] += elapsed
+    c[5] = Math.min(c[5], r.getStartTime())
+    c[6] = Math.max(c[6], r.getEndTime())
+    c[7] += r.getLatency()
+    c[8] += r.getConnectTime()
+    if (r.getConnectTime() > 0) c[9]++
+    Long seen = h.get(elapsed)
+    h.put(elapsed, seen == null ? 1L : seen + 1L)
+}
+""",
+    )
+
+
+class StatsCollector(TestPlanChildElement):
+    """
+    Aggregates sample results by thread group and label inside the JVM.
+
+    A collector is appended to the test plans created with `breakdown=True` or with a warmup, there is no need to create one.
+    """
+
+    java_system = JavaClass("java.lang.System")
+    java_concurrent_hash_map = JavaClass("java.util.concurrent.ConcurrentHashMap")
+    state_key = "pymeter.stats"
+
+    export_script = GroovyScript(
+        """
+def out = new StringBuilder()
+out.append(testPlanStats == null ? 0 : testPlanStats.duration().toNanos()).append('\\n')
+stats.each { key, entry ->
+    def c = entry[0]
+    def h = entry[1]
+    synchronized (c) {
+        out.append(key)
+        for (int i = 0; i < c.length; i++) out.append(i == 0 ? '\\t' : ',').append(c[i])
+        out.append('\\t')
+        def first = true
+        h.each { value, count ->
+            if (!first) out.append(',')
+            out.append(value).append(':').append(count)
+            first = false
+        }
+        out.append('\\n')
+    }
+}
+out.toString()
+"""
+    )
+
+    key_script = """
+def tg = ctx.getThreadGroup()
+def kind = tg instanceof org.apache.jmeter.threads.SetupThreadGroup ? 'setup'
+    : tg instanceof org.apache.jmeter.threads.PostThreadGroup ? 'teardown' : 'main'
+if (kind == 'main' && (vars.get("{warmup_variable}") != null{warmup_conditions})) kind = 'warmup'
+key = kind + '\\t' + tg.getName().replace('\\t', ' ').replace('\\n', ' ') + '\\t' + r.getSampleLabel().replace('\\t', ' ').replace('\\n', ' ')
+"""
+
+    def __init__(self, warmup_seconds: Optional[float] = None, warmup_iterations: Optional[int] = None) -> None:
+        """
+
+        Args:
+
+            warmup_seconds (Optional[float]): samples of the main thread groups started during this time
+            from the start of the test are reported apart from the headline numbers
+
+            warmup_iterations (Optional[int]): the first iterations of each thread of the main thread groups
+            are reported apart from the headline numbers
+        """
+        warmup_conditions = ""
+        if warmup_seconds:
+            warmup_conditions += (
+                " || r.getStartTime() - org.apache.jmeter.threads.JMeterContextService.getTestStartTime()"
+                f" < {round(warmup_seconds * 1000)}"
+            )
+        if warmup_iterations:
+            warmup_conditions += f" || vars.getIteration() <= {int(warmup_iterations)}"
+        self._stats = None
+        self._aggregation = aggregation(
+            StatsCollector.state_key,
+            StatsCollector.key_script.replace("{warmup_variable}", WARMUP_VARIABLE).replace(
+                "{warmup_conditions}", warmup_conditions
+            ),
+        )
+        self._stats_collector_instance = StatsCollector.jmeter_class.jsr223PostProcessor(
+            self._aggregation.script
+        )
+        super().__init__()
+
+    def children(self, *children):
+        raise ChildrenAreNotAllowed("Cant append children to a stats collector")
+
+    def test_started(self):
+        self._stats = StatsCollector.java_concurrent_hash_map()
+        StatsCollector.java_system.getProperties().put(
+            StatsCollector.state_key, self._stats
+        )
+        self._aggregation.test_started()
+
+    def test_ended(self):
+        self._aggregation.test_ended()
+        StatsCollector.java_system.getProperties().remove(StatsCollector.state_key)
+
+    def collect(self, java_test_plan_stats=None) -> Tuple[float, Dict[Tuple[str, str, str], SampleStats]]:
+        """
+        transfers the aggregated results and the test duration from the JVM in a single call,
+        may be called while the test is running
+
+        Args:
+
+            java_test_plan_stats: the stats object returned by JMeter DSL, the returned duration is 0 without it
+
+        Returns:
+
+            Tuple[float, Dict[Tuple[str, str, str], SampleStats]]: the test duration in milliseconds,
+            and stats keyed by thread group kind (main, setup or teardown), thread group name and label
+        """
+        stats = self._stats if self._stats is not None else StatsCollector.java_concurrent_hash_map()
+        return parse_export(
+            StatsCollector.export_script(stats=stats, testPlanStats=java_test_plan_stats)
+        )
+
+
+class StageStatsCollector:
+    """
+    Aggregates the sample results of a thread group by stage of its load profile, inside the JVM.
+
+    Samples are assigned to the stage running when they started, relative to the start of the test.
+    """
+
+    export_script = StatsCollector.export_script
+
+    def __init__(self, stage_end_offsets_milliseconds: Iterable[int]) -> None:
+        """
+
+        Args:
+
+            stage_end_offsets_milliseconds (Iterable[int]): time from the start of the test to the end of each stage,
+            samples started after the end of the last stage are assigned to the last stage
+        """
+        self.stage_end_offsets_milliseconds = [int(offset) for offset in stage_end_offsets_milliseconds]
+        self._key = f"pymeter.stages.{uuid.uuid4().hex}"
+        self._stats = None
+        self._aggregation = aggregation(
+            self._key,
+            """
+long offset = r.getStartTime() - org.apache.jmeter.threads.JMeterContextService.getTestStartTime()
+long[] ends = [{ends}] as long[]
+int stage = 0
+while (stage < ends.length - 1 && offset >= ends[stage]) stage++
+key = String.valueOf(stage)
+""".replace("{ends}", ", ".join(str(offset) for offset in self.stage_end_offsets_milliseconds)),
+        )
+        self.script = self._aggregation.script
+
+    def test_started(self):
+        """registers the aggregation map of a new test"""
+        self._stats = StatsCollector.java_concurrent_hash_map()
+        StatsCollector.java_system.getProperties().put(self._key, self._stats)
+        self._aggregation.test_started()
+
+    def test_ended(self):
+        """aggregates the results still pending, then unregisters the aggregation map"""
+        self._aggregation.test_ended()
+        StatsCollector.java_system.getProperties().remove(self._key)
+
+    def collect(self) -> List[SampleStats]:
+        """returns the stats of each stage, may be called while the test is running"""
+        if self._stats is None:
+            return [SampleStats() for _ in self.stage_end_offsets_milliseconds]
+        _, collected = parse_export(StageStatsCollector.export_script(stats=self._stats, testPlanStats=None))
+        return [
+            collected.get((str(stage),), SampleStats())
+            for stage in range(len(self.stage_end_offsets_milliseconds))
+        ]
+
+
+def parse_export(text: str) -> Tuple[float, Dict[tuple, SampleStats]]:
+    """parses the stats exported from the JVM, keys are split on tabs into tuples"""
+    duration_nanoseconds, *lines = text.splitlines()
+    collected = {}
+    for line in lines:
+        *key, counters, histogram = line.split("\t")
+        (
+            count,
+            errors,
+            received_bytes,
+            sent_bytes,
+            sample_time_sum,
+            first_timestamp,
+            last_timestamp,
+            latency_sum,
+            connect_time_sum,
+            connections,
+        ) = (int(c) for c in counters.split(","))
+        collected[tuple(key)] = SampleStats(
+            count,
+            errors,
+            received_bytes,
+            sent_bytes,
+            sample_time_sum,
+            first_timestamp,
+            last_timestamp,
+            latency_sum,
+            connect_time_sum,
+            {
+                int(value): int(n)
+                for value, n in (pair.split(":") for pair in histogram.split(",") if pair)
+            },
+            connections,
+        )
+    return int(duration_nanoseconds) / 1_000_000, collected
@@ -0,0 +1,222 @@
+"""
+The sweep module runs a test plan at a series of load levels, to find the level at which the system under test saturates.
+
+Each level is a number of threads, or a number of iterations per second, given to all the main thread groups
+of the plan that have one: `ThreadGroupSimple` and `ThreadGroupWithRampUpAndHold` for threads,
+`ArrivalRateThreadGroup` for rates. The plan is rebuilt from its node for each level and run in the same JVM,
+one level after the other, so only the first level pays for the JVM startup and warmup.
+
+The saturation knee is the last level before throughput flattens while sample times bend upwards:
+going from a level to the next one, the relative throughput increase is less than `elasticity` times the relative load
+increase, and the relative increase of the mean sample time is more than `elasticity` times the relative load increase.
+When the plan is past its knee, adding load only adds queueing.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+            from pymeter.api.sweep import sweep
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            test_plan = TestPlan(ThreadGroupWithRampUpAndHold(1, 5, 30, http_sampler))
+
+            result = sweep(test_plan, threads=[5, 10, 20, 40, 80])
+            print(result.table())
+            print(result.knee)
+
+example - 2:
+--------------
+Rates are swept the same way with arrival rate thread groups, `max_threads` must allow the highest rate.
+
+      .. code-block:: python
+
+            from pymeter.api.config import ArrivalRateThreadGroup
+
+            test_plan = TestPlan(ArrivalRateThreadGroup(1, 5, 30, 500, http_sampler))
+            result = sweep(test_plan, rps=[50, 100, 200, 400], cooldown_seconds=10)
+            for row in result.rows():
+                print(row)
+"""
+import time
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+from pymeter.api import ElementNode
+from pymeter.api.config import TestPlan
+from pymeter.api.stats import SampleStats
+
+KINDS = ("threads", "rps")
+
+
+class SweepLevel(NamedTuple):
+    """results of the plan run at one load level"""
+
+    level: float
+    stats: SampleStats
+    # relative throughput increase over the relative load increase since the previous level, None for the first level
+    throughput_elasticity: Optional[float] = None
+    # relative mean sample time increase over the relative load increase since the previous level
+    latency_elasticity: Optional[float] = None
+
+
+class SweepResult(NamedTuple):
+    """results of a sweep"""
+
+    # `threads` or `rps`
+    kind: str
+    levels: List[SweepLevel]
+    # the last level before saturation, None if the plan didn't saturate
+    knee: Optional[float]
+
+    def rows(self) -> List[dict]:
+        """returns one flat dictionary per level"""
+        return [
+            {
+                self.kind: level.level,
+                "samples": level.stats.count,
+                "error_rate": level.stats.error_rate,
+                "throughput_per_second": level.stats.throughput_per_second,
+                "sample_time_mean_milliseconds": level.stats.sample_time_mean_milliseconds,
+                "sample_time_median_milliseconds": level.stats.sample_time_median_milliseconds,
+                "sample_time_90_percentile_milliseconds": level.stats.sample_time_90_percentile_milliseconds,
+                "sample_time_99_percentile_milliseconds": level.stats.sample_time_99_percentile_milliseconds,
+                "throughput_elasticity": level.throughput_elasticity,
+                "latency_elasticity": level.latency_elasticity,
+                "knee": level.level == self.knee,
+            }
+            for level in self.levels
+        ]
+
+    def table(self) -> str:
+        """returns the results as a fixed width text table, one line per level, the knee is marked"""
+        header = (
+            f"{self.kind:>10} {'samples':>9} {'errors':>7} {'rps':>10} {'mean ms':>9} {'p50 ms':>7} {'p90 ms':>7} "
+            f"{'p99 ms':>7} {'tput el.':>8} {'lat. el.':>8}"
+        )
+        lines = [header]
+        for row in self.rows():
+            lines.append(
+                f"{row[self.kind]:>10g} {row['samples']:>9} {row['error_rate']:>7.2%} "
+                f"{row['throughput_per_second']:>10.2f} {row['sample_time_mean_milliseconds']:>9.2f} "
+                f"{row['sample_time_median_milliseconds']:>7} {row['sample_time_90_percentile_milliseconds']:>7} "
+                f"{row['sample_time_99_percentile_milliseconds']:>7} {_format_elasticity(row['throughput_elasticity'])} "
+                f"{_format_elasticity(row['latency_elasticity'])}" + ("  <- knee" if row["knee"] else "")
+            )
+        return "\n".join(lines)
+
+
+def _format_elasticity(value: Optional[float]) -> str:
+    return f"{'-':>8}" if value is None else f"{value:>8.2f}"
+
+
+def _elasticity(previous: float, current: float, load_growth: float) -> Optional[float]:
+    if previous <= 0 or load_growth <= 0:
+        return None
+    return (current / previous - 1) / load_growth
+
+
+def analyze(kind: str, levels: Sequence[float], all_stats: Sequence[SampleStats], elasticity: float = 0.5) -> SweepResult:
+    """
+    computes the elasticities between consecutive levels and finds the saturation knee
+
+    Args:
+
+        kind (str): `threads` or `rps`
+
+        levels (Sequence[float]): the load levels, in increasing order
+
+        all_stats (Sequence[SampleStats]): the stats of each level
+
+        elasticity (float): threshold of the throughput and latency elasticities a level is saturated at
+    """
+    results: List[SweepLevel] = []
+    knee = None
+    for index, (level, stats) in enumerate(zip(levels, all_stats)):
+        if index == 0:
+            results.append(SweepLevel(level, stats))
+            continue
+        previous_level, previous_stats = levels[index - 1], all_stats[index - 1]
+        load_growth = level / previous_level - 1 if previous_level > 0 else 0.0
+        throughput_elasticity = _elasticity(
+            previous_stats.throughput_per_second, stats.throughput_per_second, load_growth
+        )
+        latency_elasticity = _elasticity(
+            previous_stats.sample_time_mean_milliseconds, stats.sample_time_mean_milliseconds, load_growth
+        )
+        results.append(SweepLevel(level, stats, throughput_elasticity, latency_elasticity))
+        if (
+            knee is None
+            and throughput_elasticity is not None
+            and latency_elasticity is not None
+            and throughput_elasticity < elasticity
+            and latency_elasticity > elasticity
+        ):
+            knee = previous_level
+    return SweepResult(kind, results, knee)
+
+
+def at_level(node: ElementNode, kind: str, level: float) -> ElementNode:
+    """
+    returns a copy of a test plan node, with the load of its thread groups set to `level`
+
+    Args:
+
+        node (ElementNode): the test plan node
+
+        kind (str): `threads` or `rps`
+
+        level (float): the number of threads or of iterations per second
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown load kind `{kind}`, expected `threads` or `rps`")
+    matched = []
+
+    def set_level(element_node: ElementNode) -> ElementNode:
+        argument = getattr(element_node.element_type(), f"{kind}_argument", None)
+        if argument is not None:
+            matched.append(element_node)
+            element_node = element_node.replace(**{argument: level})
+        return element_node.map_nodes(set_level)
+
+    result = set_level(node)
+    if not matched:
+        raise ValueError(f"The test plan has no thread group with a number of {kind}")
+    return result
+
+
+def sweep(
+    test_plan: TestPlan,
+    threads: Optional[Iterable[int]] = None,
+    rps: Optional[Iterable[float]] = None,
+    cooldown_seconds: float = 0.0,
+    elasticity: float = 0.5,
+) -> SweepResult:
+    """
+    runs the test plan at each load level, one after the other in the same JVM
+
+    Args:
+
+        test_plan (TestPlan): the test plan, the load of its thread groups is replaced by each level
+
+        threads (Optional[Iterable[int]]): numbers of threads to run the plan with
+
+        rps (Optional[Iterable[float]]): numbers of iterations per second to run the plan with
+
+        cooldown_seconds (float): pause between two levels, to let the system under test settle
+
+        elasticity (float): threshold of the throughput and latency elasticities a level is saturated at
+    """
+    if (threads is None) == (rps is None):
+        raise ValueError("Either threads or rps levels are required")
+    kind = "threads" if threads is not None else "rps"
+    levels = sorted(threads if threads is not None else rps)
+    if not levels or levels[0] <= 0:
+        raise ValueError("Levels must be positive")
+    all_stats = []
+    for index, level in enumerate(levels):
+        if index and cooldown_seconds:
+            time.sleep(cooldown_seconds)
+        all_stats.append(at_level(test_plan.node, kind, level).replace(breakdown=True).build().run().overall)
+    return analyze(kind, levels, all_stats, elasticity)
@@ -0,0 +1,369 @@
+"""
+The timeline module records how the results of a test evolve over time, in fixed interval buckets per sampler label.
+
+Headline numbers collapse a whole test into a single set of percentiles, warmup, garbage collection pauses and
+degradations in the middle of a test don't show in them. A `Timeline` appended to a test plan counts the samples,
+errors and sample times of each label in buckets of `interval_seconds`, by the time the samples started.
+
+Buckets are aggregated inside the JVM and moved to python every `flush_interval_seconds` while the test is running,
+so the memory used by the JVM doesn't grow with the length of the test. Sample times are kept in a log-linear histogram,
+exact below 128 milliseconds, and rounded down by less than 1.6% above, so a bucket holds a bounded number of values
+whatever its number of samples.
+
+The series of a label are arrays with one value per bucket, buckets without samples included,
+they can be sliced by a time range relative to the start of the timeline.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+            from pymeter.api.timeline import Timeline
+
+            http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+            timeline = Timeline(interval_seconds=1)
+            TestPlan(ThreadGroupWithRampUpAndHold(10, 10, 120, http_sampler), timeline).run()
+
+            series = timeline.series()["echo_get_request"]
+            print(series.throughput_per_second)
+            print(series.percentile(99))
+
+            # results once the ramp up is over
+            steady = series.between(10, 120)
+            print(steady.stats().sample_time_99_percentile_milliseconds)
+"""
+import bisect
+import threading
+import time
+import uuid
+from array import array
+from typing import Dict, List, Optional
+
+from pymeter.api import (
+    AfterAssertions,
+    ChildrenAreNotAllowed,
+    ElementNode,
+    GroovyScript,
+    JavaClass,
+    TestPlanChildElement,
+)
+from pymeter.api.config import _detach
+from pymeter.api.stats import SampleStats
+
+# sample times from this value on are rounded down to 64 values per power of two
+EXACT_MILLISECONDS = 128
+
+
+def histogram_value(milliseconds: int) -> int:
+    """returns the value a sample time is recorded as in the log-linear histograms of timelines"""
+    if milliseconds < EXACT_MILLISECONDS:
+        return milliseconds
+    shift = milliseconds.bit_length() - 7
+    return milliseconds >> shift << shift
+
+
+class TimeSeries:
+    """
+    results of a label in consecutive buckets of a fixed interval, each attribute holds one value per bucket
+    """
+
+    __slots__ = ("interval_milliseconds", "start_milliseconds", "count", "errors", "sample_time_sum_milliseconds", "histograms")
+
+    def __init__(
+        self,
+        interval_milliseconds: int,
+        start_milliseconds: int,
+        count: array,
+        errors: array,
+        sample_time_sum_milliseconds: array,
+        histograms: List[Dict[int, int]],
+    ) -> None:
+        self.interval_milliseconds = interval_milliseconds
+        # epoch time of the start of the first bucket
+        self.start_milliseconds = start_milliseconds
+        self.count = count
+        self.errors = errors
+        self.sample_time_sum_milliseconds = sample_time_sum_milliseconds
+        self.histograms = histograms
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    @property
+    def offsets_seconds(self) -> array:
+        """returns the start of each bucket, in seconds from the start of the first bucket"""
+        return array("d", (index * self.interval_milliseconds / 1000 for index in range(len(self))))
+
+    @property
+    def throughput_per_second(self) -> array:
+        """returns the number of samples per second of each bucket"""
+        return array("d", (count * 1000 / self.interval_milliseconds for count in self.count))
+
+    @property
+    def error_rate(self) -> array:
+        """returns the ratio of failed samples of each bucket"""
+        return array("d", (errors / count if count else 0.0 for count, errors in zip(self.count, self.errors)))
+
+    @property
+    def sample_time_mean_milliseconds(self) -> array:
+        """returns the mean sample time of each bucket"""
+        return array(
+            "d",
+            (total / count if count else 0.0 for count, total in zip(self.count, self.sample_time_sum_milliseconds)),
+        )
+
+    def percentile(self, percent: float) -> array:
+        """returns the given percentile of sample times of each bucket, 0 for buckets without samples"""
+        return array("q", (bucket.percentile(percent) for bucket in self.buckets()))
+
+    def buckets(self) -> List[SampleStats]:
+        """returns the stats of each bucket"""
+        return [
+            SampleStats(
+                count=self.count[index],
+                errors=self.errors[index],
+                sample_time_sum_milliseconds=self.sample_time_sum_milliseconds[index],
+                first_timestamp_milliseconds=self.start_milliseconds + index * self.interval_milliseconds,
+                last_timestamp_milliseconds=self.start_milliseconds + (index + 1) * self.interval_milliseconds,
+                histogram=self.histograms[index],
+            )
+            for index in range(len(self))
+        ]
+
+    def stats(self) -> SampleStats:
+        """returns the stats of all the buckets together"""
+        return SampleStats.combine(self.buckets())
+
+    def between(self, start_seconds: Optional[float] = None, end_seconds: Optional[float] = None) -> "TimeSeries":
+        """
+        returns the buckets starting in a time range
+
+        Args:
+
+            start_seconds (Optional[float]): start of the range, in seconds from the start of the first bucket
+
+            end_seconds (Optional[float]): end of the range, excluded
+        """
+        offsets = self.offsets_seconds
+        start = 0 if start_seconds is None else bisect.bisect_left(offsets, start_seconds)
+        end = len(self) if end_seconds is None else bisect.bisect_left(offsets, end_seconds)
+        end = max(start, end)
+        return TimeSeries(
+            self.interval_milliseconds,
+            self.start_milliseconds + start * self.interval_milliseconds,
+            self.count[start:end],
+            self.errors[start:end],
+            self.sample_time_sum_milliseconds[start:end],
+            self.histograms[start:end],
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(interval_milliseconds={self.interval_milliseconds}, "
+            f"start_milliseconds={self.start_milliseconds}, count={self.count.tolist()})"
+        )
+
+
+class Timeline(TestPlanChildElement):
+    """
+    Records the results of each label in fixed interval buckets.
+    """
+
+    jmx_cacheable = False
+
+    java_system = JavaClass("java.lang.System")
+    java_concurrent_hash_map = JavaClass("java.util.concurrent.ConcurrentHashMap")
+
+    setup_script = """
+def timeline = System.getProperties().get("{key}")
+if (timeline == null) return
+"""
+
+    key_script = """
+key = r.getStartTime().intdiv({interval}) + '\\t' + r.getSampleLabel().replace('\\t', ' ').replace('\\n', ' ')
+"""
+
+    # counters of a bucket: count, errors, sum of sample times, and whether the bucket was exported,
+    # a bucket exported before a late sample is handled is created again, and merged by the next flush
+    handle_script = """
+long elapsed = r.getTime()
+long value = elapsed
+if (elapsed >= {exact}) {
+    int shift = 64 - Long.numberOfLeadingZeros(elapsed) - 7
+    value = (elapsed >> shift) << shift
+}
+while (true) {
+    def entry = timeline.get(key)
+    if (entry == null) {
+        timeline.putIfAbsent(key, [new long[4], new HashMap<Long, Long>()] as Object[])
+        continue
+    }
+    def c = entry[0]
+    def h = entry[1]
+    synchronized (c) {
+        if (c[3] != 0) continue
+        c[0]++
+        if (!r.isSuccessful()) c[1]++
+        c[2] += elapsed
+        Long seen = h.get(value)
+        h.put(value, seen == null ? 1L : seen + 1L)
+    }
+    break
+}
+"""
+
+    export_script = GroovyScript(
+        """
+def out = new StringBuilder()
+long first = Long.parseLong(before)
+for (key in new ArrayList(timeline.keySet())) {
+    if (Long.parseLong(key.substring(0, key.indexOf('\\t'))) >= first) continue
+    def entry = timeline.remove(key)
+    if (entry == null) continue
+    def c = entry[0]
+    def h = entry[1]
+    synchronized (c) {
+        c[3] = 1
+        out.append(key).append('\\t').append(c[0]).append(',').append(c[1]).append(',').append(c[2]).append('\\t')
+        def separator = ''
+        h.each { value, count ->
+            out.append(separator).append(value).append(':').append(count)
+            separator = ','
+        }
+        out.append('\\n')
+    }
+}
+out.toString()
+"""
+    )
+
+    def __init__(self, interval_seconds: float = 1.0, flush_interval_seconds: float = 5.0) -> None:
+        """
+
+        Args:
+
+            interval_seconds (float): length of the buckets
+
+            flush_interval_seconds (float): time between two transfers of the completed buckets to python
+        """
+        self.interval_milliseconds = int(interval_seconds * 1000)
+        if self.interval_milliseconds < 1 or flush_interval_seconds <= 0:
+            raise ValueError("interval_seconds and flush_interval_seconds must be positive")
+        self.flush_interval_seconds = flush_interval_seconds
+        self._key = f"pymeter.timeline.{uuid.uuid4().hex}"
+        # [count, errors, sum of sample times, histogram] by label and by bucket index
+        self._buckets: Dict[str, Dict[int, list]] = {}
+        self._lock = threading.Lock()
+        self._timeline = None
+        self._ended = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._after_assertions = AfterAssertions(
+            self._key,
+            Timeline.setup_script.replace("{key}", self._key),
+            Timeline.key_script.replace("{interval}", str(self.interval_milliseconds)),
+            Timeline.handle_script.replace("{exact}", str(EXACT_MILLISECONDS)),
+        )
+        self._timeline_instance = Timeline.jmeter_class.jsr223PostProcessor(self._after_assertions.script)
+        super().__init__()
+
+    def children(self, *children):
+        raise ChildrenAreNotAllowed("Cant append children to a timeline")
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        raise ValueError("Timeline can't record results from worker processes")
+
+    def test_started(self):
+        with self._lock:
+            self._buckets = {}
+        self._timeline = Timeline.java_concurrent_hash_map()
+        Timeline.java_system.getProperties().put(self._key, self._timeline)
+        self._after_assertions.test_started()
+        self._ended.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="pymeter-timeline", daemon=True)
+        self._flusher.start()
+
+    def test_ended(self):
+        self._ended.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self._after_assertions.test_ended()
+        Timeline.java_system.getProperties().remove(self._key)
+        self.flush()
+
+    def _flush_periodically(self):
+        try:
+            while not self._ended.wait(self.flush_interval_seconds):
+                # samples of the previous bucket may still be running, only older buckets are complete
+                self.flush(int(time.time() * 1000) // self.interval_milliseconds - 1)
+        finally:
+            _detach()
+
+    def flush(self, before: int = 2**63 - 1) -> None:
+        """
+        moves the buckets aggregated by the JVM to python
+
+        Args:
+
+            before (int): index of the first bucket kept in the JVM, all the buckets are moved by default
+        """
+        if self._timeline is None:
+            return
+        text = Timeline.export_script(timeline=self._timeline, before=str(before))
+        with self._lock:
+            for line in text.splitlines():
+                index, label, counters, histogram = line.split("\t")
+                count, errors, total = (int(counter) for counter in counters.split(","))
+                bucket = self._buckets.setdefault(label, {}).setdefault(int(index), [0, 0, 0, {}])
+                bucket[0] += count
+                bucket[1] += errors
+                bucket[2] += total
+                if histogram:
+                    for pair in histogram.split(","):
+                        value, value_count = pair.split(":")
+                        bucket[3][int(value)] = bucket[3].get(int(value), 0) + int(value_count)
+
+    def series(self) -> Dict[str, TimeSeries]:
+        """returns the series of each label, all of them cover the same buckets, may be called while the test is running"""
+        with self._lock:
+            indexes = [index for buckets in self._buckets.values() for index in buckets]
+            if not indexes:
+                return {}
+            first, last = min(indexes), max(indexes)
+            return {
+                label: self._series(buckets, first, last) for label, buckets in sorted(self._buckets.items())
+            }
+
+    def overall(self) -> Optional[TimeSeries]:
+        """returns the series of all the labels together, None if no sample was recorded"""
+        all_series = list(self.series().values())
+        if not all_series:
+            return None
+        histograms: List[Dict[int, int]] = [{} for _ in range(len(all_series[0]))]
+        for series in all_series:
+            for merged, histogram in zip(histograms, series.histograms):
+                for value, count in histogram.items():
+                    merged[value] = merged.get(value, 0) + count
+        return TimeSeries(
+            all_series[0].interval_milliseconds,
+            all_series[0].start_milliseconds,
+            array("q", map(sum, zip(*(series.count for series in all_series)))),
+            array("q", map(sum, zip(*(series.errors for series in all_series)))),
+            array("q", map(sum, zip(*(series.sample_time_sum_milliseconds for series in all_series)))),
+            histograms,
+        )
+
+    def _series(self, buckets: Dict[int, list], first: int, last: int) -> TimeSeries:
+        empty = [0, 0, 0, {}]
+        ordered = [buckets.get(index, empty) for index in range(first, last + 1)]
+        return TimeSeries(
+            self.interval_milliseconds,
+            first * self.interval_milliseconds,
+            array("q", (bucket[0] for bucket in ordered)),
+            array("q", (bucket[1] for bucket in ordered)),
+            array("q", (bucket[2] for bucket in ordered)),
+            [dict(bucket[3]) for bucket in ordered],
+        )
@@ -60,8 +60,43 @@ Constant timer imposes a constant wait time.
             thread_group = ThreadGroupSimple(1, 1, http_sampler, timer)
             test_plan = TestPlan(thread_group)
             stats = test_plan.run()
+
+example - 4:
+--------------
+Throughput timers pace the samplers in their scope to a target number of samples per second,
+shared by all the threads of the scope or per thread.
+Once the test is over, `report()` tells how far the achieved rate ended up from the target.
+
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+            from pymeter.api.timers import ConstantThroughputTimer, ThroughputShapingTimer
+
+            # 20 samples per second, shared by all the threads
+            timer = ConstantThroughputTimer(20)
+            http_sampler = HttpSampler("Echo", "https://postman-echo.com/get?var=1")
+            thread_group = ThreadGroupWithRampUpAndHold(10, 1, 60, http_sampler, timer)
+            TestPlan(thread_group).run()
+            print(timer.report())
+
+            # ramp from 0 to 50 samples per second in 10 seconds, hold for 30 seconds, then go down to 10
+            shaping_timer = ThroughputShapingTimer([(0, 50, 10), (50, 50, 30), (50, 10, 10)])
+
+.. note::
+    A throughput timer can only slow samplers down, the threads of the scope must be able to reach the target rate.
 """
-from pymeter.api import ChildrenAreNotAllowed, ThreadGroupChildElement
+import math
+import uuid
+from typing import List, NamedTuple, Optional, Tuple
+
+from pymeter.api import (
+    ChildrenAreNotAllowed,
+    ElementNode,
+    JavaClass,
+    ThreadGroupChildElement,
+)
 
 
 class BaseTimer(ThreadGroupChildElement):
@@ -100,3 +135,223 @@ class UniformRandomTimer(BaseTimer):
             )
         )
         super().__init__()
+
+
+class ThroughputReport(NamedTuple):
+    """achieved rate of a throughput timer, per thread for per thread timers"""
+
+    target_rps: float
+    achieved_rps: float
+    # samples that were paced by the timer
+    samples: int
+    # samples that started after their slot in the schedule, because the threads couldn't keep up
+    late_samples: int
+
+    @property
+    def deviation(self) -> float:
+        """relative difference between the achieved rate and the target rate"""
+        return self.achieved_rps / self.target_rps - 1 if self.target_rps else 0.0
+
+
+class BaseThroughputTimer(BaseTimer):
+    """
+    base class for timers pacing the samplers in their scope to a schedule of rates.
+
+    The schedule is a list of segments of `(start_rps, end_rps, duration_seconds)`, the rate changes linearly within
+    a segment, and the rate at the end of the last segment is held until the end of the test.
+    The n-th sample is delayed until the time at which the schedule accounts for n samples,
+    so rates are kept on average even though the samples themselves take a varying time.
+    """
+
+    jmx_cacheable = False
+
+    java_system = JavaClass("java.lang.System")
+
+    # counters: test start time, shared sample count, time of the first sample, time of the last sample,
+    # number of threads, late samples
+    script_template = """
+def c = System.getProperties().computeIfAbsent("{key}", { new java.util.concurrent.atomic.AtomicLongArray(6) } as java.util.function.Function)
+long testStart = org.apache.jmeter.threads.JMeterContextService.getTestStartTime()
+if (c.get(0) != testStart) {
+    synchronized (c) {
+        if (c.get(0) != testStart) {
+            for (int i = 1; i < c.length(); i++) c.set(i, 0L)
+            c.set(2, System.currentTimeMillis())
+            c.set(0, testStart)
+        }
+    }
+}
+double[] a = [{start_rates}] as double[]
+double[] b = [{end_rates}] as double[]
+double[] d = [{durations}] as double[]
+long origin
+double k
+if ({per_thread}) {
+    def own = vars.getObject("{key}")
+    if (own == null) {
+        own = [System.currentTimeMillis(), 0L] as long[]
+        vars.putObject("{key}", own)
+        c.incrementAndGet(4)
+    }
+    origin = own[0]
+    k = own[1]++
+    c.incrementAndGet(1)
+} else {
+    origin = c.get(2)
+    k = c.getAndIncrement(1)
+}
+double slot = 0
+for (int i = 0; i <= a.length; i++) {
+    if (i == a.length) {
+        slot += k / b[b.length - 1]
+        break
+    }
+    double segment = (a[i] + b[i]) * d[i] / 2
+    if (k < segment) {
+        double slope = (b[i] - a[i]) / d[i]
+        slot += slope == 0 ? k / a[i] : (Math.sqrt(a[i] * a[i] + 2 * slope * k) - a[i]) / slope
+        break
+    }
+    k -= segment
+    slot += d[i]
+}
+long due = origin + Math.round(slot * 1000)
+long now = System.currentTimeMillis()
+c.accumulateAndGet(3, Math.max(due, now), { x, y -> Math.max(x, y) } as java.util.function.LongBinaryOperator)
+if (due > now) Thread.sleep(due - now) else if (now - due > {tolerance}) c.incrementAndGet(5)
+"""
+
+    # a sample starting later than this after its slot is counted as late
+    late_tolerance_milliseconds = 10
+
+    def _pacer(self, schedule: List[Tuple[float, float, float]], per_thread: bool):
+        self.schedule = [
+            (float(start_rps), float(end_rps), float(duration_seconds))
+            for start_rps, end_rps, duration_seconds in schedule
+        ]
+        if not self.schedule:
+            raise ValueError("The schedule must have at least one segment")
+        if any(
+            start_rps < 0 or end_rps < 0 or duration_seconds <= 0
+            for start_rps, end_rps, duration_seconds in self.schedule
+        ):
+            raise ValueError("Rates can't be negative and durations must be positive")
+        if self.schedule[-1][1] <= 0:
+            raise ValueError("The rate at the end of the schedule must be positive")
+        self.per_thread = per_thread
+        self._key = f"pymeter.throughput.{uuid.uuid4().hex}"
+        # counters of the last test, kept once the test is over
+        self._counters: Optional[List[int]] = None
+        return BaseTimer.jmeter_class.jsr223PreProcessor(
+            BaseThroughputTimer.script_template.replace("{key}", self._key)
+            .replace("{start_rates}", ", ".join(repr(a) for a, _, _ in self.schedule))
+            .replace("{end_rates}", ", ".join(repr(b) for _, b, _ in self.schedule))
+            .replace("{durations}", ", ".join(repr(d) for _, _, d in self.schedule))
+            .replace("{per_thread}", "true" if per_thread else "false")
+            .replace("{tolerance}", str(BaseThroughputTimer.late_tolerance_milliseconds))
+        )
+
+    def scheduled_count(self, elapsed_seconds: float) -> float:
+        """returns the number of samples the schedule accounts for in its first `elapsed_seconds`"""
+        count, remaining = 0.0, elapsed_seconds
+        for start_rps, end_rps, duration_seconds in self.schedule:
+            if remaining <= 0:
+                return count
+            part = min(remaining, duration_seconds)
+            reached = start_rps + (end_rps - start_rps) * part / duration_seconds
+            count += (start_rps + reached) * part / 2
+            remaining -= duration_seconds
+        return count + max(0.0, remaining) * self.schedule[-1][1]
+
+    def test_started(self):
+        super().test_started()
+        self._counters = None
+        BaseThroughputTimer.java_system.getProperties().remove(self._key)
+
+    def test_ended(self):
+        super().test_ended()
+        java_counters = BaseThroughputTimer.java_system.getProperties().remove(self._key)
+        if java_counters is not None:
+            self._counters = [java_counters.get(i) for i in range(java_counters.length())]
+
+    def report(self) -> ThroughputReport:
+        """
+        returns the target and achieved rates of the last test, over the time the timer was pacing samples,
+        may be called while the test is running
+        """
+        counters = self._counters
+        if counters is None:
+            # the counters are created by the pacer on the first sample
+            java_counters = BaseThroughputTimer.java_system.getProperties().get(self._key)
+            if java_counters is None:
+                return ThroughputReport(0.0, 0.0, 0, 0)
+            counters = [java_counters.get(i) for i in range(java_counters.length())]
+        samples = counters[1]
+        threads = max(1, counters[4]) if self.per_thread else 1
+        elapsed_seconds = max(0, counters[3] - counters[2]) / 1000
+        if not elapsed_seconds:
+            return ThroughputReport(0.0, 0.0, samples, counters[5])
+        return ThroughputReport(
+            self.scheduled_count(elapsed_seconds) / elapsed_seconds,
+            samples / threads / elapsed_seconds,
+            samples,
+            counters[5],
+        )
+
+
+class ConstantThroughputTimer(BaseThroughputTimer):
+    """
+    Paces the samplers in its scope to a constant number of samples per second.
+    """
+
+    def __init__(self, rps: float, per_thread: bool = False) -> None:
+        """
+
+        Args:
+
+            rps (float): target number of samples per second
+
+            per_thread (bool): whether the target applies to each thread, or is shared by all the threads of the scope
+        """
+        if rps <= 0 or math.isinf(rps):
+            raise ValueError("rps must be a positive number")
+        self._constant_throughput_timer_instance = self._pacer([(rps, rps, 1)], per_thread)
+        super().__init__()
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        arguments = node.bind().arguments
+        if arguments.get("per_thread"):
+            return node
+        return node.replace(rps=arguments["rps"] / count)
+
+
+class ThroughputShapingTimer(BaseThroughputTimer):
+    """
+    Paces the samplers in its scope to a time varying number of samples per second.
+    """
+
+    def __init__(self, schedule: List[Tuple[float, float, float]], per_thread: bool = False) -> None:
+        """
+
+        Args:
+
+            schedule (List[Tuple[float, float, float]]): segments of `(start_rps, end_rps, duration_seconds)`,
+            the last rate is held once the schedule is over
+
+            per_thread (bool): whether the rates apply to each thread, or are shared by all the threads of the scope
+        """
+        self._throughput_shaping_timer_instance = self._pacer(schedule, per_thread)
+        super().__init__()
+
+    @classmethod
+    def shard(cls, node: ElementNode, index: int, count: int, directory: str) -> ElementNode:
+        arguments = node.bind().arguments
+        if arguments.get("per_thread"):
+            return node
+        return node.replace(
+            schedule=[
+                (start_rps / count, end_rps / count, duration_seconds)
+                for start_rps, end_rps, duration_seconds in arguments["schedule"]
+            ]
+        )
@@ -0,0 +1,175 @@
+"""
+The workers module runs a single test plan in several processes, each of them with its own JVM.
+
+A single JVM caps the load one test plan can generate, and garbage collection in a single heap pauses all threads at once.
+With `TestPlan.run(workers=N)`, N worker processes are started and each one runs a shard of the test plan:
+
+* threads of `ThreadGroupSimple`, `ThreadGroupWithRampUpAndHold` and `ThreadGroupStages` are split between the workers
+* rates and thread caps of `ArrivalRateThreadGroup` and `ArrivalRateStages` are split between the workers
+* rows of `CsvDataset` files are split between the workers, so each row is still used once
+* `HtmlReporter` reports are written to a sub directory per worker
+
+Results of the workers are merged into a single `TestPlanStats`, percentiles are computed from the merged sample times,
+so they are exact.
+
+example - 1:
+--------------
+
+      .. code-block:: python
+
+            from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
+            from pymeter.api.samplers import HttpSampler
+
+            if __name__ == "__main__":
+                http_sampler = HttpSampler("echo_get_request", "https://postman-echo.com/get?var=1")
+                thread_group = ThreadGroupWithRampUpAndHold(400, 10, 60, http_sampler)
+                test_plan = TestPlan(thread_group)
+                stats = test_plan.run(workers=4)
+
+.. note::
+    Worker processes are spawned, so the script must be guarded by `if __name__ == "__main__":`
+"""
+import csv
+import multiprocessing
+import os
+import threading
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from pymeter.api import ElementNode
+from pymeter.api.stats import SampleStats
+
+WORKER_START_TIMEOUT_SECONDS = 600
+
+
+class WorkerError(Exception):
+    """exception raised when a worker process fails"""
+
+
+def split_count(total: int, index: int, count: int) -> int:
+    """returns the share of worker `index` when `total` is split between `count` workers as evenly as possible"""
+    return total // count + (1 if index < total % count else 0)
+
+
+def shard_csv_file(csv_file: str, index: int, count: int, directory: str) -> str:
+    """
+    writes the rows of the csv file assigned to worker `index` to a new file, the header line is kept
+
+    Returns:
+
+        str: path to the new file
+    """
+    name, extension = os.path.splitext(os.path.basename(csv_file))
+    shard_path = os.path.join(directory, f"{name}-{abs(hash(csv_file))}-{index}{extension}")
+    with open(csv_file, newline="", encoding="utf-8") as source, open(
+        shard_path, "w", newline="", encoding="utf-8"
+    ) as shard:
+        reader = csv.reader(source)
+        writer = csv.writer(shard, lineterminator="\n")
+        header = next(reader, None)
+        if header is not None:
+            writer.writerow(header)
+        for row_number, row in enumerate(reader):
+            if row_number % count == index:
+                writer.writerow(row)
+    return shard_path
+
+
+def merge_results(
+    results: List[Tuple[float, Dict[Tuple[str, str, str], SampleStats]]]
+) -> Tuple[float, Dict[Tuple[str, str, str], SampleStats]]:
+    """merges the results of several workers"""
+    grouped: Dict[Tuple[str, str, str], List[SampleStats]] = {}
+    for _, collected in results:
+        for key, stats in collected.items():
+            grouped.setdefault(key, []).append(stats)
+    return (
+        max((duration for duration, _ in results), default=0.0),
+        {key: SampleStats.combine(stats) for key, stats in grouped.items()},
+    )
+
+
+def _worker_main(node: ElementNode, jvm_options: List[str], barrier, connection, jmx_cache: Optional[str] = None):
+    try:
+        import jnius_config  # pylint: disable=import-outside-toplevel
+
+        jnius_config.set_options(*jvm_options)
+        test_plan = node.build()
+        # building doesn't start the JVM anymore, lowering does, the workers start once their JVM is up
+        test_plan.lower()
+        barrier.wait(WORKER_START_TIMEOUT_SECONDS)
+        stats = test_plan.run(jmx_cache=jmx_cache)
+        connection.send(("ok", stats.snapshot().duration_milliseconds, stats.collected, stats.stop_reason))
+    except BaseException:  # pylint: disable=broad-except
+        barrier.abort()
+        connection.send(("error", traceback.format_exc(), None))
+    finally:
+        connection.close()
+
+
+def run_workers(test_plan, workers: int, directory: str, jmx_cache: Optional[str] = None):
+    """
+    runs the test plan in `workers` processes and merges their results
+
+    Args:
+
+        test_plan (TestPlan): the test plan to run
+
+        workers (int): number of worker processes
+
+        directory (str): directory for files created for the workers
+
+        jmx_cache (Optional[str]): directory caching the JMX files of plans, shared by the workers
+
+    Returns:
+
+        TestPlan.TestPlanStats: the merged stats
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from pymeter import configured_jvm_options
+    from pymeter.api.config import TestPlan  # pylint: disable=import-outside-toplevel
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    processes, connections = [], []
+    for index in range(workers):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_worker_main,
+            args=(
+                test_plan.node.shard(index, workers, directory),
+                configured_jvm_options(),
+                barrier,
+                sender,
+                jmx_cache,
+            ),
+            name=f"pymeter-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        processes.append(process)
+        connections.append(receiver)
+
+    replies = [None] * workers
+
+    def receive(index):
+        try:
+            replies[index] = connections[index].recv()
+        except EOFError:
+            replies[index] = ("error", f"worker {index} exited with code {processes[index].exitcode}", None)
+
+    receivers = [threading.Thread(target=receive, args=(index,)) for index in range(workers)]
+    for receiver_thread in receivers:
+        receiver_thread.start()
+    for receiver_thread in receivers:
+        receiver_thread.join()
+    for process in processes:
+        process.join()
+
+    errors = [reply[1] for reply in replies if reply[0] != "ok"]
+    if errors:
+        raise WorkerError("\n".join(errors))
+    duration_milliseconds, collected = merge_results([(reply[1], reply[2]) for reply in replies])
+    stop_reason = next((reply[3] for reply in replies if reply[3]), None)
+    return TestPlan.TestPlanStats(None, collected, duration_milliseconds, stop_reason)
@@ -0,0 +1,44 @@
+"""
+Command line interface of pymeter.
+
+      .. code-block:: bash
+
+            PYMETER_WORKER_TOKEN=<secret> pymeter worker --host 0.0.0.0 --port 7600
+"""
+import argparse
+import os
+from typing import List, Optional
+
+from pymeter.api.distributed import DEFAULT_PORT, Worker
+
+
+def main(argv: Optional[List[str]] = None):
+    """entry point of the `pymeter` command"""
+    parser = argparse.ArgumentParser(prog="pymeter")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker_parser = commands.add_parser("worker", help="run test plans sent by a coordinator")
+    worker_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    worker_parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="port to listen on, 0 picks a free port"
+    )
+    worker_parser.add_argument(
+        "--token",
+        default=os.environ.get("PYMETER_WORKER_TOKEN"),
+        help="secret coordinators must send, required unless listening on localhost, "
+        "defaults to the PYMETER_WORKER_TOKEN environment variable",
+    )
+    arguments = parser.parse_args(argv)
+
+    worker = Worker(arguments.host, arguments.port, arguments.token)
+    host, port = worker.address
+    print(f"listening on {host}:{port}", flush=True)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
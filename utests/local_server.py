@@ -0,0 +1,50 @@
+"""local http server for tests that shouldn't depend on the network"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """records the requests it receives, and keeps connections alive"""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+    response_body = b""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._reply()
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._reply()
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        RecordingHandler.requests.append((self.command, self.path, self.rfile.read(length).decode()))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RecordingHandler.response_body)))
+        self.end_headers()
+        self.wfile.write(RecordingHandler.response_body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class LocalServer:
+    """serves `RecordingHandler` on a free port of the loopback interface"""
+
+    def __init__(self, response_body: bytes = b"") -> None:
+        RecordingHandler.requests = []
+        RecordingHandler.response_body = response_body
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def requests(self):
+        """requests received so far, as (method, path, body) tuples"""
+        return RecordingHandler.requests
+
+    def close(self):
+        """stops the server"""
+        self.server.shutdown()
+        self.server.server_close()
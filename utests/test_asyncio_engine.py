@@ -0,0 +1,117 @@
+"""unittest module"""
+import json
+from unittest import TestCase, main
+
+from pymeter.api import ContentType
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.asyncio_engine import UnsupportedElement, extract, substitute
+from pymeter.api.config import TestPlan, ThreadGroupSimple, ThreadGroupWithRampUpAndHold, Vars
+from pymeter.api.postprocessors import JsonExtractor
+from pymeter.api.samplers import DummySampler, HttpSampler
+from pymeter.api.timers import ConstantTimer
+from utests.local_server import LocalServer
+
+
+class TestHelpers(TestCase):
+    """Testing variable substitution and json extraction"""
+
+    def test_substitute(self):
+        self.assertEqual(substitute("/users/${id}?q=${missing}", {"id": "7"}), "/users/7?q=${missing}")
+        self.assertEqual(substitute("${__Random(1,9)}", {}), "${__Random(1,9)}")
+
+    def test_extract(self):
+        body = json.dumps({"args": {"items": [{"id": 3}, {"id": "x"}]}}).encode()
+        self.assertEqual(extract(body, "args.items[0].id"), "3")
+        self.assertEqual(extract(body, "args.items[-1].id"), "x")
+        self.assertEqual(extract(body, "args.items[0]"), '{"id": 3}')
+        self.assertEqual(extract(body, "args.nothing"), "")
+        self.assertEqual(extract(b"not json", "args"), "")
+
+
+class TestAsyncioEngine(TestCase):
+    """Testing the asyncio engine against a local server"""
+
+    def setUp(self):
+        self.server = LocalServer(json.dumps({"args": {"user": "bob"}}).encode())
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_unsupported_elements(self):
+        thread_group = ThreadGroupWithRampUpAndHold(1, 1, 1, DummySampler("dummy", "ok"))
+        with self.assertRaises(UnsupportedElement):
+            TestPlan(thread_group).run(engine="asyncio")
+        with self.assertRaises(UnsupportedElement):
+            TestPlan(ThreadGroupSimple(1, 1, DummySampler("dummy", "ok")), warmup_seconds=5).run(engine="asyncio")
+        with self.assertRaises(ValueError):
+            TestPlan().run(engine="threads")
+
+    def test_samples(self):
+        login = HttpSampler("login", f"{self.server.base_url}/login", JsonExtractor("user", "args.user"))
+        profile = HttpSampler("profile ${user}", f"{self.server.base_url}/users/${{user}}").post(
+            {"env": "${env}"}, ContentType.APPLICATION_JSON
+        )
+        failing = HttpSampler("failing", f"{self.server.base_url}/", ResponseAssertion().contains_substrings("alice"))
+        thread_group = ThreadGroupSimple(2, 3, login, profile, failing, ConstantTimer(10))
+        stats = TestPlan(thread_group, Vars(env="ci")).run(engine="asyncio")
+        self.assertEqual(stats.overall.count, 18)
+        self.assertEqual(stats.by_label()["profile bob"].count, 6)
+        self.assertEqual(stats.by_label()["failing"].errors, 6)
+        self.assertEqual(stats.overall.connections, 2)
+        self.assertGreaterEqual(stats.duration_milliseconds, 30)
+        self.assertIn(("POST", "/users/bob", '{"env": "ci"}'), self.server.requests)
+
+    def test_keep_alive(self):
+        http_sampler = HttpSampler("local", f"{self.server.base_url}/health").connection_settings(keep_alive=False)
+        stats = TestPlan(ThreadGroupSimple(1, 4, http_sampler)).run(engine="asyncio")
+        self.assertEqual(stats.overall.connections, 4)
+
+    def test_connection_errors(self):
+        self.server.close()
+        http_sampler = HttpSampler("down", self.server.base_url)
+        stats = TestPlan(ThreadGroupSimple(1, 2, http_sampler)).run(engine="asyncio")
+        self.assertEqual(stats.overall.errors, 2)
+
+
+class TestEngineEquivalence(TestCase):
+    """Testing that both engines give the same results for the same test plan"""
+
+    def setUp(self):
+        self.server = LocalServer(json.dumps({"args": {"user": "bob"}}).encode())
+
+    def tearDown(self):
+        self.server.close()
+
+    def run_both(self):
+        results = []
+        for engine in ("jmeter", "asyncio"):
+            login = HttpSampler("login", f"{self.server.base_url}/login", JsonExtractor("user", "args.user"))
+            profile = HttpSampler("profile", f"{self.server.base_url}/users/${{user}}").header("X-Env", "ci")
+            failing = HttpSampler("failing", f"{self.server.base_url}/", ResponseAssertion().contains_substrings("alice"))
+            dummy = DummySampler("dummy", "ok")
+            test_plan = TestPlan(ThreadGroupSimple(3, 4, login, profile, failing, dummy), breakdown=True)
+            results.append((test_plan.run(engine=engine), sorted(self.server.requests)))
+            self.server.requests.clear()
+        return results
+
+    def test_equivalent_results(self):
+        (jmeter_stats, jmeter_requests), (asyncio_stats, asyncio_requests) = self.run_both()
+        self.assertEqual(jmeter_requests, asyncio_requests)
+        self.assertEqual(jmeter_stats.overall.count, asyncio_stats.overall.count)
+        self.assertEqual(
+            {label: (stats.count, stats.errors) for label, stats in jmeter_stats.by_label().items()},
+            {label: (stats.count, stats.errors) for label, stats in asyncio_stats.by_label().items()},
+        )
+        self.assertEqual(
+            set(jmeter_stats.by_thread_group()), set(asyncio_stats.by_thread_group())
+        )
+
+    def test_failed_assertions_are_errors(self):
+        """the jmeter engine counts the samples failing an assertion as errors, like the asyncio engine"""
+        for stats, _ in self.run_both():
+            self.assertEqual(stats.by_label()["failing"].errors, 12)
+            self.assertEqual(stats.overall.errors, 12)
+
+
+if __name__ == "__main__":
+    main()
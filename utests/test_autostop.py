@@ -0,0 +1,52 @@
+"""unittest module"""
+from unittest import TestCase, main
+
+from pymeter.api import ChildrenAreNotAllowed
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.autostop import AutoStop
+from pymeter.api.config import TestPlan, ThreadGroupSimple, ThreadGroupWithRampUpAndHold
+from pymeter.api.samplers import DummySampler
+
+
+class TestAutoStop(TestCase):
+    """Testing stopping tests that break their SLO"""
+
+    def test_invalid_conditions(self):
+        with self.assertRaises(ValueError):
+            AutoStop()
+        with self.assertRaises(ValueError):
+            AutoStop(slo={"latency": 100})
+        with self.assertRaises(ValueError):
+            AutoStop(slo={"p99_ms": 100}, window_seconds=0)
+
+    def test_conditions(self):
+        auto_stop = AutoStop(slo={"error_rate": 0.4, "p99.9_ms": 3000}, min_throughput_per_second=5)
+        script = auto_stop.java_wrapped_element.args[0]
+        self.assertIn("(errorCount / (double) count) > 0.4", script)
+        self.assertIn("percentile(99.9) > 3000.0", script)
+        self.assertIn("count / 10.0 < 5.0", script)
+        for placeholder in ("{key}", "{slots}", "{window}", "{delay}", "{conditions}"):
+            self.assertNotIn(placeholder, script)
+
+    def test_auto_stop_children(self):
+        with self.assertRaises(ChildrenAreNotAllowed):
+            AutoStop(slo={"p99_ms": 100}).children()
+
+    def test_stops_failing_test(self):
+        """every sample fails, the test is stopped long before the end of its hold period"""
+        dummy_sampler = DummySampler("dummy", "ok", ResponseAssertion().contains_substrings("missing"))
+        thread_group = ThreadGroupWithRampUpAndHold(2, 0, 60, dummy_sampler)
+        auto_stop = AutoStop(slo={"error_rate": 0.4}, window_seconds=1, min_samples=10)
+        stats = TestPlan(thread_group, auto_stop, breakdown=True).run()
+        self.assertLess(stats.duration_milliseconds, 20000)
+        self.assertTrue(stats.stop_reason.startswith("error_rate 1.0 > 0.4"))
+
+    def test_passing_test_runs_to_its_end(self):
+        thread_group = ThreadGroupSimple(2, 10, DummySampler("dummy", "ok"))
+        stats = TestPlan(thread_group, AutoStop(slo={"error_rate": 0.4}), breakdown=True).run()
+        self.assertEqual(stats.overall.count, 20)
+        self.assertIsNone(stats.stop_reason)
+
+
+if __name__ == "__main__":
+    main()
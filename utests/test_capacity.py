@@ -0,0 +1,99 @@
+"""unittest module"""
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from pymeter.api.capacity import CapacityProbe, CapacityReport, find_capacity, slo_violations
+from pymeter.api.config import ArrivalRateThreadGroup, TestPlan, ThreadGroupWithRampUpAndHold
+from pymeter.api.samplers import DummySampler
+from pymeter.api.stats import SampleStats
+
+SLO = {"p99_ms": 300, "error_rate": 0.01}
+
+
+def fake_probe(capacity: float):
+    """returns a probe function meeting the SLO up to `capacity`"""
+
+    def run_probe(test_plan, kind, level, slo, **options):
+        passed = level <= capacity
+        return CapacityProbe(
+            level, passed, False, () if passed else ("p99_ms",), 100, 0.0, level * 10.0, 50.0, 100 if passed else 500
+        )
+
+    return run_probe
+
+
+class TestCapacity(TestCase):
+    """Testing the search of the highest load meeting an SLO"""
+
+    def test_slo_violations(self):
+        stats = SampleStats(count=100, errors=2, sample_time_sum_milliseconds=10000, histogram={50: 99, 400: 1})
+        self.assertEqual(slo_violations(SLO, stats), ("error_rate",))
+        self.assertEqual(slo_violations({"p98_ms": 100, "mean_ms": 90}, stats), ("mean_ms",))
+        self.assertEqual(slo_violations({"error_rate": 0.015}, stats, margin=1.5), ())
+        with self.assertRaises(ValueError):
+            slo_violations({"p99": 300}, stats)
+
+    def test_search_threads(self):
+        test_plan = TestPlan(ThreadGroupWithRampUpAndHold(5, 1, 10, DummySampler("dummy", "ok")))
+        with patch("pymeter.api.capacity.probe", fake_probe(37)):
+            report = find_capacity(test_plan, SLO)
+        self.assertEqual(report.kind, "threads")
+        self.assertEqual(report.capacity, 37)
+        # doubling from 5 up to 40, then bisecting down to a single thread
+        self.assertEqual([probe.level for probe in report.probes], [5, 10, 20, 40, 30, 35, 37, 38])
+        self.assertEqual(report.at_capacity.level, 37)
+
+    def test_search_rate(self):
+        test_plan = TestPlan(ArrivalRateThreadGroup(10, 1, 10, 100, DummySampler("dummy", "ok")))
+        with patch("pymeter.api.capacity.probe", fake_probe(55)):
+            report = find_capacity(test_plan, SLO, precision=0.1)
+        self.assertEqual(report.kind, "rps")
+        self.assertLessEqual(report.capacity, 55)
+        self.assertGreater(report.capacity, 55 * 0.9)
+
+    def test_nothing_passes(self):
+        test_plan = TestPlan(ThreadGroupWithRampUpAndHold(4, 1, 10, DummySampler("dummy", "ok")))
+        with patch("pymeter.api.capacity.probe", fake_probe(0)):
+            report = find_capacity(test_plan, SLO)
+        self.assertIsNone(report.capacity)
+        self.assertIsNone(report.at_capacity)
+
+    def test_max_level(self):
+        test_plan = TestPlan(ThreadGroupWithRampUpAndHold(4, 1, 10, DummySampler("dummy", "ok")))
+        with patch("pymeter.api.capacity.probe", fake_probe(1000)):
+            report = find_capacity(test_plan, SLO, max_level=12)
+        self.assertEqual([probe.level for probe in report.probes], [4, 8, 12])
+        self.assertEqual(report.capacity, 12)
+
+    def test_report_round_trip_and_diff(self):
+        test_plan = TestPlan(ThreadGroupWithRampUpAndHold(5, 1, 10, DummySampler("dummy", "ok")))
+        with patch("pymeter.api.capacity.probe", fake_probe(37)):
+            report = find_capacity(test_plan, SLO)
+        with patch("pymeter.api.capacity.probe", fake_probe(30)):
+            regressed = find_capacity(test_plan, SLO)
+        self.assertEqual(CapacityReport.from_json(report.to_json()).to_dict(), report.to_dict())
+        self.assertEqual(report.diff(report), [])
+        self.assertEqual(
+            report.diff(regressed),
+            ["capacity: 37 != 30", "at_capacity.throughput_per_second: 370.0 != 300.0"],
+        )
+
+    def test_invalid_arguments(self):
+        test_plan = TestPlan(ThreadGroupWithRampUpAndHold(5, 1, 10, DummySampler("dummy", "ok")))
+        with self.assertRaises(ValueError):
+            find_capacity(test_plan, {})
+        with self.assertRaises(ValueError):
+            find_capacity(test_plan, {"latency": 3})
+        with self.assertRaises(ValueError):
+            find_capacity(test_plan, SLO, kind="rps")
+
+    def test_find_capacity(self):
+        """the dummy sampler meets the SLO at any level"""
+        test_plan = TestPlan(ThreadGroupWithRampUpAndHold(1, 0, 1, DummySampler("dummy", "ok")))
+        report = find_capacity(test_plan, SLO, max_level=2, poll_interval_seconds=0.2)
+        self.assertEqual(report.capacity, 2)
+        self.assertTrue(all(probe.samples > 0 for probe in report.probes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""unittest module"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future
+from unittest import TestCase, main
+
+from pymeter.api import ContentType
+from pymeter.api.config import CsvDataset, TestPlan, ThreadGroupSimple
+from pymeter.api.distributed import (
+    Coordinator,
+    ProtocolError,
+    Worker,
+    decode_node,
+    decode_stats,
+    encode_node,
+    encode_stats,
+    receive_message,
+    send_message,
+)
+from pymeter.api.samplers import DummySampler, HttpSampler
+from pymeter.api.stats import SampleStats
+
+CSV_FILE_PATH = "utests/resources/test_data.csv"
+
+
+class TestProtocol(TestCase):
+    """Testing messages exchanged by the coordinator and the workers"""
+
+    def test_messages(self):
+        """messages are framed, so several of them can be sent at once"""
+        left, right = socket.socketpair()
+        with left, right:
+            send_message(left, {"type": "ready"})
+            send_message(left, {"type": "done", "duration": 1.5})
+            self.assertDictEqual(receive_message(right), {"type": "ready"})
+            self.assertDictEqual(receive_message(right), {"type": "done", "duration": 1.5})
+            left.close()
+            self.assertIsNone(receive_message(right))
+
+    def test_encode_node(self):
+        """nodes survive encoding, and embedded files are written to the worker directory"""
+        http_sampler = HttpSampler("echo", "https://postman-echo.com/post").post(
+            {"var1": 1}, ContentType.APPLICATION_JSON
+        )
+        test_plan = TestPlan(ThreadGroupSimple(2, 1, http_sampler), CsvDataset(CSV_FILE_PATH))
+        with tempfile.TemporaryDirectory() as directory:
+            node = decode_node(encode_node(test_plan.node), directory)
+            csv_file = node.args[1].args[0]
+            self.assertEqual(os.path.dirname(csv_file), directory)
+            with open(csv_file, encoding="utf-8") as decoded, open(CSV_FILE_PATH, encoding="utf-8") as original:
+                self.assertEqual(decoded.read(), original.read())
+        sampler_node = node.args[0].args[2]
+        self.assertEqual(sampler_node.calls[0][1][1], ContentType.APPLICATION_JSON)
+        self.assertDictEqual(sampler_node.calls[0][1][0], {"var1": 1})
+
+    def test_only_pymeter_elements_are_decoded(self):
+        for element in (
+            "os:system",
+            "pymeter.api.workers:os.system",
+            "pymeter.api.config:time.sleep",
+            "pymeter.api.config:BaseConfigElement.java_duration",
+            "pymeter.api.stats:SampleStats",
+            "pymeter.api.config:TestPlan.__init__.__globals__",
+            "pymeter.apix:TestPlan",
+        ):
+            with self.assertRaises(ProtocolError):
+                decode_node({"element": element, "args": ["ls"], "kwargs": {}, "calls": []}, ".")
+        with self.assertRaises(ProtocolError):
+            decode_node({"element": "pymeter.api.config:TestPlan", "args": [], "kwargs": {}, "calls": [["run", [], {}]]}, ".")
+        node = decode_node(encode_node(HttpSampler("echo", "https://postman-echo.com/get").header("a", "b").node), ".")
+        self.assertEqual(node.calls[0][0], "header")
+
+    def test_token(self):
+        with self.assertRaises(ValueError):
+            Worker("0.0.0.0", 0)
+        worker = Worker("127.0.0.1", 0, token="secret")
+        try:
+            thread = threading.Thread(target=lambda: self._handle_one(worker), daemon=True)
+            thread.start()
+            with socket.create_connection(worker.address) as connection:
+                send_message(connection, {"type": "plan", "token": "wrong", "plan": {}})
+                self.assertEqual(receive_message(connection)["type"], "error")
+            thread.join(5)
+        finally:
+            worker.close()
+
+    @staticmethod
+    def _handle_one(worker):
+        connection, _ = worker._server.accept()  # pylint: disable=protected-access
+        with connection:
+            try:
+                worker.handle(connection)
+            except ProtocolError:
+                pass
+
+    def test_encode_stats(self):
+        collected = {("main", "G", "a"): SampleStats(2, 1, 10, 5, 30, 1000, 2000, 20, 2, {10: 1, 20: 1})}
+        decoded = decode_stats(encode_stats(collected))
+        self.assertEqual(decoded[("main", "G", "a")].to_dict(), collected[("main", "G", "a")].to_dict())
+
+
+class TestWorker(TestCase):
+    """Testing the worker side of a test run"""
+
+    def test_coordinator_disconnects(self):
+        """the test is cancelled once, and the worker stops reading the closed connection"""
+
+        class FakeRun:
+            def __init__(self):
+                self.future = Future()
+                self.cancels = 0
+
+            def done(self):
+                return self.future.done()
+
+            def cancel(self):
+                self.cancels += 1
+                threading.Timer(0.2, self.future.set_result, (None,)).start()
+
+        class FakePlan:
+            def __init__(self):
+                self.run = FakeRun()
+
+            def start(self):
+                return self.run
+
+        test_plan = FakePlan()
+        worker_end, coordinator_end = socket.socketpair()
+        with worker_end:
+            coordinator_end.close()
+            Worker._run(worker_end, test_plan, 0.01)  # pylint: disable=protected-access
+        self.assertEqual(test_plan.run.cancels, 1)
+
+
+class TestCoordinator(TestCase):
+    """Testing execution of a test plan by remote workers"""
+
+    def setUp(self):
+        self.workers = []
+        self.addresses = []
+        for _ in range(2):
+            worker = subprocess.Popen(  # pylint: disable=consider-using-with
+                [sys.executable, "-m", "pymeter", "worker", "--port", "0"],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            self.workers.append(worker)
+            host, port = worker.stdout.readline().split()[-1].rsplit(":", 1)
+            self.addresses.append((host, int(port)))
+
+    def tearDown(self):
+        for worker in self.workers:
+            worker.kill()
+            worker.wait()
+            worker.stdout.close()
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            Coordinator([])
+
+    def test_run(self):
+        """samples of all the workers are merged, and updates are received while the test is running"""
+        updates = []
+        thread_group = ThreadGroupSimple(5, 4, DummySampler("dummy", "hi dummy"), name="G1")
+        coordinator = Coordinator(self.addresses, start_delay_seconds=0.5, update_interval_seconds=0.1)
+        stats = coordinator.run(TestPlan(thread_group), on_update=updates.append)
+        self.assertEqual(stats.by_thread_group()["G1"].count, 20)
+        self.assertGreater(stats.duration_milliseconds, 0)
+        self.assertTrue(updates)
+        self.assertEqual(updates[-1].overall.count, 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""unittest module"""
+import base64
+import io
+import os
+import random
+import struct
+import tempfile
+import zlib
+from unittest import TestCase, main
+
+from pymeter.api.config import TestPlan, ThreadGroupSimple
+from pymeter.api.hdr import HdrHistogram, read_interval_log, write_interval_log
+from pymeter.api.samplers import DummySampler
+from pymeter.api.stats import MAIN, SETUP, SampleStats
+
+
+def sample_stats(first_timestamp_milliseconds: int, values) -> SampleStats:
+    """stats of samples with the given sample times, sent over one second"""
+    histogram = {}
+    for value in values:
+        histogram[value] = histogram.get(value, 0) + 1
+    return SampleStats(
+        count=len(values),
+        sample_time_sum_milliseconds=sum(values),
+        first_timestamp_milliseconds=first_timestamp_milliseconds,
+        last_timestamp_milliseconds=first_timestamp_milliseconds + 1000,
+        histogram=histogram,
+    )
+
+
+class TestHdrHistogram(TestCase):
+    """Testing mergeable latency histograms"""
+
+    def test_layout(self):
+        histogram = HdrHistogram(significant_figures=3)
+        self.assertEqual(histogram.lowest_equivalent_value(2047), 2047)
+        self.assertEqual(histogram.highest_equivalent_value(2047), 2047)
+        self.assertEqual(histogram.lowest_equivalent_value(2049), 2048)
+        self.assertEqual(histogram.highest_equivalent_value(2049), 2049)
+        self.assertEqual(histogram.lowest_equivalent_value(100_001), 99_968)
+        self.assertEqual(histogram.highest_equivalent_value(100_001), 100_031)
+        with self.assertRaises(ValueError):
+            histogram.record(3_600_001)
+        with self.assertRaises(ValueError):
+            HdrHistogram(significant_figures=6)
+
+    def test_percentiles_match_sample_stats(self):
+        values = [random.Random(seed).randint(0, 1500) for seed in range(1000)]
+        stats = sample_stats(0, values)
+        histogram = stats.hdr_histogram()
+        percents = [0, 1, 50, 90, 99, 99.9, 100]
+        self.assertEqual(histogram.percentiles(percents), [stats.percentile(percent) for percent in percents])
+        self.assertEqual(histogram.total_count, 1000)
+        self.assertEqual(histogram.min, min(values))
+        self.assertEqual(histogram.max, max(values))
+        self.assertAlmostEqual(histogram.mean, stats.sample_time_mean_milliseconds)
+
+    def test_relative_error(self):
+        histogram = HdrHistogram(significant_figures=2)
+        for value in (250, 1001, 65_537, 3_000_000):
+            histogram.record(value)
+            self.assertLessEqual(histogram.highest_equivalent_value(value) - value, value / 100)
+            self.assertLessEqual(value - histogram.lowest_equivalent_value(value), value / 100)
+
+    def test_add_and_subtract(self):
+        first = sample_stats(1000, [10, 20, 30]).hdr_histogram()
+        second = sample_stats(5000, [40, 50, 5000]).hdr_histogram()
+        merged = first.copy().add(second)
+        self.assertEqual(merged, sample_stats(1000, [10, 20, 30, 40, 50, 5000]).hdr_histogram())
+        self.assertEqual(merged.start_timestamp_milliseconds, 1000)
+        self.assertEqual(merged.end_timestamp_milliseconds, 6000)
+        self.assertEqual(merged.copy().subtract(first), second)
+        with self.assertRaises(ValueError):
+            first.copy().subtract(second)
+
+    def test_add_different_layouts(self):
+        precise = HdrHistogram(significant_figures=4)
+        precise.record(100_003, 2)
+        coarse = HdrHistogram(significant_figures=2)
+        coarse.add(precise)
+        self.assertEqual(coarse.total_count, 2)
+        self.assertEqual(coarse.lowest_equivalent_value(coarse.percentile(50)), coarse.lowest_equivalent_value(100_003))
+
+    def test_encoding(self):
+        histogram = HdrHistogram()
+        for value in list(range(1, 11)) + [0, 0, 123_456]:
+            histogram.record(value)
+        self.assertEqual(HdrHistogram.decode(histogram.encode()), histogram)
+        self.assertTrue(histogram.encode().startswith("HISTF"))
+        self.assertEqual(HdrHistogram.decode(HdrHistogram().encode()).total_count, 0)
+
+    def test_encoding_layout(self):
+        """the V2 layout: compressed header, then the header and zig-zag counts, zero runs as negative counts"""
+        histogram = HdrHistogram(significant_figures=2)
+        histogram.record(1, 3)
+        histogram.record(200)
+        data = base64.b64decode(histogram.encode())
+        self.assertEqual(struct.unpack(">ii", data[:8])[0], 0x1C849314)
+        encoded = zlib.decompress(data[8:])
+        self.assertEqual(struct.unpack(">iiiiqqd", encoded[:40]), (0x1C849313, 5, 0, 2, 1, 3_600_000, 1.0))
+        # index 0: no value, index 1: 3 values, 198 empty indexes, then 1 value at index 200
+        self.assertEqual(encoded[40:], bytes([0, 6, 0x8B, 0x03, 2]))
+
+    def test_interval_log(self):
+        histograms = []
+        for index in range(3):
+            histogram = sample_stats(1_700_000_000_000 + index * 1000, [10 * (index + 1), 1000]).hdr_histogram()
+            histogram.tag = "main/Thread%20Group/dummy" if index else None
+            histograms.append(histogram)
+        log_file = io.StringIO()
+        write_interval_log(log_file, histograms)
+        lines = log_file.getvalue().splitlines()
+        self.assertEqual(lines[0], "#[Histogram log format version 1.3]")
+        self.assertTrue(lines[1].startswith("#[StartTime: 1700000000.000 (seconds since epoch), "))
+        self.assertTrue(lines[5].startswith("Tag=main/Thread%20Group/dummy,1.000,1.000,1000.000,HISTF"))
+        log_file.seek(0)
+        read = read_interval_log(log_file)
+        self.assertEqual(read, histograms)
+        self.assertEqual([histogram.tag for histogram in read], [None, "main/Thread%20Group/dummy", "main/Thread%20Group/dummy"])
+        self.assertEqual(read[2].start_timestamp_milliseconds, 1_700_000_002_000)
+        self.assertEqual(read[2].end_timestamp_milliseconds, 1_700_000_003_000)
+
+    def test_test_plan_stats_log(self):
+        collected = {
+            (MAIN, "Thread Group", "get, then post"): sample_stats(1000, [10, 20, 30]),
+            (SETUP, "setUp Thread Group", "login"): sample_stats(0, [500]),
+        }
+        stats = TestPlan.TestPlanStats(None, collected, 2000.0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.hlog")
+            stats.write_hdr_log(path)
+            loaded = TestPlan.TestPlanStats.from_hdr_log(path)
+        self.assertEqual(set(loaded.collected), set(collected))
+        self.assertEqual(loaded.by_label()["get, then post"].histogram, {10: 1, 20: 1, 30: 1})
+        self.assertEqual(loaded.overall.sample_time_sum_milliseconds, 60)
+        self.assertEqual(loaded.duration_milliseconds, 1000)
+        self.assertEqual(loaded.by_thread_group()["setUp Thread Group"].count, 1)
+
+    def test_hdr_histogram_of_a_run(self):
+        stats = TestPlan(ThreadGroupSimple(2, 5, DummySampler("dummy", "ok")), breakdown=True).run()
+        histogram = stats.hdr_histogram()
+        self.assertEqual(histogram.total_count, 10)
+        self.assertEqual(histogram.percentile(99), stats.overall.sample_time_99_percentile_milliseconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""unittest module"""
+from unittest import TestCase, main
+
+from pymeter.api import ChildrenAreNotAllowed
+from pymeter.api.config import (
+    HttpConnectionSettings,
+    HttpDefaults,
+    TestPlan,
+    ThreadGroupSimple,
+)
+from pymeter.api.samplers import DummySampler, HttpSampler
+from utests.local_server import LocalServer
+
+
+class TestHttpConnectionSettings(TestCase):
+    """Testing translation of connection settings into JMeter pre-processors"""
+
+    def test_unset_settings_are_left_out(self):
+        script = HttpConnectionSettings(connect_timeout_milliseconds=2000).pre_processor()
+        self.assertIn('sampler.setConnectTimeout("2000")', script)
+        self.assertNotIn("setUseKeepAlive", script)
+        self.assertNotIn("threadFinished", script)
+
+    def test_client(self):
+        script = HttpConnectionSettings(client="Java").pre_processor()
+        self.assertIn('sampler.setImplementation("Java")', script)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            HttpConnectionSettings(client="curl")
+        with self.assertRaises(ValueError):
+            HttpConnectionSettings(max_connections_per_host=0)
+
+    def test_connection_slots_are_registered_per_test(self):
+        settings = HttpConnectionSettings(max_connections_per_host=2)
+        properties = HttpConnectionSettings.java_system.getProperties()
+        settings.test_started()
+        self.assertIsNotNone(properties.get(settings.limits_key))
+        settings.test_ended()
+        self.assertIsNone(properties.get(settings.limits_key))
+
+    def test_http_defaults_children(self):
+        with self.assertRaises(ChildrenAreNotAllowed):
+            HttpDefaults().children(DummySampler("dummy", "ok"))
+
+
+class TestConnectionReuse(TestCase):
+    """Testing connection handling against a local server"""
+
+    def setUp(self):
+        self.server = LocalServer()
+
+    def tearDown(self):
+        self.server.close()
+
+    def run_test_plan(self, *elements, iterations=5):
+        http_sampler = HttpSampler("local", f"{self.server.base_url}/health")
+        test_plan = TestPlan(ThreadGroupSimple(1, iterations, http_sampler), *elements, breakdown=True)
+        return http_sampler, test_plan
+
+    def test_keep_alive(self):
+        """connections are reused from one iteration to the next by default"""
+        _, test_plan = self.run_test_plan(HttpDefaults(keep_alive=True))
+        stats = test_plan.run()
+        self.assertEqual(stats.overall.count, 5)
+        self.assertEqual(stats.overall.connections, 1)
+        self.assertAlmostEqual(stats.overall.connection_reuse_rate, 0.8)
+
+    def test_no_reuse_across_iterations(self):
+        """connections are closed before the first sample of each iteration"""
+        _, test_plan = self.run_test_plan(HttpDefaults(reuse_connections=False))
+        stats = test_plan.run()
+        self.assertEqual(stats.overall.connections, 5)
+
+    def test_sampler_settings_take_precedence(self):
+        http_sampler, test_plan = self.run_test_plan(HttpDefaults(keep_alive=True))
+        http_sampler.connection_settings(keep_alive=False)
+        stats = test_plan.run()
+        self.assertEqual(stats.overall.connections, 5)
+
+    def test_max_connections_per_host(self):
+        http_sampler = HttpSampler("local", f"{self.server.base_url}/health")
+        stats = TestPlan(
+            ThreadGroupSimple(4, 5, http_sampler),
+            HttpDefaults(max_connections_per_host=2, response_timeout_milliseconds=5000),
+            breakdown=True,
+        ).run()
+        self.assertEqual(stats.overall.count, 20)
+        self.assertEqual(stats.overall.errors, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""unittest module"""
+import os
+import tempfile
+from unittest import TestCase, main
+
+from pymeter.api.config import HttpDefaults, TestPlan, ThreadGroupSimple
+from pymeter.api.jmx import JmxTestPlan, plan_digest
+from pymeter.api.reporters import ResultListener
+from pymeter.api.samplers import DummySampler, HttpSampler, PythonSampler
+from pymeter.api.timers import ConstantThroughputTimer
+
+
+def build_test_plan(threads: int = 2) -> TestPlan:
+    """test plan used by the tests"""
+    http_sampler = HttpSampler("echo", "http://localhost/get").header("key", "value")
+    return TestPlan(ThreadGroupSimple(threads, 1, http_sampler))
+
+
+def handle(variables):
+    """function called by the python sampler"""
+    return "ok"
+
+
+class TestPlanDigest(TestCase):
+    """Testing the content hash used to cache the JMX files of plans"""
+
+    def test_digest_follows_the_content(self):
+        self.assertEqual(plan_digest(build_test_plan().node), plan_digest(build_test_plan().node))
+        self.assertNotEqual(plan_digest(build_test_plan().node), plan_digest(build_test_plan(3).node))
+
+    def test_plans_sharing_state_with_python_are_not_cached(self):
+        dummy_sampler = DummySampler("dummy", "ok")
+        for child in (ResultListener(), ThreadGroupSimple(1, 1, dummy_sampler, ConstantThroughputTimer(10))):
+            self.assertIsNone(plan_digest(TestPlan(child).node))
+        self.assertIsNone(plan_digest(TestPlan(ThreadGroupSimple(1, 1, PythonSampler("py", handle))).node))
+
+    def test_plans_limiting_connections_are_not_cached(self):
+        dummy_sampler = DummySampler("dummy", "ok")
+        limited = HttpSampler("echo", "http://localhost/get").connection_settings(max_connections_per_host=2)
+        self.assertIsNone(plan_digest(TestPlan(ThreadGroupSimple(1, 1, limited)).node))
+        self.assertIsNone(
+            plan_digest(TestPlan(ThreadGroupSimple(1, 1, dummy_sampler), HttpDefaults(max_connections_per_host=2)).node)
+        )
+        unlimited = HttpSampler("echo", "http://localhost/get").connection_settings(keep_alive=False)
+        self.assertIsNotNone(plan_digest(TestPlan(ThreadGroupSimple(1, 1, unlimited), HttpDefaults(keep_alive=True)).node))
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            TestPlan.from_jmx("missing.jmx")
+
+    def test_jmx_plans_are_not_split(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jmx_file = os.path.join(directory, "plan.jmx")
+            with open(jmx_file, "w", encoding="utf-8") as jmx:
+                jmx.write("<jmeterTestPlan/>")
+            test_plan = TestPlan.from_jmx(jmx_file)
+            self.assertIsInstance(test_plan, JmxTestPlan)
+            self.assertEqual(test_plan.node.shard(0, 1, directory), test_plan.node.replace(breakdown=True))
+            with self.assertRaises(ValueError):
+                test_plan.node.shard(0, 2, directory)
+
+
+class TestJmx(TestCase):
+    """Testing test plans saved as and loaded from JMX files"""
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jmx_file = os.path.join(directory, "plan.jmx")
+            TestPlan(ThreadGroupSimple(2, 3, DummySampler("dummy", "ok"))).save_as_jmx(jmx_file)
+            self.assertTrue(os.path.exists(jmx_file))
+            stats = TestPlan.from_jmx(jmx_file, breakdown=True).run()
+        # the stats are aggregated once, by the script saved in the file
+        self.assertEqual(stats.overall.count, 6)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            test_plan = TestPlan(ThreadGroupSimple(2, 3, DummySampler("dummy", "ok")), breakdown=True)
+            self.assertEqual(test_plan.run(jmx_cache=directory).overall.count, 6)
+            digest = plan_digest(test_plan.node)
+            self.assertEqual(os.listdir(directory), [f"{digest}.jmx"])
+            test_plan = TestPlan(ThreadGroupSimple(2, 3, DummySampler("dummy", "ok")), breakdown=True)
+            self.assertEqual(test_plan.run(jmx_cache=directory).overall.count, 6)
+
+    def test_cache_shared_by_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            test_plan = TestPlan(ThreadGroupSimple(4, 3, DummySampler("dummy", "ok")))
+            self.assertEqual(test_plan.run(workers=2, jmx_cache=directory).overall.count, 12)
+            # both shards have the same content, a single file is cached
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+
+if __name__ == "__main__":
+    main()
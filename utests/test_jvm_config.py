@@ -0,0 +1,78 @@
+"""unittest module"""
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase, main
+
+from pymeter import jvm_options
+
+PRINT_OPTIONS = (
+    "import pymeter\n"
+    "print(' '.join(pymeter.running_jvm_options()))\n"
+)
+
+
+def run_python(code: str, **env) -> str:
+    """runs code in a fresh interpreter, so the JVM state of the test process doesn't interfere"""
+    return subprocess.check_output(
+        [sys.executable, "-c", code], text=True, env={**os.environ, **env}
+    ).strip()
+
+
+class TestJvmConfig(TestCase):
+    """Testing configuration of the JVM options"""
+
+    def test_jvm_options(self):
+        """arguments are translated to JVM options"""
+        self.assertListEqual(
+            jvm_options("4g", "2g", "G1", True, ["-XX:MaxGCPauseMillis=50"]),
+            ["-Xmx4g", "-Xms2g", "-XX:+UseG1GC", "-XX:+AlwaysPreTouch", "-XX:MaxGCPauseMillis=50"],
+        )
+
+    def test_jvm_options_unknown_gc(self):
+        with self.assertRaises(ValueError):
+            jvm_options(gc="unknown")
+
+    def test_configure_jvm_before_start(self):
+        """options are applied when the JVM starts"""
+        output = run_python(
+            "import pymeter\n"
+            "pymeter.configure_jvm(max_heap='300m', gc='Serial')\n" + PRINT_OPTIONS
+        )
+        self.assertIn("-Xmx300m", output.split())
+        self.assertIn("-XX:+UseSerialGC", output.split())
+
+    def test_configure_jvm_after_start(self):
+        """options that didn't take effect are reported"""
+        output = run_python(
+            "import warnings\n"
+            "import pymeter\n"
+            "pymeter.configure_jvm(max_heap='300m')\n"
+            "from pymeter.api.config import TestPlan, ThreadGroupSimple\n"
+            "from pymeter.api.samplers import DummySampler\n"
+            "# building a plan doesn't start the JVM, lowering it does\n"
+            "TestPlan(ThreadGroupSimple(1, 1, DummySampler('dummy', 'hi dummy'))).lower()\n"
+            "with warnings.catch_warnings(record=True) as caught:\n"
+            "    warnings.simplefilter('always')\n"
+            "    print(pymeter.configure_jvm(max_heap='300m', initial_heap='200m'), len(caught))\n"
+        )
+        self.assertEqual(output, "['-Xmx300m'] 1")
+
+    def test_environment_variable(self):
+        output = run_python(PRINT_OPTIONS, PYMETER_JVM_OPTIONS="-Xmx310m -XX:+UseSerialGC")
+        self.assertIn("-Xmx310m", output.split())
+
+    def test_config_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ini", delete=False) as config_file:
+            config_file.write("[jvm]\nmax_heap = 320m\noptions = -XX:+UseSerialGC\n")
+        try:
+            output = run_python(PRINT_OPTIONS, PYMETER_CONFIG=config_file.name)
+        finally:
+            os.remove(config_file.name)
+        self.assertIn("-Xmx320m", output.split())
+        self.assertIn("-XX:+UseSerialGC", output.split())
+
+
+if __name__ == "__main__":
+    main()
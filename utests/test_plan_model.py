@@ -0,0 +1,72 @@
+"""unittest module"""
+import pickle
+from unittest import TestCase, main
+
+from pymeter.api import JavaBuilder, JavaRecipe
+from pymeter.api.config import TestPlan, ThreadGroupSimple
+from pymeter.api.samplers import DummySampler, HttpSampler
+
+
+def build_test_plan(iterations: int = 1) -> TestPlan:
+    """test plan used by the tests"""
+    http_sampler = HttpSampler("echo", "http://localhost/get").header("key", "value")
+    return TestPlan(ThreadGroupSimple(2, iterations, http_sampler, DummySampler("dummy", "ok")))
+
+
+class TestPlanModel(TestCase):
+    """Testing the JVM independent model of test plans"""
+
+    def test_elements_hold_recipes(self):
+        http_sampler = HttpSampler("echo", "http://localhost/get").header("key", "value")
+        recipe = http_sampler.java_wrapped_element
+        self.assertIsInstance(recipe, JavaRecipe)
+        self.assertIsNone(recipe.java_object)
+        self.assertEqual(recipe.member, "httpSampler")
+        self.assertEqual(recipe.calls, [("header", ("key", "value"))])
+
+    def test_nodes_are_compared_by_value(self):
+        node = build_test_plan().node
+        self.assertEqual(node, build_test_plan().node)
+        self.assertEqual(hash(node), hash(build_test_plan().node))
+        self.assertNotEqual(node, build_test_plan(iterations=2).node)
+        self.assertEqual(pickle.loads(pickle.dumps(node)), node)
+
+    def test_diff(self):
+        differences = build_test_plan().node.diff(build_test_plan(iterations=3).node)
+        self.assertEqual(differences, ["TestPlan.args[0].args[1]: 1 != 3"])
+        self.assertEqual(build_test_plan().node.diff(build_test_plan().node), [])
+
+    def test_lowering(self):
+        """recorded calls are replayed on the java object, later calls are applied right away"""
+        recipe = JavaBuilder("java.time.Duration").ofMillis(5).plusMillis(3)
+        self.assertEqual(recipe.lower().toMillis(), 8)
+        recipe.plusMillis(2)
+        self.assertEqual(recipe.lower().toMillis(), 10)
+
+    def test_bulk_lowering(self):
+        """the recipe tree is built by a single call, shared recipes are built once"""
+        duration = JavaBuilder("java.time.Duration")
+        shared = duration.ofMillis(5)
+        recipe = duration.ofSeconds(1).plus(shared).minus(shared).plus(shared).multipliedBy(2)
+        self.assertEqual(recipe.lower().toMillis(), 2010)
+        self.assertIsNotNone(shared.java_object)
+        # lowered recipes are reused by the recipes built after them
+        self.assertEqual(duration.ofMillis(2).plus(shared).lower().toMillis(), 7)
+        self.assertEqual(duration.ofMillis(2).plus(shared).lower(bulk=False).toMillis(), 7)
+
+    def test_bulk_and_direct_lowering_run_the_same_plan(self):
+        for bulk in (True, False):
+            test_plan = TestPlan(ThreadGroupSimple(2, 3, DummySampler("dummy", "ok")), breakdown=True)
+            test_plan.lower(bulk)
+            self.assertEqual(test_plan.run().overall.count, 6)
+
+    def test_lowered_plan_runs(self):
+        test_plan = TestPlan(ThreadGroupSimple(2, 3, DummySampler("dummy", "ok")), breakdown=True)
+        self.assertEqual(
+            test_plan.get_java_class_name(), "us.abstracta.jmeter.javadsl.core.DslTestPlan"
+        )
+        self.assertEqual(test_plan.run().overall.count, 6)
+
+
+if __name__ == "__main__":
+    main()
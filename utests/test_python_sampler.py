@@ -0,0 +1,130 @@
+"""unittest module"""
+import socket
+from unittest import TestCase, main
+
+from pymeter.api.config import TestPlan, ThreadGroupSimple, Vars
+from pymeter.api.distributed import receive_message, send_message
+from pymeter.api.samplers import PythonProcessPool, PythonSampler, call_python_function
+
+
+def greet(variables):
+    """python sampler function, defined at the top level so worker processes can import it"""
+    if not variables.get("user"):
+        raise ValueError("no user")
+    return f"hello {variables['user']}".encode("utf-8")
+
+
+class TestCallPythonFunction(TestCase):
+    """Testing the outcome of a python sampler call"""
+
+    def test_response(self):
+        self.assertEqual(
+            call_python_function(greet, {"user": "bob"}),
+            {"ok": True, "message": "OK", "response": "hello bob"},
+        )
+        self.assertEqual(call_python_function(lambda variables: None, {})["response"], "")
+
+    def test_exception(self):
+        outcome = call_python_function(greet, {})
+        self.assertFalse(outcome["ok"])
+        self.assertEqual(outcome["message"], "ValueError: no user")
+        self.assertIn("Traceback", outcome["response"])
+
+
+class TestPythonProcessPool(TestCase):
+    """Testing calls to the worker processes of a python sampler"""
+
+    def test_calls(self):
+        pool = PythonProcessPool(greet, 2)
+        try:
+            self.assertEqual(len(pool.ports), 2)
+            for port in pool.ports:
+                with socket.create_connection(("127.0.0.1", port)) as connection:
+                    send_message(connection, {"token": pool.token})
+                    send_message(connection, {"user": "bob"})
+                    self.assertEqual(receive_message(connection)["response"], "hello bob")
+                    send_message(connection, {"user": None})
+                    self.assertFalse(receive_message(connection)["ok"])
+        finally:
+            pool.close()
+
+    def test_wrong_token(self):
+        pool = PythonProcessPool(greet, 1)
+        try:
+            with socket.create_connection(("127.0.0.1", pool.ports[0])) as connection:
+                send_message(connection, {"token": "wrong"})
+                self.assertIsNone(receive_message(connection))
+        finally:
+            pool.close()
+
+    def test_unpicklable_function(self):
+        with self.assertRaises(Exception):
+            PythonProcessPool(lambda variables: "ok", 1)
+
+
+class TestPythonSampler(TestCase):
+    """Testing python samplers run by JMeter threads"""
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(TypeError):
+            PythonSampler("python", "greet")
+        with self.assertRaises(ValueError):
+            PythonSampler("python", greet, processes=-1)
+
+    def test_processes_run_during_tests(self):
+        """processes are started by the test, building the sampler again doesn't start any"""
+        python_sampler = PythonSampler("python", greet, processes=1)
+        self.assertIsNone(python_sampler._pool)  # pylint: disable=protected-access
+        python_sampler.test_started()
+        try:
+            pool = python_sampler._pool  # pylint: disable=protected-access
+            self.assertTrue(pool.processes[0].is_alive())
+        finally:
+            python_sampler.test_ended()
+        self.assertFalse(pool.processes[0].is_alive())
+        self.assertIsNone(python_sampler._pool)  # pylint: disable=protected-access
+
+    def test_sockets_are_closed_with_the_processes(self):
+        python_sampler = PythonSampler("python", greet, processes=1)
+        sockets_key = f"{python_sampler._key}.sockets"  # pylint: disable=protected-access
+        python_sampler.test_started()
+        try:
+            self.assertIsNotNone(PythonSampler.java_system.getProperties().get(sockets_key))
+        finally:
+            python_sampler.test_ended()
+        self.assertIsNone(PythonSampler.java_system.getProperties().get(sockets_key))
+
+    def test_inline_function_is_registered_during_tests(self):
+        python_sampler = PythonSampler("python", greet, processes=0)
+        key = python_sampler._key  # pylint: disable=protected-access
+        self.assertNotIn(key, PythonSampler._callees)  # pylint: disable=protected-access
+        python_sampler.test_started()
+        self.assertIn(key, PythonSampler._callees)  # pylint: disable=protected-access
+        python_sampler.test_ended()
+        self.assertNotIn(key, PythonSampler._callees)  # pylint: disable=protected-access
+        self.assertIsNone(PythonSampler.java_system.getProperties().get(key))
+
+    def run_sampler(self, python_sampler, user):
+        try:
+            test_plan = TestPlan(ThreadGroupSimple(4, 5, python_sampler), Vars(user=user), breakdown=True)
+            return test_plan.run()
+        finally:
+            python_sampler.close()
+
+    def test_process_pool(self):
+        stats = self.run_sampler(PythonSampler("python", greet, variables=["user"], processes=2), "bob")
+        self.assertEqual(stats.overall.count, 20)
+        self.assertEqual(stats.overall.errors, 0)
+
+    def test_inline(self):
+        stats = self.run_sampler(PythonSampler("python", greet, variables=["user"], processes=0), "bob")
+        self.assertEqual(stats.overall.count, 20)
+        self.assertEqual(stats.overall.errors, 0)
+
+    def test_failed_samples(self):
+        stats = self.run_sampler(PythonSampler("python", greet, variables=["user"], processes=1), "")
+        self.assertEqual(stats.overall.errors, 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""unittest module"""
+import io
+import os
+import tempfile
+from unittest import TestCase, main
+
+from pymeter.api.config import TestPlan
+from pymeter.api.replay import (
+    ReplayRecord,
+    ReplayThreadGroup,
+    parse_timestamp,
+    read_combined_log,
+    read_csv_log,
+    write_schedule,
+)
+from utests.local_server import LocalServer
+
+ACCESS_LOG_PATH = "utests/resources/access.log"
+
+
+class TestReplaySchedule(TestCase):
+    """Testing conversion of access logs into a schedule"""
+
+    def test_parse_timestamp(self):
+        self.assertEqual(parse_timestamp("1.5"), 1.5)
+        self.assertEqual(parse_timestamp("1970-01-01T00:00:02Z"), 2)
+
+    def test_read_combined_log(self):
+        """paths are resolved against the base url, other lines are skipped"""
+        with open(ACCESS_LOG_PATH, encoding="utf-8") as log_file:
+            records = list(read_combined_log(log_file, "http://localhost:8080"))
+        self.assertListEqual(
+            [(r.method, r.url) for r in records],
+            [("GET", "http://localhost:8080/health"), ("POST", "http://localhost:8080/orders?id=1")],
+        )
+        self.assertEqual(records[1].timestamp_seconds - records[0].timestamp_seconds, 1)
+
+    def test_read_csv_log(self):
+        """body files are relative to the given directory"""
+        log_file = io.StringIO("timestamp,method,url,body\n10,get,http://a/1,\n11.5,post,http://a/2,b.json\n")
+        records = list(read_csv_log(log_file, "bodies"))
+        self.assertListEqual(
+            records,
+            [
+                ReplayRecord(10, "GET", "http://a/1", None),
+                ReplayRecord(11.5, "POST", "http://a/2", os.path.join("bodies", "b.json")),
+            ],
+        )
+
+    def test_write_schedule(self):
+        """offsets are relative to the first record, and divided by the speed up"""
+        schedule = io.StringIO()
+        count, has_bodies = write_schedule(
+            iter([ReplayRecord(10, "GET", "http://a/1"), ReplayRecord(12, "POST", "http://a/2", "b.json")]),
+            schedule,
+            speed_up=2,
+        )
+        self.assertEqual(count, 2)
+        self.assertTrue(has_bodies)
+        self.assertListEqual(
+            schedule.getvalue().splitlines(),
+            [
+                "replay_offset\treplay_method\treplay_url\treplay_body",
+                "0\tGET\thttp://a/1\t",
+                "1000\tPOST\thttp://a/2\tb.json",
+            ],
+        )
+
+    def test_write_schedule_from_a_given_time(self):
+        schedule = io.StringIO()
+        write_schedule(iter([ReplayRecord(12, "GET", "http://a/1")]), schedule, first_timestamp=10)
+        self.assertEqual(schedule.getvalue().splitlines()[1], "2000\tGET\thttp://a/1\t")
+
+    def test_shards_keep_the_original_times(self):
+        """the requests of each shard are replayed relative to the first request of the whole log"""
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "log.csv")
+            with open(log_path, "w", encoding="utf-8") as log_file:
+                log_file.write("timestamp,method,url,body\n")
+                log_file.writelines(f"{10 + second},GET,http://a/{second},\n" for second in range(4))
+            node = ReplayThreadGroup(log_path, directory=directory).node
+            offsets = []
+            for index in range(2):
+                shard = node.shard(index, 2, directory)
+                self.assertEqual(shard.bind().arguments["first_timestamp_seconds"], 10)
+                replay = shard.build()
+                with open(replay.schedule_file, encoding="utf-8") as schedule:
+                    offsets.extend(int(line.split("\t")[0]) for line in schedule.readlines()[1:])
+        self.assertListEqual(sorted(offsets), [0, 1000, 2000, 3000])
+
+
+class TestReplayThreadGroup(TestCase):
+    """Testing replay of an access log"""
+
+    def setUp(self):
+        self.server = LocalServer()
+        self.base_url = self.server.base_url
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_invalid_log_format(self):
+        with self.assertRaises(ValueError):
+            ReplayThreadGroup(ACCESS_LOG_PATH, log_format="json")
+
+    def test_replay_combined_log(self):
+        """requests are sent with their original inter-arrival times"""
+        replay = ReplayThreadGroup(ACCESS_LOG_PATH, log_format="combined", base_url=self.base_url, threads=2)
+        stats = TestPlan(replay, breakdown=True).run()
+        self.assertEqual(stats.overall.count, 2)
+        self.assertGreaterEqual(stats.duration_milliseconds, 900)
+        self.assertListEqual(
+            [(method, path) for method, path, _ in self.server.requests],
+            [("GET", "/health"), ("POST", "/orders?id=1")],
+        )
+        self.assertEqual(replay.report().sent, 2)
+        self.assertIsNone(ReplayThreadGroup.java_system.getProperties().get(replay._key))
+
+    def test_replay_csv_log_with_bodies(self):
+        """bodies are read from the files referenced by the log"""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "body.json"), "w", encoding="utf-8") as body_file:
+                body_file.write('{"id": 1}')
+            log_path = os.path.join(directory, "log.csv")
+            with open(log_path, "w", encoding="utf-8") as log_file:
+                log_file.write(f"timestamp,method,url,body\n0,POST,{self.base_url}/orders,body.json\n")
+            replay = ReplayThreadGroup(log_path, speed_up=10)
+            TestPlan(replay).run()
+        self.assertListEqual(self.server.requests, [("POST", "/orders", '{"id": 1}')])
+
+
+if __name__ == "__main__":
+    main()
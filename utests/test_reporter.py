@@ -4,9 +4,10 @@ import uuid
 from unittest import TestCase, main
 
 from pymeter.api import ChildrenAreNotAllowed
-from pymeter.api.config import TestPlan, ThreadGroupWithRampUpAndHold
-from pymeter.api.reporters import HtmlReporter
-from pymeter.api.samplers import HttpSampler
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.config import TestPlan, ThreadGroupSimple, ThreadGroupWithRampUpAndHold
+from pymeter.api.reporters import HtmlReporter, ResultListener, SampleRecord
+from pymeter.api.samplers import DummySampler, HttpSampler
 
 
 class TestReporter(TestCase):
@@ -40,6 +41,71 @@ class TestReporter(TestCase):
         self.assertTrue(os.path.exists(path_to_json))
         self.assertTrue(os.path.exists(path_to_html))
 
+    def test_result_listener_children(self):
+        with self.assertRaises(ChildrenAreNotAllowed) as exp:
+            ResultListener().children()
+        self.assertEqual(
+            str(exp.exception),
+            "Cant append children to a reporter",
+        )
+
+    def test_result_listener_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            ResultListener(capacity=0)
+
+    def test_sample_record_from_line(self):
+        """records are parsed from tab separated lines"""
+        record = SampleRecord.from_line("label\t1000\t20\t15\t3\t512\t64\t200\ttrue\tThread Group 1-1")
+        self.assertEqual(
+            record,
+            SampleRecord("label", 1000, 20, 15, 3, 512, 64, "200", True, "Thread Group 1-1"),
+        )
+
+    def test_result_listener_streams_all_samples(self):
+        """every sample should be delivered once the test is over"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        tg = ThreadGroupSimple(5, 20, dummy_sampler)
+        result_listener = ResultListener(batch_size=7)
+        test_run = TestPlan(tg, result_listener).start()
+        records = list(result_listener)
+        test_run.wait()
+        self.assertEqual(len(records), 100)
+        self.assertEqual(result_listener.dropped, 0)
+        self.assertTrue(all(r.label == "dummy" and r.success for r in records))
+
+    def test_result_listener_drops_when_full(self):
+        """a full queue drops results instead of blocking the test"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        tg = ThreadGroupSimple(1, 20, dummy_sampler)
+        result_listener = ResultListener(capacity=5)
+        TestPlan(tg, result_listener).run()
+        self.assertEqual(len(list(result_listener)), 5)
+        self.assertEqual(result_listener.dropped, 15)
+
+    def test_result_listener_reports_failed_assertions(self):
+        """results are streamed once their assertions have run"""
+        dummy_sampler = DummySampler("dummy", "hi dummy", ResponseAssertion().contains_substrings("missing"))
+        tg = ThreadGroupSimple(2, 5, dummy_sampler)
+        result_listener = ResultListener()
+        TestPlan(tg, result_listener).run()
+        records = list(result_listener)
+        self.assertEqual(len(records), 10)
+        self.assertFalse(any(r.success for r in records))
+
+    def test_result_listener_ends_when_the_run_fails(self):
+        """batches end when the test fails before the listener started"""
+
+        class FailingListener(ResultListener):
+            def test_started(self):
+                raise RuntimeError("can't start")
+
+        result_listener = ResultListener()
+        tg = ThreadGroupSimple(1, 1, DummySampler("dummy", "hi dummy"))
+        test_run = TestPlan(tg, FailingListener(), result_listener).start()
+        self.assertEqual(list(result_listener), [])
+        with self.assertRaises(RuntimeError):
+            test_run.wait(timeout=30)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,56 @@
+"""unittest module"""
+import json
+from unittest import TestCase, main
+
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.config import ResponseBodyLimit, TestPlan, ThreadGroupSimple
+from pymeter.api.postprocessors import JsonExtractor
+from pymeter.api.samplers import DummySampler, HttpSampler
+from utests.local_server import LocalServer
+
+RESPONSE_BODY = json.dumps({"id": "abc", "padding": "x" * 100000}).encode()
+
+
+class TestResponseBodyLimit(TestCase):
+    """Testing limits of the response bodies kept in sample results"""
+
+    def setUp(self):
+        self.server = LocalServer(RESPONSE_BODY)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_negative_limit(self):
+        with self.assertRaises(ValueError):
+            ResponseBodyLimit(-1)
+
+    def test_discarded_bodies_are_still_counted(self):
+        """bodies are drained, so received bytes are unchanged"""
+        http_sampler = HttpSampler("large", f"{self.server.base_url}/large").store_response_body(0)
+        stats = TestPlan(ThreadGroupSimple(2, 5, http_sampler), breakdown=True).run()
+        self.assertEqual(stats.overall.count, 10)
+        self.assertEqual(stats.overall.errors, 0)
+        self.assertGreater(stats.overall.received_bytes, 10 * len(RESPONSE_BODY))
+
+    def test_extractor_keeps_the_body(self):
+        """a json extractor in scope turns off the limit of the test plan"""
+        extracting_sampler = HttpSampler(
+            "extracting", f"{self.server.base_url}/extracting", JsonExtractor("id", "id")
+        )
+        discarding_sampler = HttpSampler("discarding", f"{self.server.base_url}/discarding")
+        thread_group = ThreadGroupSimple(
+            1, 2, discarding_sampler, extracting_sampler, DummySampler("extracted ${id}", "ok")
+        )
+        stats = TestPlan(thread_group, max_response_body_bytes=0, breakdown=True).run()
+        self.assertIn("extracted abc", stats.by_label())
+
+    def test_assertion_keeps_the_body(self):
+        """a response assertion in scope turns off the limit of the sampler"""
+        http_sampler = HttpSampler("asserted", f"{self.server.base_url}/asserted").store_response_body(10)
+        http_sampler.children(ResponseAssertion().contains_substrings("padding"))
+        stats = TestPlan(ThreadGroupSimple(1, 3, http_sampler), breakdown=True).run()
+        self.assertEqual(stats.overall.errors, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""unittest module"""
+import subprocess
+import sys
+from unittest import TestCase, main
+
+
+def run_python(code: str) -> str:
+    """runs code in a fresh interpreter, so the JVM state of the test process doesn't interfere"""
+    return subprocess.check_output([sys.executable, "-c", code], text=True).strip()
+
+
+class TestStartup(TestCase):
+    """Testing that the JVM is started lazily"""
+
+    def test_import_does_not_start_jvm(self):
+        """importing the api should neither load pyjnius nor start the JVM"""
+        output = run_python(
+            "import sys\n"
+            "import jnius_config\n"
+            "import pymeter.api.config, pymeter.api.samplers, pymeter.api.timers\n"
+            "import pymeter.api.reporters, pymeter.api.assertions, pymeter.api.postprocessors\n"
+            "from pymeter.api import ContentType\n"
+            "print('jnius' in sys.modules, jnius_config.vm_running)\n"
+        )
+        self.assertEqual(output, "False False")
+
+    def test_building_a_plan_does_not_start_jvm(self):
+        """elements are recorded as recipes, the JVM is started when the plan is lowered"""
+        output = run_python(
+            "import jnius_config\n"
+            "from pymeter.api.config import TestPlan, ThreadGroupSimple\n"
+            "from pymeter.api.samplers import DummySampler\n"
+            "test_plan = TestPlan(ThreadGroupSimple(1, 1, DummySampler('dummy', 'hi dummy')))\n"
+            "print(jnius_config.vm_running)\n"
+            "test_plan.lower()\n"
+            "print(jnius_config.vm_running)\n"
+        )
+        self.assertEqual(output.split(), ["False", "True"])
+
+    def test_content_type_is_resolved_lazily(self):
+        """content types are resolved to java objects on first access"""
+        output = run_python(
+            "from pymeter.api import ContentType\n"
+            "print(ContentType.APPLICATION_JSON.value.getMimeType())\n"
+        )
+        self.assertEqual(output, "application/json")
+
+
+if __name__ == "__main__":
+    main()
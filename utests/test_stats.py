@@ -0,0 +1,181 @@
+"""unittest module"""
+from unittest import TestCase, main
+
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.config import (
+    SetupThreadGroup,
+    TeardownThreadGroup,
+    TestPlan,
+    ThreadGroupSimple,
+)
+from pymeter.api.samplers import DummySampler
+from pymeter.api.stats import MAIN, WARMUP, SampleStats, StatsSnapshot, parse_export
+
+
+class TestSampleStats(TestCase):
+    """Testing aggregation of sample results"""
+
+    def test_percentiles(self):
+        """percentiles are computed with the nearest rank method"""
+        stats = SampleStats(count=100, histogram={v: 1 for v in range(1, 101)})
+        self.assertEqual(stats.sample_time_min_milliseconds, 1)
+        self.assertEqual(stats.sample_time_median_milliseconds, 50)
+        self.assertEqual(stats.sample_time_90_percentile_milliseconds, 90)
+        self.assertEqual(stats.sample_time_99_percentile_milliseconds, 99)
+        self.assertEqual(stats.sample_time_max_milliseconds, 100)
+
+    def test_empty_stats(self):
+        """empty stats should not fail"""
+        stats = SampleStats()
+        self.assertEqual(stats.sample_time_99_percentile_milliseconds, 0)
+        self.assertEqual(stats.error_rate, 0)
+        self.assertEqual(stats.throughput_per_second, 0)
+
+    def test_invalid_percentile(self):
+        with self.assertRaises(ValueError):
+            SampleStats().percentile(101)
+
+    def test_combine(self):
+        """combined stats keep exact percentiles"""
+        stats1 = SampleStats(2, 1, 10, 5, 30, 1000, 2000, 20, 2, {10: 1, 20: 1})
+        stats2 = SampleStats(2, 0, 10, 5, 70, 1500, 3000, 60, 4, {30: 1, 40: 1})
+        combined = SampleStats.combine([stats1, stats2])
+        self.assertEqual(combined.count, 4)
+        self.assertEqual(combined.errors, 1)
+        self.assertEqual(combined.received_bytes, 20)
+        self.assertEqual(combined.duration_milliseconds, 2000)
+        self.assertEqual(combined.throughput_per_second, 2)
+        self.assertEqual(combined.sample_time_mean_milliseconds, 25)
+        self.assertEqual(combined.sample_time_median_milliseconds, 20)
+        self.assertEqual(combined.sample_time_max_milliseconds, 40)
+
+    def test_parse_export(self):
+        """exported lines are parsed into stats keyed by kind, thread group and label"""
+        duration, collected = parse_export(
+            "2500000\nmain\tThread Group\tlabel\t2,1,10,5,30,1000,2000,20,2,1\t10:1,20:1\n"
+        )
+        self.assertEqual(duration, 2.5)
+        stats = collected[("main", "Thread Group", "label")]
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.histogram, {10: 1, 20: 1})
+        self.assertEqual(stats.connections, 1)
+        self.assertEqual(stats.connection_reuse_rate, 0.5)
+
+    def test_snapshot_keeps_precision(self):
+        """means and durations aren't rounded to whole milliseconds"""
+        stats = SampleStats(3, 0, 0, 0, 10, 1000, 2000, 0, 0, {3: 2, 4: 1})
+        snapshot = StatsSnapshot.from_sample_stats(stats, 1234.5678)
+        self.assertAlmostEqual(snapshot.sample_time_mean_milliseconds, 10 / 3)
+        self.assertEqual(snapshot.duration_milliseconds, 1234.5678)
+        self.assertEqual(snapshot.to_dict()["count"], 3)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = StatsSnapshot.from_sample_stats(SampleStats(), 0)
+        with self.assertRaises(AttributeError):
+            snapshot.count = 1
+
+
+class TestTestPlanStatsBreakdown(TestCase):
+    """Testing per label and per thread group stats of a test run"""
+
+    def test_by_label_and_by_thread_group(self):
+        """stats are broken down by label and thread group,
+        setup and teardown samples are excluded from headline numbers"""
+        tg_setup = SetupThreadGroup(DummySampler("setup", "hi dummy"))
+        tg1 = ThreadGroupSimple(2, 3, DummySampler("health", "ok"), name="Health")
+        tg2 = ThreadGroupSimple(1, 4, DummySampler("checkout", "ok"), name="Checkout")
+        tg_teardown = TeardownThreadGroup(DummySampler("teardown", "hi dummy"))
+        stats = TestPlan(tg_setup, tg1, tg2, tg_teardown, breakdown=True).run()
+
+        by_label = stats.by_label()
+        self.assertSetEqual(set(by_label), {"health", "checkout"})
+        self.assertEqual(by_label["health"].count, 6)
+        self.assertEqual(by_label["checkout"].count, 4)
+        self.assertEqual(stats.overall.count, 10)
+
+        by_thread_group = stats.by_thread_group()
+        self.assertEqual(by_thread_group["Health"].count, 6)
+        self.assertEqual(by_thread_group["Checkout"].count, 4)
+        self.assertEqual(sum(s.count for s in by_thread_group.values()), 12)
+
+    def test_snapshot(self):
+        """the snapshot holds the same numbers as the stats properties"""
+        stats = TestPlan(ThreadGroupSimple(2, 5, DummySampler("dummy", "ok"))).run()
+        snapshot = stats.snapshot()
+        self.assertIs(snapshot, stats.snapshot())
+        self.assertEqual(snapshot.count, 10)
+        self.assertEqual(int(snapshot.sample_time_max_milliseconds), stats.sample_time_max_milliseconds)
+        self.assertEqual(int(snapshot.duration_milliseconds), stats.duration_milliseconds)
+        self.assertDictEqual(stats.to_dict(), snapshot.to_dict())
+
+    def test_warmup_is_kept_apart(self):
+        collected = {
+            (MAIN, "Thread Group", "dummy"): SampleStats(count=8, histogram={10: 8}),
+            (WARMUP, "Thread Group", "dummy"): SampleStats(count=2, histogram={500: 2}),
+        }
+        stats = TestPlan.TestPlanStats(None, collected, 1000.0)
+        self.assertEqual(stats.overall.count, 8)
+        self.assertEqual(stats.sample_time_max_milliseconds, 10)
+        self.assertEqual(stats.by_label()["dummy"].count, 8)
+        self.assertEqual(stats.by_thread_group()["Thread Group"].count, 8)
+        self.assertEqual(stats.warmup.count, 2)
+
+    def test_breakdown_is_opt_in(self):
+        """plans only collect the breakdown on request, or when they have a warmup"""
+        dummy = DummySampler("dummy", "ok")
+        self.assertIsNone(TestPlan(ThreadGroupSimple(1, 1, dummy))._stats_collector)
+        self.assertIsNotNone(TestPlan(ThreadGroupSimple(1, 1, dummy), breakdown=True)._stats_collector)
+        self.assertIsNotNone(TestPlan(ThreadGroupSimple(1, 1, dummy), warmup_iterations=1)._stats_collector)
+        test_plan = TestPlan(ThreadGroupSimple(1, 1, dummy, warmup_iterations=1))
+        self.assertIsNotNone(test_plan._stats_collector)
+        self.assertEqual(len(test_plan.node.build()._children), 2)
+        with self.assertRaises(ValueError):
+            TestPlan(ThreadGroupSimple(1, 1, dummy)).live_stats()
+
+    def test_breakdown_needs_a_collector(self):
+        stats = TestPlan.TestPlanStats(None)
+        for read in (lambda: stats.collected, lambda: stats.overall, stats.by_label, stats.by_thread_group):
+            with self.assertRaises(ValueError):
+                read()
+
+    def test_invalid_warmup(self):
+        with self.assertRaises(ValueError):
+            TestPlan(warmup_seconds=-1)
+        with self.assertRaises(ValueError):
+            ThreadGroupSimple(1, 1, DummySampler("dummy", "ok"), warmup_iterations=-1)
+
+    def test_warmup_iterations(self):
+        """the first iterations of each thread are only reported as warmup"""
+        tg1 = ThreadGroupSimple(2, 5, DummySampler("health", "ok"), name="Health", warmup_iterations=2)
+        tg2 = ThreadGroupSimple(1, 4, DummySampler("checkout", "ok"), name="Checkout")
+        stats = TestPlan(tg1, tg2).run()
+        self.assertEqual(stats.warmup.count, 4)
+        self.assertEqual(stats.by_label()["health"].count, 6)
+        self.assertEqual(stats.overall.count, 10)
+
+    def test_test_plan_warmup(self):
+        thread_group = ThreadGroupSimple(2, 5, DummySampler("dummy", "ok"))
+        stats = TestPlan(thread_group, warmup_iterations=1).run()
+        self.assertEqual(stats.warmup.count, 2)
+        self.assertEqual(stats.overall.count, 8)
+        stats = TestPlan(thread_group, warmup_seconds=3600).run()
+        self.assertEqual(stats.warmup.count, 10)
+        self.assertEqual(stats.overall.count, 0)
+
+    def test_failed_assertions_are_errors(self):
+        """samples failing an assertion are counted as errors, the last sample of each thread too"""
+        thread_group = ThreadGroupSimple(
+            2,
+            3,
+            DummySampler("ok", "ok", ResponseAssertion().contains_substrings("ok")),
+            DummySampler("ko", "ok", ResponseAssertion().contains_substrings("notfound")),
+        )
+        stats = TestPlan(thread_group, breakdown=True).run()
+        self.assertEqual(stats.by_label()["ok"].errors, 0)
+        self.assertEqual(stats.by_label()["ko"].errors, 6)
+        self.assertEqual(stats.overall.count, 12)
+        self.assertEqual(stats.overall.errors, 6)
+
+
+if __name__ == "__main__":
+    main()
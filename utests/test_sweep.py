@@ -0,0 +1,78 @@
+"""unittest module"""
+from unittest import TestCase, main
+
+from pymeter.api.config import ArrivalRateThreadGroup, TestPlan, ThreadGroupSimple
+from pymeter.api.samplers import DummySampler
+from pymeter.api.stats import SampleStats
+from pymeter.api.sweep import analyze, at_level, sweep
+
+
+def stats(throughput_per_second: float, mean_milliseconds: int) -> SampleStats:
+    """stats of samples taking `mean_milliseconds`, sent at `throughput_per_second` for 10 seconds"""
+    count = int(throughput_per_second * 10)
+    return SampleStats(
+        count=count,
+        sample_time_sum_milliseconds=count * mean_milliseconds,
+        first_timestamp_milliseconds=0,
+        last_timestamp_milliseconds=10000,
+        histogram={mean_milliseconds: count},
+    )
+
+
+class TestSweep(TestCase):
+    """Testing load sweeps"""
+
+    def test_knee(self):
+        """throughput scales up to 40 threads, then flattens while latency grows"""
+        result = analyze(
+            "threads",
+            [10, 20, 40, 80, 160],
+            [stats(100, 100), stats(200, 100), stats(390, 102), stats(410, 195), stats(400, 400)],
+        )
+        self.assertEqual(result.knee, 40)
+        self.assertIsNone(result.levels[0].throughput_elasticity)
+        self.assertAlmostEqual(result.levels[1].throughput_elasticity, 1.0)
+        self.assertAlmostEqual(result.levels[1].latency_elasticity, 0.0)
+        self.assertEqual([row["knee"] for row in result.rows()], [False, False, True, False, False])
+        table = result.table().splitlines()
+        self.assertEqual(len(table), 6)
+        self.assertTrue(table[3].endswith("<- knee"))
+
+    def test_no_knee(self):
+        result = analyze("rps", [10, 20, 40], [stats(10, 50), stats(20, 50), stats(40, 52)])
+        self.assertIsNone(result.knee)
+
+    def test_at_level(self):
+        test_plan = TestPlan(
+            ThreadGroupSimple(1, 5, DummySampler("dummy", "ok"), name="A"),
+            ThreadGroupSimple(2, 5, DummySampler("dummy", "ok"), name="B"),
+        )
+        node = at_level(test_plan.node, "threads", 8)
+        thread_groups = [child for child in node.child_nodes() if child.element_class.endswith("ThreadGroupSimple")]
+        self.assertEqual([child.bind().arguments["number_of_threads"] for child in thread_groups], [8, 8])
+        with self.assertRaises(ValueError):
+            at_level(test_plan.node, "rps", 8)
+
+    def test_at_rate(self):
+        test_plan = TestPlan(ArrivalRateThreadGroup(1, 1, 5, 50, DummySampler("dummy", "ok")))
+        node = at_level(test_plan.node, "rps", 25)
+        self.assertEqual(node.child_nodes()[-1].bind().arguments["rps"], 25)
+
+    def test_invalid_levels(self):
+        test_plan = TestPlan(ThreadGroupSimple(1, 5, DummySampler("dummy", "ok")))
+        with self.assertRaises(ValueError):
+            sweep(test_plan)
+        with self.assertRaises(ValueError):
+            sweep(test_plan, threads=[1, 2], rps=[1, 2])
+        with self.assertRaises(ValueError):
+            sweep(test_plan, threads=[0, 2])
+
+    def test_sweep(self):
+        test_plan = TestPlan(ThreadGroupSimple(1, 5, DummySampler("dummy", "ok")))
+        result = sweep(test_plan, threads=[4, 1, 2])
+        self.assertEqual([level.level for level in result.levels], [1, 2, 4])
+        self.assertEqual([level.stats.count for level in result.levels], [5, 10, 20])
+
+
+if __name__ == "__main__":
+    main()
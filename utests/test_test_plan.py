@@ -1,8 +1,11 @@
 """unittest module"""
+import asyncio
 import os
+import time
 import uuid
 from unittest import TestCase, main
 
+from pymeter.api import end_test_elements, start_test_elements
 from pymeter.api.config import (
     SetupThreadGroup,
     TeardownThreadGroup,
@@ -139,6 +142,145 @@ class TestTestPlanClass(TestCase):
             lst = [line.split(",")[2] for line in jtl_file]
             self.assertListEqual(["dummy_setup", "dummy_main", "dummy_teardown"], lst)
 
+    def test_start_and_wait(self):
+        """start should return immediately and wait should return the stats"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        test_plan = TestPlan(ThreadGroupSimple(1, 1, dummy_sampler))
+        test_run = test_plan.start()
+        stats = test_run.wait(timeout=60)
+        self.assertTrue(test_run.done())
+        self.assertEqual(
+            stats.get_java_class_name(),
+            "us.abstracta.jmeter.javadsl.core.TestPlanStats",
+        )
+
+    def test_wait_timeout_and_stop(self):
+        """wait should return None when the timeout expires, stop should cut the hold period short"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        tg1 = ThreadGroupWithRampUpAndHold(1, 1, 60, dummy_sampler)
+        test_run = TestPlan(tg1).start()
+        self.assertIsNone(test_run.wait(timeout=3))
+        start = time.time()
+        test_run.stop()
+        stats = test_run.wait(timeout=30)
+        self.assertIsNotNone(stats)
+        self.assertLess(time.time() - start, 30)
+        self.assertLess(stats.duration_milliseconds, 60000)
+
+    def test_stop_while_lowering(self):
+        """a stop requested before the engine started should stop the test once it starts"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        tg1 = ThreadGroupWithRampUpAndHold(1, 1, 60, dummy_sampler)
+        test_run = TestPlan(tg1).start()
+        time.sleep(0.01)
+        test_run.stop()
+        start = time.time()
+        try:
+            test_run.wait(timeout=30)
+        except RuntimeError:
+            # the stop was seen before the test plan started
+            pass
+        self.assertTrue(test_run.done())
+        self.assertLess(time.time() - start, 30)
+
+    def test_cancel(self):
+        """cancel should stop the test immediately"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        tg1 = ThreadGroupWithRampUpAndHold(1, 1, 60, dummy_sampler)
+        test_run = TestPlan(tg1).start()
+        time.sleep(3)
+        test_run.cancel()
+        self.assertIsNotNone(test_run.wait(timeout=30))
+
+    def test_run_async(self):
+        """run_async should not block the event loop"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        test_plan = TestPlan(ThreadGroupSimple(1, 1, dummy_sampler))
+
+        async def run():
+            ticks = 0
+            task = asyncio.ensure_future(test_plan.run_async())
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return ticks, task.result()
+
+        ticks, stats = asyncio.run(run())
+        self.assertGreater(ticks, 0)
+        self.assertGreaterEqual(stats.duration_milliseconds, 0)
+
+    def test_run_async_cancellation(self):
+        """cancelling the awaiting task should cancel the test"""
+        dummy_sampler = DummySampler("dummy", "hi dummy")
+        tg1 = ThreadGroupWithRampUpAndHold(1, 1, 60, dummy_sampler)
+        test_plan = TestPlan(tg1)
+
+        async def run():
+            await asyncio.wait_for(test_plan.run_async(), timeout=3)
+
+        start = time.time()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run())
+        self.assertLess(time.time() - start, 30)
+
+
+class Recording(HtmlReporter):
+    """reporter recording the calls to its test hooks"""
+
+    def __init__(self, events, name, fails=False):
+        self.events, self.name, self.fails = events, name, fails
+        super().__init__()
+        self._recording_instance = self._html_reporter_instance
+
+    def test_started(self):
+        if self.fails:
+            raise RuntimeError(f"{self.name} can't start")
+        self.events.append(("started", self.name))
+
+    def test_ended(self):
+        self.events.append(("ended", self.name))
+
+
+class TestTestHooks(TestCase):
+    """Testing that children failing to start don't leak the other children"""
+
+    def test_start_test_elements(self):
+        events = []
+        elements = [Recording(events, "first"), Recording(events, "second", fails=True), Recording(events, "third")]
+        with self.assertRaises(RuntimeError):
+            start_test_elements(elements)
+        self.assertEqual(events, [("started", "first"), ("ended", "first")])
+
+    def test_end_test_elements(self):
+        """every element is ended even when one fails, the first error is raised"""
+        events = []
+
+        class FailingEnd(Recording):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self._failing_end_instance = self._html_reporter_instance
+
+            def test_ended(self):
+                raise RuntimeError(f"{self.name} can't end")
+
+        with self.assertRaisesRegex(RuntimeError, "first can't end"):
+            end_test_elements([FailingEnd(events, "first"), FailingEnd(events, "second"), Recording(events, "third")])
+        self.assertEqual(events, [("ended", "third")])
+
+    def test_child_failing_to_start(self):
+        """the children started before a child failing to start are ended, the others never start"""
+        events = []
+        thread_group = ThreadGroupSimple(1, 1, DummySampler("dummy", "hi dummy"))
+        test_plan = TestPlan(
+            thread_group,
+            Recording(events, "first"),
+            Recording(events, "second", fails=True),
+            Recording(events, "third"),
+        )
+        with self.assertRaisesRegex(RuntimeError, "second can't start"):
+            test_plan.run()
+        self.assertEqual(events, [("started", "first"), ("ended", "first")])
+
 
 if __name__ == "__main__":
     main()
@@ -2,11 +2,16 @@
 from unittest import TestCase, main
 
 from pymeter.api.config import (
+    ArrivalRateStages,
+    ArrivalRateThreadGroup,
+    ArrivalStats,
     SetupThreadGroup,
     TeardownThreadGroup,
+    TestPlan,
+    ThreadGroupStages,
     ThreadGroupWithRampUpAndHold,
 )
-from pymeter.api.samplers import HttpSampler
+from pymeter.api.samplers import DummySampler, HttpSampler
 
 
 class TestThreadGroupClass(TestCase):
@@ -89,5 +94,108 @@ class TestThreadGroupClass(TestCase):
         )
 
 
+class TestArrivalRateThreadGroup(TestCase):
+    """Testing the open model thread group"""
+
+    def test_creation_of_arrival_rate_thread_group(self):
+        """when creating the python class, it should wrap around the correct java class"""
+        python_thread_group_object = ArrivalRateThreadGroup(10, 1, 1, 5)
+        self.assertEqual(
+            python_thread_group_object.get_java_class_name(),
+            "us.abstracta.jmeter.javadsl.core.threadgroups.RpsThreadGroup",
+        )
+
+    def test_invalid_max_threads(self):
+        with self.assertRaises(ValueError):
+            ArrivalRateThreadGroup(10, 1, 1, 0)
+
+    def test_ended_before_started(self):
+        """ending a thread group that never started leaves no arrival stats"""
+        thread_group = ArrivalRateThreadGroup(10, 1, 1, 5)
+        thread_group.test_ended()
+        self.assertIsNone(thread_group.arrival_stats)
+
+    def test_scheduled_arrivals(self):
+        """the rate is ramped up linearly, then held"""
+        thread_group = ArrivalRateThreadGroup(10, 2, 3, 5)
+        self.assertEqual(thread_group.scheduled_arrivals(0), 0)
+        self.assertEqual(thread_group.scheduled_arrivals(1), 2.5)
+        self.assertEqual(thread_group.scheduled_arrivals(2), 10)
+        self.assertEqual(thread_group.scheduled_arrivals(4), 30)
+        self.assertEqual(thread_group.scheduled_arrivals(60), 40)
+
+    def test_schedule_segments(self):
+        """ramps and holds of the schedule, empty ones are left out"""
+        thread_group = ArrivalRateStages([(10, 2, 3), (20, 0, 1)], 5)
+        self.assertEqual(
+            thread_group._schedule_segments(),  # pylint: disable=protected-access
+            "[[0.0, 2.0, 0.0, 10.0], [2.0, 3.0, 10.0, 10.0], [5.0, 1.0, 20.0, 20.0]] as double[][]",
+        )
+
+    def test_dropped_arrivals(self):
+        self.assertEqual(ArrivalStats(100, 90, 20).dropped, 10)
+        self.assertEqual(ArrivalStats(100, 101, 0).dropped, 0)
+
+    def test_arrival_stats(self):
+        """arrivals are counted once per iteration"""
+        thread_group = ArrivalRateThreadGroup(
+            20, 1, 2, 5, DummySampler("first", "ok"), DummySampler("second", "ok")
+        )
+        stats = TestPlan(thread_group, breakdown=True).run()
+        arrival_stats = thread_group.arrival_stats
+        self.assertGreater(arrival_stats.started, 0)
+        self.assertEqual(stats.by_label()["first"].count, arrival_stats.started)
+        self.assertLessEqual(arrival_stats.late, arrival_stats.started)
+
+    def test_arrivals_on_time(self):
+        """arrivals started while threads are free are on time, even when all the threads are in use"""
+        thread_group = ArrivalRateThreadGroup(20, 0, 2, 1, DummySampler("dummy", "ok"))
+        TestPlan(thread_group).run()
+        arrival_stats = thread_group.arrival_stats
+        self.assertLess(arrival_stats.late, arrival_stats.started / 2)
+
+
+class TestStages(TestCase):
+    """Testing multi stage load profiles"""
+
+    def test_creation_of_thread_group_stages(self):
+        """when creating the python class, it should wrap around the correct java class"""
+        python_thread_group_object = ThreadGroupStages([(2, 1, 1), (4, 1, 1)])
+        self.assertEqual(
+            python_thread_group_object.get_java_class_name(),
+            "us.abstracta.jmeter.javadsl.core.threadgroups.DslDefaultThreadGroup",
+        )
+
+    def test_creation_of_arrival_rate_stages(self):
+        """when creating the python class, it should wrap around the correct java class"""
+        python_thread_group_object = ArrivalRateStages([(10, 1, 1), (20, 1, 1)], 5)
+        self.assertEqual(
+            python_thread_group_object.get_java_class_name(),
+            "us.abstracta.jmeter.javadsl.core.threadgroups.RpsThreadGroup",
+        )
+
+    def test_empty_stages(self):
+        with self.assertRaises(ValueError):
+            ThreadGroupStages([])
+
+    def test_scheduled_arrivals_of_stages(self):
+        """each stage ramps from the rate of the previous stage"""
+        thread_group = ArrivalRateStages([(10, 2, 1), (20, 2, 1), (0, 0, 5)], 5)
+        self.assertEqual(thread_group.scheduled_arrivals(3), 20)
+        self.assertEqual(thread_group.scheduled_arrivals(6), 20 + 30 + 20)
+        self.assertEqual(thread_group.scheduled_arrivals(60), 70)
+
+    def test_stage_stats(self):
+        """samples are assigned to the stage running when they started"""
+        thread_group = ThreadGroupStages(
+            [(1, 0, 1), (2, 0, 1)], DummySampler("dummy", "ok")
+        )
+        stats = TestPlan(thread_group, breakdown=True).run()
+        stage_stats = thread_group.stage_stats()
+        self.assertEqual(len(stage_stats), 2)
+        self.assertTrue(all(s.count > 0 for s in stage_stats))
+        self.assertEqual(sum(s.count for s in stage_stats), stats.overall.count)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+"""unittest module"""
+from array import array
+from unittest import TestCase, main
+
+from pymeter.api import ChildrenAreNotAllowed
+from pymeter.api.assertions import ResponseAssertion
+from pymeter.api.config import TestPlan, ThreadGroupSimple
+from pymeter.api.samplers import DummySampler
+from pymeter.api.timeline import Timeline, TimeSeries, histogram_value
+
+
+def series() -> TimeSeries:
+    """four one second buckets, the third one without samples"""
+    return TimeSeries(
+        1000,
+        5000,
+        array("q", [2, 4, 0, 1]),
+        array("q", [0, 1, 0, 1]),
+        array("q", [20, 400, 0, 300]),
+        [{10: 2}, {50: 2, 150: 2}, {}, {300: 1}],
+    )
+
+
+class TestTimeline(TestCase):
+    """Testing time series of results"""
+
+    def test_histogram_value(self):
+        self.assertEqual(histogram_value(0), 0)
+        self.assertEqual(histogram_value(127), 127)
+        self.assertEqual(histogram_value(128), 128)
+        self.assertEqual(histogram_value(1001), 1000)
+        for milliseconds in (200, 1001, 65537, 10**7):
+            self.assertLess(milliseconds - histogram_value(milliseconds), milliseconds / 64)
+
+    def test_series(self):
+        time_series = series()
+        self.assertEqual(len(time_series), 4)
+        self.assertEqual(time_series.throughput_per_second.tolist(), [2.0, 4.0, 0.0, 1.0])
+        self.assertEqual(time_series.error_rate.tolist(), [0.0, 0.25, 0.0, 1.0])
+        self.assertEqual(time_series.sample_time_mean_milliseconds.tolist(), [10.0, 100.0, 0.0, 300.0])
+        self.assertEqual(time_series.percentile(50).tolist(), [10, 50, 0, 300])
+        stats = time_series.stats()
+        self.assertEqual(stats.count, 7)
+        self.assertEqual(stats.first_timestamp_milliseconds, 5000)
+        self.assertEqual(stats.last_timestamp_milliseconds, 9000)
+        self.assertEqual(stats.percentile(100), 300)
+
+    def test_between(self):
+        steady = series().between(1, 3)
+        self.assertEqual(steady.start_milliseconds, 6000)
+        self.assertEqual(steady.count.tolist(), [4, 0])
+        self.assertEqual(series().between(2.5).count.tolist(), [1])
+        self.assertEqual(len(series().between(3, 1)), 0)
+
+    def test_aligned_series(self):
+        timeline = Timeline()
+        timeline._buckets = {  # pylint: disable=protected-access
+            "a": {5: [2, 0, 20, {10: 2}], 7: [1, 1, 300, {300: 1}]},
+            "b": {6: [1, 0, 5, {5: 1}]},
+        }
+        by_label = timeline.series()
+        self.assertEqual(by_label["a"].count.tolist(), [2, 0, 1])
+        self.assertEqual(by_label["b"].count.tolist(), [0, 1, 0])
+        self.assertEqual(by_label["b"].start_milliseconds, 5000)
+        overall = timeline.overall()
+        self.assertEqual(overall.count.tolist(), [2, 1, 1])
+        self.assertEqual(overall.histograms[1], {5: 1})
+
+    def test_invalid_intervals(self):
+        with self.assertRaises(ValueError):
+            Timeline(interval_seconds=0)
+        with self.assertRaises(ValueError):
+            Timeline(flush_interval_seconds=0)
+        with self.assertRaises(ChildrenAreNotAllowed):
+            Timeline().children()
+
+    def test_timeline(self):
+        failing = DummySampler("failing", "ok", ResponseAssertion().contains_substrings("missing"))
+        thread_group = ThreadGroupSimple(2, 10, DummySampler("dummy", "ok"), failing)
+        timeline = Timeline(interval_seconds=0.5, flush_interval_seconds=0.1)
+        stats = TestPlan(thread_group, timeline, breakdown=True).run()
+        by_label = timeline.series()
+        self.assertEqual(sorted(by_label), ["dummy", "failing"])
+        self.assertEqual(sum(by_label["dummy"].count), 20)
+        self.assertEqual(sum(by_label["failing"].errors), 20)
+        self.assertEqual(timeline.overall().stats().count, stats.overall.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,14 @@
 from unittest import TestCase, main
 from pymeter.api import ChildrenAreNotAllowed
 from pymeter.api.config import TestPlan, ThreadGroupSimple
-from pymeter.api.samplers import HttpSampler
-from pymeter.api.timers import UniformRandomTimer, ConstantTimer
+from pymeter.api.samplers import DummySampler, HttpSampler
+from pymeter.api.timers import (
+    ConstantThroughputTimer,
+    ConstantTimer,
+    ThroughputReport,
+    ThroughputShapingTimer,
+    UniformRandomTimer,
+)
 
 
 class TestTimer(TestCase):
@@ -53,5 +59,48 @@ class TestTimer(TestCase):
         self.assertGreaterEqual(stats.duration_milliseconds, 2000)
 
 
+class TestThroughputTimer(TestCase):
+    """Testing pacing of samplers to a target rate"""
+
+    def test_scheduled_count(self):
+        """rates change linearly within a segment, the last rate is held"""
+        timer = ThroughputShapingTimer([(0, 10, 2), (10, 10, 3)])
+        self.assertEqual(timer.scheduled_count(1), 2.5)
+        self.assertEqual(timer.scheduled_count(2), 10)
+        self.assertEqual(timer.scheduled_count(5), 40)
+        self.assertEqual(timer.scheduled_count(6), 50)
+
+    def test_invalid_schedule(self):
+        with self.assertRaises(ValueError):
+            ThroughputShapingTimer([])
+        with self.assertRaises(ValueError):
+            ThroughputShapingTimer([(10, 0, 1)])
+        with self.assertRaises(ValueError):
+            ConstantThroughputTimer(0)
+
+    def test_deviation(self):
+        self.assertAlmostEqual(ThroughputReport(10, 9, 90, 0).deviation, -0.1)
+
+    def test_constant_throughput_timer(self):
+        """samples shared by all threads are paced to the target rate"""
+        timer = ConstantThroughputTimer(20)
+        thread_group = ThreadGroupSimple(4, 10, DummySampler("dummy", "ok"), timer)
+        stats = TestPlan(thread_group).run()
+        self.assertGreaterEqual(stats.duration_milliseconds, 1900)
+        report = timer.report()
+        self.assertEqual(report.samples, 40)
+        self.assertLess(abs(report.deviation), 0.2)
+        # the counters are kept in python, nothing is left in the system properties
+        self.assertIsNone(ConstantThroughputTimer.java_system.getProperties().get(timer._key))  # pylint: disable=protected-access
+
+    def test_per_thread_throughput_timer(self):
+        """samples of each thread are paced to the target rate"""
+        timer = ConstantThroughputTimer(10, per_thread=True)
+        thread_group = ThreadGroupSimple(2, 10, DummySampler("dummy", "ok"), timer)
+        stats = TestPlan(thread_group).run()
+        self.assertGreaterEqual(stats.duration_milliseconds, 900)
+        self.assertEqual(timer.report().samples, 20)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+"""unittest module"""
+import os
+import tempfile
+from unittest import TestCase, main
+
+from pymeter.api.config import (
+    CsvDataset,
+    TestPlan,
+    ThreadGroupSimple,
+    ThreadGroupWithRampUpAndHold,
+)
+from pymeter.api.reporters import ResultListener
+from pymeter.api.samplers import DummySampler
+from pymeter.api.stats import SampleStats
+from pymeter.api.workers import merge_results, shard_csv_file, split_count
+
+CSV_FILE_PATH = "utests/resources/test_data.csv"
+
+
+class TestSharding(TestCase):
+    """Testing how test plans are split between workers"""
+
+    def test_split_count(self):
+        """threads are split as evenly as possible"""
+        self.assertListEqual([split_count(10, i, 3) for i in range(3)], [4, 3, 3])
+        self.assertListEqual([split_count(1, i, 2) for i in range(2)], [1, 0])
+
+    def test_shard_csv_file(self):
+        """each worker gets its own rows, and the header"""
+        with tempfile.TemporaryDirectory() as directory:
+            shards = [shard_csv_file(CSV_FILE_PATH, i, 2, directory) for i in range(2)]
+            contents = []
+            for shard in shards:
+                with open(shard, encoding="utf-8") as shard_file:
+                    contents.append(shard_file.read().splitlines())
+        self.assertListEqual(contents, [["id", "1", "3"], ["id", "2"]])
+
+    def test_shard_thread_groups(self):
+        """thread counts of the shards add up to the original count"""
+        tg1 = ThreadGroupSimple(5, 2, DummySampler("dummy", "hi dummy"), name="G1")
+        tg2 = ThreadGroupWithRampUpAndHold(3, 1, 2)
+        test_plan = TestPlan(tg1, tg2)
+        with tempfile.TemporaryDirectory() as directory:
+            shards = [test_plan.node.shard(i, 2, directory) for i in range(2)]
+        self.assertListEqual([s.args[0].args[0] for s in shards], [3, 2])
+        self.assertListEqual([s.args[0].kwargs for s in shards], [{"name": "G1"}] * 2)
+        self.assertListEqual([s.args[1].args[0] for s in shards], [2, 1])
+
+    def test_result_listener_is_not_sharded(self):
+        test_plan = TestPlan(ThreadGroupSimple(1, 1), ResultListener())
+        with self.assertRaises(ValueError):
+            test_plan.node.shard(0, 2, tempfile.gettempdir())
+
+    def test_merge_results(self):
+        """merged percentiles are exact"""
+        worker1 = (1000.0, {("main", "G", "a"): SampleStats(count=2, histogram={10: 1, 20: 1})})
+        worker2 = (1500.0, {("main", "G", "a"): SampleStats(count=2, histogram={30: 1, 40: 1})})
+        duration, merged = merge_results([worker1, worker2])
+        self.assertEqual(duration, 1500.0)
+        self.assertEqual(merged[("main", "G", "a")].count, 4)
+        self.assertEqual(merged[("main", "G", "a")].sample_time_90_percentile_milliseconds, 40)
+
+
+class TestWorkers(TestCase):
+    """Testing execution of a test plan by several workers"""
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            TestPlan().run(workers=0)
+
+    def test_run_with_workers(self):
+        """all the samples of all the workers are merged"""
+        tg1 = ThreadGroupSimple(5, 4, DummySampler("dummy", "hi dummy"), name="G1")
+        csv_data_set = CsvDataset(CSV_FILE_PATH)
+        tg2 = ThreadGroupSimple(3, 1, DummySampler("dummy_${id}", "hi dummy"), name="G2")
+        stats = TestPlan(tg1, tg2, csv_data_set).run(workers=2)
+        self.assertEqual(stats.by_thread_group()["G1"].count, 20)
+        self.assertSetEqual(
+            {label for label in stats.by_label() if label.startswith("dummy_")},
+            {"dummy_1", "dummy_2", "dummy_3"},
+        )
+        self.assertEqual(stats.overall.count, 23)
+        self.assertGreater(stats.duration_milliseconds, 0)
+
+
+if __name__ == "__main__":
+    main()